@@ -7,6 +7,7 @@ from llama_index.core import VectorStoreIndex, StorageContext
 from qdrant_client import QdrantClient
 from llama_index.vector_stores.qdrant import QdrantVectorStore
 
+from services.embedding_cache import embedding_cache
 from services.settings import configure_llamaindex
 from services.loader import load_txt_as_docs
 
@@ -97,6 +98,9 @@ def main() -> int:
             show_progress=True,
         )
 
+    # 적재 중에는 디스크에 쓰지 않으므로 마지막에 한 번 저장 (EMBED_CACHE_PATH 설정 시)
+    embedding_cache.save()
+
     print(
         f"[OK] Indexed streaming: files={total_files}, docs={total_docs} "
         f"-> Qdrant collection='{args.collection}' ({args.qdrant_url})"
@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware # 1. 미들웨어 추가
 from fastapi.staticfiles import StaticFiles
 import os 
@@ -6,7 +7,9 @@ from pathlib import Path
 import logging
 from backend.database import db_manager
 from backend.routes import patents, auth, chatbot 
-from backend.services import search_service
+from backend.services import metrics
+from backend.services.chat_bootstrap import CHAT_INIT_MODE, chat_bootstrap
+from backend.services.session_store import session_store
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(
@@ -27,6 +30,9 @@ if should_quiet_third_party_logs:
 
 app = FastAPI(title="AI INNOTASK 서비스 API")
 
+# 엔드포인트별 지연시간 / 처리 중 요청 수 수집 (/metrics로 노출)
+app.add_middleware(metrics.MetricsMiddleware)
+
 # 2. CORS 설정 추가 (라우터 연결보다 반드시 위에 위치!)
 cors_origins_raw: str = os.getenv("CORS_ORIGINS", "")
 default_cors_origins: list[str] = [
@@ -69,18 +75,23 @@ if os.path.isdir(PDF_DIR):
 else:
     print(f"⚠️ 경고: PDF 폴더를 찾을 수 없습니다: {PDF_DIR}")
 
+# 시작 처리(startup 이벤트)가 끝났는지 - /ready 응답에 사용
+api_started: bool = False
+
 @app.on_event("startup")
 async def startup():
     # db_manager.connect()
     
-    #챗봇 검색 서비스 초기화
-    try:
-        await search_service.initialize_llamaindex()
-        print("챗봇 검색 서비스 초기화 완료")
-    except Exception as e:
-        print(f"챗봇 검색 서비스 초기화 실패:{e}")
-        #서버는 시작하되 챗봇 기능만 비활성화
+    #대화 내역 저장소 (mongo: 인덱스 확인 + write-behind 태스크 시작)
+    await session_store.start()
+    
+    #챗봇 검색 서비스 초기화는 백그라운드로 진행 (특허 검색은 바로 응답)
+    #초기화가 끝나기 전 챗봇 요청은 503 "warming_up"
+    if CHAT_INIT_MODE == "background":
+        chat_bootstrap.start()
         
+    global api_started
+    api_started = True
     print("모든 서비스가 준비되었습니다.")
     
     
@@ -89,13 +100,15 @@ async def startup():
 async def shutdown():
     # db_manager.close()
     
+    #저장 대기 중인 대화 내역 flush
+    try:
+        await session_store.close()
+    except Exception as e:
+        print(f"대화 내역 저장소 종료 중 오류 발생!: {e}")
     
     #비동기 클라이언트 정리
     try:
-        if hasattr(search_service, "client_openai_async") and search_service.client_openai_async:
-            await search_service.client_openai_async.close()
-        if hasattr(search_service, "client_qdrant_async") and search_service.client_qdrant_async:
-            await search_service.client_qdrant_async.close()
+        await chat_bootstrap.shutdown()
         print("챗봇 검색 서비스 종료 완료")
     except Exception as e:
         print(f"챗봇 검색 서비스 종료 중 오류 발생!: {e}")
@@ -107,4 +120,25 @@ app.include_router(chatbot.router, prefix="/api/chatbot", tags=["Chatbot"])
 
 @app.get("/")
 async def index():
-    return {"status": "online", "message": "AI INNOTASK API Server"}
\ No newline at end of file
+    return {"status": "online", "message": "AI INNOTASK API Server"}
+
+
+@app.get("/ready", include_in_schema=False)
+async def readiness():
+    """API readiness probe - 시작 처리가 끝난 워커는 바로 200 (특허 검색은 챗봇 초기화 / Ollama 상태와 무관하게 라우팅)"""
+    if not api_started:
+        return JSONResponse({"status": "starting"}, status_code=503)
+    return JSONResponse({"status": "ready", "chat": chat_bootstrap.status}, status_code=200)
+
+
+@app.get("/ready/chat", include_in_schema=False)
+async def chat_readiness():
+    """챗봇 라우팅용 readiness probe - 챗봇 초기화 + 모델 워밍업이 끝난 워커만 200"""
+    snapshot = chat_bootstrap.snapshot()
+    warm = chat_bootstrap.ready and snapshot.get("warmup", {}).get("status") == "warm"
+    return JSONResponse(snapshot, status_code=200 if warm else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
\ No newline at end of file
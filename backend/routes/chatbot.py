@@ -1,17 +1,28 @@
-from functools import lru_cache
-from fastapi import APIRouter, HTTPException, Depends
+import json
+from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 
-from backend.services.chatbot_engine import ChatbotEngine
+from backend.services.admission import AdmissionRejected
+from backend.services.chat_bootstrap import ChatNotReady, chat_bootstrap
+from backend.services.page_cursor import InvalidCursor
+from backend.services.session_store import CHAT_HISTORY_PAGE_SIZE, session_store
 
 
 router = APIRouter()
 
-@lru_cache(maxsize=1)
-def get_chatbot_engine() -> ChatbotEngine:
-    return ChatbotEngine()
+# ChatbotEngine(= LlamaIndex/Ollama/Qdrant)은 백그라운드 초기화가 끝난 뒤에만 사용 가능
+# 준비 전에는 503 + Retry-After로 "warming_up" 상태를 알림
+def get_chatbot_engine():
+    try:
+        return chat_bootstrap.get_engine()
+    except ChatNotReady as e:
+        raise HTTPException(
+            status_code=503,
+            detail={"status": "warming_up" if e.status != "failed" else "failed", "message": str(e), "init": chat_bootstrap.snapshot()},
+            headers={"Retry-After": str(e.retry_after_s)},
+        )
 
 
 # --- 모델 정의 ---
@@ -19,14 +30,21 @@ class ChatRequest(BaseModel):
     query: str 
     session_id: Optional[str] = None
     
+def _admission_error(e: AdmissionRejected) -> HTTPException:
+    # 대기열 포화(429) / 대기 시간 초과(503) - 클라이언트가 재시도 시점을 알 수 있도록 Retry-After 포함
+    return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after_s)})
+
+
 # --- API 엔드포인트---
 
 @router.post("/ask")
-async def ask_chatbot(request: ChatRequest, engine: ChatbotEngine = Depends(get_chatbot_engine)):
+async def ask_chatbot(request: ChatRequest, engine=Depends(get_chatbot_engine)):
     try:
         #엔진을 통해 답변 생성
         result = await engine.answer(request.query, session_id=request.session_id)
         return result if isinstance(result, dict) else {"answer": result, "session_id": request.session_id}
+    except AdmissionRejected as e:
+        raise _admission_error(e)
     except Exception as e:
         print(f"챗봇 에러: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -34,58 +52,91 @@ async def ask_chatbot(request: ChatRequest, engine: ChatbotEngine = Depends(get_
 
 # Frontend compatibility (chatService.ts uses /answer)
 @router.post("/answer")
-async def answer_chatbot(request: ChatRequest, engine: ChatbotEngine = Depends(get_chatbot_engine)):
+async def answer_chatbot(request: ChatRequest, engine=Depends(get_chatbot_engine)):
     return await ask_chatbot(request, engine)
     
 
-# 2. 모든 세션 목록 가져오기
+# 세션 API는 LLM/검색 파이프라인과 무관하므로 챗봇 준비 여부와 상관없이 세션 저장소를 직접 사용
+# 목록/내역 모두 커서 페이지네이션: 응답의 next_cursor를 다음 요청의 cursor로 전달 (null이면 마지막 페이지)
+# 2. 세션 목록 가져오기 (최근 대화 순)
 @router.get("/sessions")
-async def get_sessions(engine: ChatbotEngine = Depends(get_chatbot_engine)):
+async def get_sessions(
+    limit: int = Query(CHAT_HISTORY_PAGE_SIZE, ge=1, le=200),
+    cursor: Optional[str] = None,
+):
     try:
-        sessions = await engine.get_all_session()
-        return sessions
+        sessions, next_cursor = await session_store.list_sessions(limit, cursor)
+        return {"sessions": sessions, "next_cursor": next_cursor}
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"세션 목록 로드 실패: {e}")
     
     
-# 3. 특정 세션의 대화 내역 가져오기 (사이드바 클릭 시)
+# 3. 특정 세션의 대화 내역 가져오기 (사이드바 클릭 시 최근 메시지부터, cursor로 이전 메시지)
 @router.get("/sessions/{session_id}")
-async def get_session_history(session_id: str, engine: ChatbotEngine = Depends(get_chatbot_engine)):
+async def get_session_history(
+    session_id: str,
+    limit: int = Query(CHAT_HISTORY_PAGE_SIZE, ge=1, le=200),
+    cursor: Optional[str] = None,
+):
     try:
-        # ChatbotEngine에 구현된 get_chat_history 호출
-        history = await engine.get_chat_history(session_id)
-        if not history:
+        messages, next_cursor = await session_store.get_page(session_id, limit, cursor)
+        if not messages and cursor is None:
             raise HTTPException(status_code=404, detail="대화 내역을 찾을 수 없습니다.")
-        return history
+        return {"session_id": session_id, "messages": messages, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"내역 로드 실패: {e}")
 
 
 # 4. 특정 세션 삭제 (사이드바 휴지통)
 @router.delete("/sessions/{session_id}")
-async def delete_session(session_id: str, engine: ChatbotEngine = Depends(get_chatbot_engine)):
+async def delete_session(session_id: str):
     try:
-        deleted = await engine.delete_session(session_id)
+        deleted = await session_store.delete_session(session_id)
         return {"deleted": deleted, "session_id": session_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"세션 삭제 실패: {e}")
     
 
-# #5. 스트리밍 지원
-# @router.post("/ask")
-# async def ask_chatbot(request: ChatRequest, engine: ChatbotEngine = Depends(get_chatbot_engine)):
-#     try:
-#         async def event_generator():
-#             async for chunk in engine.answer_stream(request.query, session_id=request.session_id):
-#                 yield f"data: {json.dumps({'answer': chunk, 'session_id': request.session_id})}\n\n"
+# 5. 스트리밍 지원 (Server-Sent Events)
+#    event: admitted → LLM 대기열 통과 (대기 시간 포함)
+#    event: sources → 검색/rerank 직후 출처 목록
+#    event: token   → LLM 토큰 (생성되는 대로)
+#    event: done    → 최종 답변 + 단계별 소요 시간
+#    event: error   → 스트리밍 도중 오류
+def _format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-#         return StreamingResponse(event_generator(), media_type="text/event-stream")
-        
-#     except Exception as e:
-#         print(f"챗봇 에러: {e}")
-#         raise HTTPException(status_code=500, detail=str(e))
 
-
-# @router.post("/answer")
-# async def answer_chatbot(request: ChatRequest, engine: ChatbotEngine = Depends(get_chatbot_engine)):
-#     return await ask_chatbot(request, engine)
+@router.post("/ask/stream")
+async def ask_chatbot_stream(request: ChatRequest, engine=Depends(get_chatbot_engine)):
+    events = engine.answer_stream(request.query, session_id=request.session_id)
+    # 입장 거절은 응답 헤더 전에 429/503으로 돌려주기 위해 첫 이벤트(admitted)를 먼저 받음
+    try:
+        first = await events.__anext__()
+    except AdmissionRejected as e:
+        raise _admission_error(e)
+
+    async def event_generator():
+        try:
+            yield _format_sse(first["event"], first["data"])
+            async for item in events:
+                yield _format_sse(item["event"], item["data"])
+        except Exception as e:
+            # 응답 헤더가 이미 나간 뒤이므로 HTTP 500 대신 error 이벤트로 알림
+            print(f"챗봇 스트리밍 에러: {e}")
+            yield _format_sse("error", {"detail": str(e), "session_id": request.session_id})
+        finally:
+            # 클라이언트가 중간에 끊어도 LLM 슬롯이 반납되도록 생성기를 닫음
+            await events.aclose()
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,13 +1,29 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, List
-from elasticsearch import AsyncElasticsearch
+from elasticsearch import AsyncElasticsearch, NotFoundError
 import os
-import re
 import logging
 import time
 import uuid
 from urllib.parse import urlsplit
 
+from backend.services import metrics
+from backend.services.metrics import PATENTS_ES_SECONDS, PATENTS_ES_TOOK_SECONDS
+from backend.services.page_cursor import InvalidCursor
+from backend.services.patent_highlight import HIGHLIGHT_MODES, PATENTS_HIGHLIGHT_MODE, build_highlight, normalize_highlight
+from backend.services.patent_query import (
+    PATENTS_MAX_RESULT_WINDOW,
+    PATENTS_PIT_KEEP_ALIVE,
+    SORT_BY_SCORE,
+    SORT_BY_SCORE_STABLE,
+    PatentCursor,
+    PatentSearchParams,
+    normalize_number,
+    plan_patent_query,
+)
+from backend.services.query_language import compiled_query_cache
+from backend.services.single_flight import SingleFlight
+
 router = APIRouter(tags=["특허 API"])
 logger = logging.getLogger(__name__)
 
@@ -34,62 +50,6 @@ def _resolve_local_elasticsearch_url(raw_url: str | None) -> str:
     except Exception:
         return default_url
 
-def _normalize_app_num_for_search(app_num: str) -> tuple[str, str | None]:
-    """출원번호를 숫자만 추출하고, 한국식(10-YYYY-NNNNNNN) 하이픈 형식도 반환.
-    반환: (digits_only, hyphenated_or_none)
-    """
-    digits: str = re.sub(r"\D", "", app_num or "").strip()
-    if not digits:
-        return ("", None)
-    hyphenated: str | None = None
-    if len(digits) >= 13 and digits.startswith("10"):
-        hyphenated = f"10-{digits[2:6]}-{digits[6:]}"
-    return (digits, hyphenated)
-
-
-def _parse_and_or_query(field: str, query_str: str):
-    """
-    AND/OR 연산자를 포함한 쿼리 문자열을 Elasticsearch 쿼리로 변환
-    """
-    if not query_str or not query_str.strip():
-        return None
-    original_query: str = query_str
-    logger.debug("parse_query field=%s query=%r", field, original_query)
-    
-    # OR 연산자가 있는 경우
-    if ' OR ' in query_str.upper() or ' or ' in query_str:
-        # 대소문자 구분 없이 OR로 분리
-        terms = re.split(r'\s+OR\s+', query_str, flags=re.IGNORECASE)
-        terms = [t.strip() for t in terms if t.strip()]
-        if len(terms) > 1:
-            logger.debug("parse_query_or field=%s terms=%r", field, terms)
-            return {
-                "bool": {
-                    "should": [
-                        {"match": {field: term}} for term in terms
-                    ],
-                    "minimum_should_match": 1
-                }
-            }
-    
-    # AND 연산자가 있는 경우
-    if ' AND ' in query_str.upper() or ' and ' in query_str:
-        terms = re.split(r'\s+AND\s+', query_str, flags=re.IGNORECASE)
-        terms = [t.strip() for t in terms if t.strip()]
-        if len(terms) > 1:
-            logger.debug("parse_query_and field=%s terms=%r", field, terms)
-            return {
-                "bool": {
-                    "must": [
-                        {"match": {field: term}} for term in terms
-                    ]
-                }
-            }
-    
-    # 연산자가 없는 경우 기본 match 쿼리
-    logger.debug("parse_query_single field=%s term=%r", field, original_query.strip())
-    return {"match": {field: query_str}}
-
 # Elasticsearch 클라이언트 설정
 elasticsearch_url = _resolve_local_elasticsearch_url(os.getenv("ELASTICSEARCH_URL"))
 es = AsyncElasticsearch(
@@ -99,6 +59,21 @@ es = AsyncElasticsearch(
     request_timeout=30
     )
 
+# 같은 검색 조건이 동시에 들어오면 ES 질의를 한 번만 수행하고 결과 공유
+patents_single_flight = SingleFlight("patents")
+patent_detail_single_flight = SingleFlight("patent_detail")
+
+
+def _collect_metrics() -> None:
+    # 검색어 컴파일 캐시 통계는 /metrics 조회 시점에 게이지로 옮김
+    snapshot = compiled_query_cache.snapshot()
+    metrics.CACHE_HIT_RATIO.set(snapshot["hit_ratio"], cache="patent_query")
+    metrics.CACHE_ENTRIES.set(snapshot["entries"], cache="patent_query")
+
+
+metrics.REGISTRY.on_collect(_collect_metrics)
+
+
 @router.get("/")
 async def get_patents(
     tech_q: Optional[str] = Query(None, description="기술 키워드"),
@@ -113,292 +88,93 @@ async def get_patents(
     reg_num: Optional[str] = Query(None, description="등록번호"),
     status: Optional[List[str]] = Query(None, description="법적 상태 (다중 선택 가능)"),
     page: int = 1, 
-    limit: int = 10
+    limit: int = 10,
+    cursor: Optional[str] = Query(None, description="커서 페이지네이션 (첫 요청은 *, 이후 응답의 next_cursor 전달)"),
+    view: str = Query("list", description="list: 목록용 필드만 / full: 전체 문서"),
+    highlight: Optional[str] = Query(None, description="하이라이트 방식: full | fragments | queried | fvh | none (기본 PATENTS_HIGHLIGHT_MODE)"),
 ):
+    if view not in ("list", "full"):
+        raise HTTPException(status_code=400, detail="view는 list 또는 full이어야 합니다.")
+    _check_highlight_mode(highlight)
+    # 정규화된 검색 조건 자체가 single-flight 키 (공백 차이 / 법적 상태 선택 순서만 다른 요청은 같은 키)
+    params = PatentSearchParams.from_request(
+        tech_q=tech_q,
+        prod_q=prod_q,
+        desc_q=desc_q,
+        claim_q=claim_q,
+        inventor=inventor,
+        manager=manager,
+        applicant=applicant,
+        app_num=app_num,
+        open_num=open_num,
+        reg_num=reg_num,
+        status=status,
+        page=page,
+        limit=limit,
+        cursor=cursor,
+        view=view,
+        highlight=highlight,
+    )
+    result, _ = await patents_single_flight.do(params, lambda: _search_patents(params))
+    return result
+
+
+async def _search_patents(params: PatentSearchParams) -> dict:
     request_id: str = uuid.uuid4().hex[:10]
     start_time_s: float = time.perf_counter()
+    cursor: Optional[PatentCursor] = None
     try:
-        skip = (page - 1) * limit
-        must_queries = []
+        # page 방식(from/size)은 얕은 페이지용, 그 이상은 커서 방식(PIT + search_after)
+        cursor = PatentCursor.decode(params) if params.cursor else None
+        skip = params.skip if cursor is None else 0
+        page = params.page if cursor is None else cursor.page
+        if cursor is None and skip + params.limit > PATENTS_MAX_RESULT_WINDOW:
+            raise HTTPException(
+                status_code=400,
+                detail=f"page 방식은 상위 {PATENTS_MAX_RESULT_WINDOW}건까지만 조회할 수 있습니다. cursor=* 로 커서 페이지네이션을 사용하세요.",
+            )
         logger.info(
-            "patents_search_start request_id=%s page=%d limit=%d skip=%d",
+            "patents_search_start request_id=%s page=%d limit=%d skip=%d cursor=%s",
             request_id,
             page,
-            limit,
+            params.limit,
             skip,
+            cursor is not None,
         )
-        logger.debug(
-            "patents_search_params request_id=%s tech_q=%r prod_q=%r desc_q=%r claim_q=%r inventor=%r manager=%r applicant=%r app_num=%r open_num=%r reg_num=%r status=%r",
-            request_id,
-            tech_q,
-            prod_q,
-            desc_q,
-            claim_q,
-            inventor,
-            manager,
-            applicant,
-            app_num,
-            open_num,
-            reg_num,
-            status,
-        )
+        logger.debug("patents_search_params request_id=%s params=%r", request_id, params)
 
-        # 기술 키워드 검색 (발명의 명칭, AND/OR 연산자 지원)
-        if tech_q:
-            if ' OR ' in tech_q.upper() or ' or ' in tech_q:
-                # OR 연산자 처리
-                terms = re.split(r'\s+OR\s+', tech_q, flags=re.IGNORECASE)
-                terms = [t.strip() for t in terms if t.strip()]
-                if len(terms) > 1:
-                    logger.debug("tech_q_or request_id=%s terms=%r", request_id, terms)
-                    must_queries.append({
-                        "bool": {
-                            "should": [
-                                {
-                                    "multi_match": {
-                                        "query": term,
-                                        "fields": ["title.ko^2", "abstract"],
-                                        "fuzziness": "AUTO"
-                                    }
-                                } for term in terms
-                            ],
-                            "minimum_should_match": 1
-                        }
-                    })
-                else:
-                    must_queries.append({
-                        "multi_match": {
-                            "query": tech_q,
-                            "fields": ["title.ko^2", "abstract"],
-                            "fuzziness": "AUTO"
-                        }
-                    })
-            elif ' AND ' in tech_q.upper() or ' and ' in tech_q:
-                # AND 연산자 처리
-                terms = re.split(r'\s+AND\s+', tech_q, flags=re.IGNORECASE)
-                terms = [t.strip() for t in terms if t.strip()]
-                if len(terms) > 1:
-                    logger.debug("tech_q_and request_id=%s terms=%r", request_id, terms)
-                    must_queries.append({
-                        "bool": {
-                            "must": [
-                                {
-                                    "multi_match": {
-                                        "query": term,
-                                        "fields": ["title.ko^2", "abstract"],
-                                        "fuzziness": "AUTO"
-                                    }
-                                } for term in terms
-                            ]
-                        }
-                    })
-                else:
-                    must_queries.append({
-                        "multi_match": {
-                            "query": tech_q,
-                            "fields": ["title.ko^2", "abstract"],
-                            "fuzziness": "AUTO"
-                        }
-                    })
-            else:
-                # 연산자 없음
-                logger.debug("tech_q_single request_id=%s query=%r", request_id, tech_q)
-                must_queries.append({
-                    "multi_match": {
-                        "query": tech_q,
-                        "fields": ["title.ko^2", "abstract"],
-                        "fuzziness": "AUTO"
-                    }
-                })
-
-        # 제품 키워드 검색
-        if prod_q:
-            if ' OR ' in prod_q.upper() or ' or ' in prod_q:
-                terms = re.split(r'\s+OR\s+', prod_q, flags=re.IGNORECASE)
-                terms = [t.strip() for t in terms if t.strip()]
-                if len(terms) > 1:
-                    logger.debug("prod_q_or request_id=%s terms=%r", request_id, terms)
-                    must_queries.append({
-                        "bool": {
-                            "should": [
-                                {
-                                    "multi_match": {
-                                        "query": term,
-                                        "fields": ["title.ko", "abstract"]
-                                    }
-                                } for term in terms
-                            ],
-                            "minimum_should_match": 1
-                        }
-                    })
-                else:
-                    must_queries.append({
-                        "multi_match": {
-                            "query": prod_q,
-                            "fields": ["title.ko", "abstract"]
-                        }
-                    })
-            elif ' AND ' in prod_q.upper() or ' and ' in prod_q:
-                terms = re.split(r'\s+AND\s+', prod_q, flags=re.IGNORECASE)
-                terms = [t.strip() for t in terms if t.strip()]
-                if len(terms) > 1:
-                    logger.debug("prod_q_and request_id=%s terms=%r", request_id, terms)
-                    must_queries.append({
-                        "bool": {
-                            "must": [
-                                {
-                                    "multi_match": {
-                                        "query": term,
-                                        "fields": ["title.ko", "abstract"]
-                                    }
-                                } for term in terms
-                            ]
-                        }
-                    })
-                else:
-                    must_queries.append({
-                        "multi_match": {
-                            "query": prod_q,
-                            "fields": ["title.ko", "abstract"]
-                        }
-                    })
-            else:
-                logger.debug("prod_q_single request_id=%s query=%r", request_id, prod_q)
-                must_queries.append({
-                    "multi_match": {
-                        "query": prod_q,
-                        "fields": ["title.ko", "abstract"]
-                    }
-                })
-
-        # 명세서 키워드 검색
-        if desc_q:
-            desc_query = _parse_and_or_query("abstract", desc_q)
-            if desc_query:
-                logger.debug("desc_q_parsed request_id=%s query=%s", request_id, desc_query)
-                must_queries.append(desc_query)
-
-        # 청구범위 키워드 검색
-        if claim_q:
-            claim_query = _parse_and_or_query("claims", claim_q)
-            if claim_query:
-                logger.debug("claim_q_parsed request_id=%s query=%s", request_id, claim_query)
-                must_queries.append(claim_query)
-
-        # 발명자 검색 (AND/OR 연산자 지원)
-        if inventor:
-            inventor_query = _parse_and_or_query("inventors.name", inventor)
-            if inventor_query:
-                logger.debug("inventor_parsed request_id=%s query=%s", request_id, inventor_query)
-                must_queries.append(inventor_query)
-        
-        # 책임연구자 검색 (responsibleInventor 필드 사용 - inventors[0].name)
-        if manager:
-            manager_query = _parse_and_or_query("responsibleInventor", manager)
-            if manager_query:
-                logger.debug("manager_parsed request_id=%s query=%s", request_id, manager_query)
-                must_queries.append(manager_query)
-        
-        # 출원인 검색 (AND/OR 연산자 지원)
-        if applicant:
-            applicant_query = _parse_and_or_query("applicant.name", applicant)
-            if applicant_query:
-                logger.debug("applicant_parsed request_id=%s query=%s", request_id, applicant_query)
-                must_queries.append(applicant_query)
-        
-        # 출원번호 검색 (숫자만 / 10-YYYY-NNNNNNN 형식 둘 다 시도)
-        if app_num:
-            digits_only, hyphenated = _normalize_app_num_for_search(app_num)
-            logger.debug(
-                "app_num_match request_id=%s app_num=%r digits=%r hyphenated=%r",
-                request_id,
-                app_num,
-                digits_only,
-                hyphenated,
-            )
-            app_num_values: list[str] = [digits_only] if digits_only else []
-            if hyphenated and hyphenated not in app_num_values:
-                app_num_values.append(hyphenated)
-            raw_stripped: str = (app_num or "").strip()
-            if raw_stripped and raw_stripped not in app_num_values:
-                app_num_values.append(raw_stripped)
-            if app_num_values:
-                must_queries.append({"terms": {"applicationNumber": app_num_values}})
-
-        # 공개번호 검색 (숫자만 / 10-YYYY-NNNNNNN 형식 둘 다 시도)
-        if open_num:
-            digits_only, hyphenated = _normalize_app_num_for_search(open_num)
-            logger.debug(
-                "open_num_match request_id=%s open_num=%r digits=%r hyphenated=%r",
-                request_id,
-                open_num,
-                digits_only,
-                hyphenated,
-            )
-            open_num_values: list[str] = [digits_only] if digits_only else []
-            if hyphenated and hyphenated not in open_num_values:
-                open_num_values.append(hyphenated)
-            raw_open: str = (open_num or "").strip()
-            if raw_open and raw_open not in open_num_values:
-                open_num_values.append(raw_open)
-            if open_num_values:
-                must_queries.append({"terms": {"openNumber": open_num_values}})
-
-        # 등록번호 검색
-        if reg_num:
-            logger.debug("reg_num_match request_id=%s reg_num=%r", request_id, reg_num)
-            must_queries.append({"match": {"registrationNumber": reg_num}})
-
-        # 법적 상태 필터링
-        if status and len(status) > 0:
-            logger.debug("status_terms request_id=%s status=%r", request_id, status)
-            must_queries.append({
-                "terms": {
-                    "status": status
-                }
-            })
-
-        # 쿼리 조합
-        if must_queries:
-            search_query = {"bool": {"must": must_queries}}
-        else:
-            search_query = {"match_all": {}}
+        # 쿼리 조합 (키워드 → must, 정확 일치 조건 → filter)
+        plan = plan_patent_query(params)
+        search_query = plan.query()
         logger.debug("es_query request_id=%s query=%s", request_id, search_query)
 
-        # 하이라이팅할 필드 목록 생성
-        highlight_fields = {}
-        highlight_query = None
-        
-        # 검색 키워드가 있는 경우에만 하이라이팅 활성화
-        if tech_q or prod_q or desc_q or claim_q or inventor or manager or applicant:
-            highlight_fields = {
-                "title.ko": {"number_of_fragments": 0},  # 전체 텍스트 하이라이팅
-                "title.en": {"number_of_fragments": 0},
-                "abstract": {"number_of_fragments": 0},
-                "claims": {"number_of_fragments": 0},
-                "inventors.name": {"number_of_fragments": 0},
-                "responsibleInventor": {"number_of_fragments": 0},  # 책임연구자
-                "applicant.name": {"number_of_fragments": 0}
-            }
-            # 하이라이팅 쿼리는 검색 쿼리와 동일하게 설정
-            highlight_query = search_query
+        # 하이라이트 (방식별 필드 / 조각 설정은 patent_highlight 참고, 키워드가 없으면 None)
+        highlight_mode = params.highlight or PATENTS_HIGHLIGHT_MODE
+        highlight = build_highlight(params, plan, highlight_mode)
 
         # Elasticsearch 실행
-        es_start_time_s: float = time.perf_counter()
-        response = await es.search(
-            index="patents",
+        search_kwargs = dict(
             query=search_query,
-            from_=skip,
-            size=limit,
-            sort=[{"_score": "desc"}],
-            highlight={
-                "fields": highlight_fields,
-                "pre_tags": ["<mark>"],
-                "post_tags": ["</mark>"],
-                "require_field_match": False  # 모든 필드에서 하이라이팅
-            } if highlight_fields else None
+            size=params.limit,
+            source=params.source,
+            highlight=highlight,
         )
+        es_start_time_s: float = time.perf_counter()
+        pit_id = None
+        if cursor is None:
+            search_kwargs.update(index="patents", from_=skip, sort=SORT_BY_SCORE)
+        else:
+            # 첫 커서 요청에서 PIT를 열고, 이후에는 커서의 PIT를 keep_alive만 연장하며 재사용
+            pit_id = cursor.pit_id
+            if pit_id is None:
+                pit_id = (await es.open_point_in_time(index="patents", keep_alive=PATENTS_PIT_KEEP_ALIVE))["id"]
+            search_kwargs.update(pit={"id": pit_id, "keep_alive": PATENTS_PIT_KEEP_ALIVE}, sort=SORT_BY_SCORE_STABLE)
+            if cursor.search_after is not None:
+                search_kwargs["search_after"] = cursor.search_after
+        response = await es.search(**search_kwargs)
         es_elapsed_ms: float = (time.perf_counter() - es_start_time_s) * 1000.0
+        PATENTS_ES_SECONDS.observe(es_elapsed_ms / 1000.0)
+        PATENTS_ES_TOOK_SECONDS.observe(response['took'] / 1000.0)
 
         hits = response['hits']['hits']
         logger.debug("es_result request_id=%s hits=%d elapsed_ms=%.1f", request_id, len(hits), es_elapsed_ms)
@@ -407,32 +183,169 @@ async def get_patents(
             patent = hit['_source'].copy()
             # 하이라이팅 정보 추가
             if 'highlight' in hit:
-                patent['_highlight'] = hit['highlight']
+                patent['_highlight'] = normalize_highlight(hit['highlight'])
             patents.append(patent)
         
         total = response['hits']['total']['value']
+        next_cursor = None
+        if cursor is not None:
+            pit_id = response.get('pit_id', pit_id)
+            seen = cursor.seen + len(hits)
+            has_more = response['hits']['total']['relation'] == "gte" or seen < total
+            if hits and len(hits) == params.limit and has_more:
+                next_cursor = cursor.next(pit_id, hits[-1]['sort'], seen)
+            else:
+                await _close_pit(pit_id)
+
         total_elapsed_ms: float = (time.perf_counter() - start_time_s) * 1000.0
         logger.info(
-            "patents_search_done request_id=%s total=%d returned=%d elapsed_ms=%.1f",
+            "patents_search_done request_id=%s total=%d returned=%d highlight=%s es_ms=%.1f elapsed_ms=%.1f",
             request_id,
             total,
             len(patents),
+            highlight_mode if highlight else "none",
+            es_elapsed_ms,
             total_elapsed_ms,
         )
 
         return {
             "total": total,
             "page": page,
-            "limit": limit,
+            "limit": params.limit,
             "data": patents,
+            "next_cursor": next_cursor,
             "engine": "elasticsearch"
         }
 
+    except HTTPException:
+        raise
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except NotFoundError as e:
+        if cursor is not None and cursor.pit_id:
+            # keep_alive가 지나 PIT가 닫힘 → 처음(cursor=*)부터 다시 조회해야 함
+            logger.info("patents_cursor_expired request_id=%s err=%r", request_id, e)
+            raise HTTPException(status_code=410, detail="커서가 만료되었습니다. cursor=* 로 다시 검색하세요.")
+        # 첫 페이지(cursor=*, 아직 PIT 없음) / page 방식은 인덱스 없음 등 일반 오류
+        logger.exception("patents_search_error request_id=%s err=%r", request_id, e)
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         logger.exception("patents_search_error request_id=%s err=%r", request_id, e)
         # 에러 발생 시 500 에러 반환
         raise HTTPException(status_code=500, detail=str(e))
 
+# 특허 상세 (목록에서 빠진 청구항 / 패밀리 / 대리인 정보 등 전체 문서를 필요할 때만 조회)
+@router.get("/{application_number}")
+async def get_patent(application_number: str):
+    result, _ = await patent_detail_single_flight.do(application_number, lambda: _get_patent(application_number))
+    return result
+
+
+async def _get_patent(application_number: str) -> dict:
+    try:
+        # 색인 시 출원번호를 _id로 사용 (sync_es.py / transform_patents.py)
+        try:
+            response = await es.get(index="patents", id=application_number)
+            return response['_source']
+        except NotFoundError:
+            pass
+
+        # 하이픈 유무 등 _id와 형식이 다른 입력은 출원번호 필드로 재조회
+        values = normalize_number(application_number)
+        response = await es.search(
+            index="patents",
+            query={"bool": {"filter": [{"terms": {"applicationNumber": list(values)}}]}},
+            size=1,
+        ) if values else None
+        hits = response['hits']['hits'] if response else []
+        if not hits:
+            raise HTTPException(status_code=404, detail=f"특허를 찾을 수 없습니다: {application_number}")
+        return hits[0]['_source']
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("patent_detail_error application_number=%s err=%r", application_number, e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# 한 건 하이라이트 (목록은 highlight=none / queried로 가볍게 받고, 상세 화면에서 필요할 때만 전체 하이라이트)
+@router.get("/{application_number}/highlight")
+async def get_patent_highlight(
+    application_number: str,
+    tech_q: Optional[str] = Query(None, description="기술 키워드"),
+    prod_q: Optional[str] = Query(None, description="제품 키워드"),
+    desc_q: Optional[str] = Query(None, description="명세서 키워드"),
+    claim_q: Optional[str] = Query(None, description="청구범위 키워드"),
+    inventor: Optional[str] = Query(None, description="발명자"),
+    manager: Optional[str] = Query(None, description="책임연구자"),
+    applicant: Optional[str] = Query(None, description="연구자 소속(출원인)"),
+    mode: str = Query("full", description="하이라이트 방식: full | fragments | queried | fvh"),
+):
+    _check_highlight_mode(mode)
+    params = PatentSearchParams.from_request(
+        tech_q=tech_q,
+        prod_q=prod_q,
+        desc_q=desc_q,
+        claim_q=claim_q,
+        inventor=inventor,
+        manager=manager,
+        applicant=applicant,
+        limit=1,
+        highlight=mode,
+    )
+    try:
+        plan = plan_patent_query(params)
+        highlight = build_highlight(params, plan, mode)
+        if highlight is None:
+            return {"applicationNumber": application_number, "highlight": {}}
+
+        # 문서는 _id 또는 출원번호로 고정하고, 하이라이트는 highlight_query(키워드 절)로만 계산
+        highlight.setdefault("highlight_query", plan.relevance_query() or plan.query())
+        start_s: float = time.perf_counter()
+        response = await es.search(
+            index="patents",
+            query={"bool": {"should": [
+                {"ids": {"values": [application_number]}},
+                {"terms": {"applicationNumber": list(normalize_number(application_number)) or [application_number]}},
+            ], "minimum_should_match": 1}},
+            size=1,
+            source=False,
+            highlight=highlight,
+        )
+        elapsed_ms: float = (time.perf_counter() - start_s) * 1000.0
+        hits = response['hits']['hits']
+        if not hits:
+            raise HTTPException(status_code=404, detail=f"특허를 찾을 수 없습니다: {application_number}")
+        logger.info(
+            "patent_highlight_done application_number=%s mode=%s took_ms=%d elapsed_ms=%.1f",
+            application_number,
+            mode,
+            response['took'],
+            elapsed_ms,
+        )
+        return {"applicationNumber": application_number, "highlight": normalize_highlight(hits[0].get('highlight', {}))}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("patent_highlight_error application_number=%s err=%r", application_number, e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _check_highlight_mode(mode: Optional[str]) -> None:
+    if mode is not None and mode not in HIGHLIGHT_MODES:
+        raise HTTPException(status_code=400, detail=f"highlight는 {' | '.join(HIGHLIGHT_MODES)} 중 하나여야 합니다.")
+
+
+async def _close_pit(pit_id: str) -> None:
+    # 마지막 페이지에서 PIT를 바로 닫음 (실패해도 keep_alive 후 자동 정리)
+    try:
+        await es.close_point_in_time(id=pit_id)
+    except Exception as e:
+        logger.warning("patents_pit_close_failed err=%r", e)
+
+
 # 서버 종료 시 연결 닫기
 @router.on_event("shutdown")
 async def shutdown_event():
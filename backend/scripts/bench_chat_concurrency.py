@@ -0,0 +1,160 @@
+"""
+챗봇 부하가 특허 검색(/api/patents) 지연시간에 주는 영향을 측정하는 벤치마크
+
+사용 시나리오:
+- run_llamaindex_query가 이벤트 루프를 막는지 확인할 때
+- 1단계: 챗봇 부하 없이 특허 검색 p50/p95/p99 측정 (baseline)
+- 2단계: 챗봇 요청을 동시에 흘려보내면서 같은 특허 검색을 다시 측정
+- 두 단계의 p99가 비슷하면 챗봇 파이프라인이 워커를 막지 않는 것
+
+실행 예 (서버가 떠 있는 상태에서):
+    python backend/scripts/bench_chat_concurrency.py --base-url http://localhost:3001 \
+        --search-requests 200 --search-concurrency 8 --chat-concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+import aiohttp
+
+
+SEARCH_PARAMS = [
+    {"tech_q": "배터리"},
+    {"tech_q": "이차전지 OR 전고체"},
+    {"applicant": "삼성전자"},
+    {"claim_q": "전극"},
+    {"page": "2"},
+]
+
+CHAT_QUERIES = [
+    "삼성전자 배터리 특허 알려줘",
+    "전고체 전해질 관련 특허를 요약해줘",
+    "시트보수재 사용하는 특허 알려줘",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def summarize(name: str, latencies_ms: List[float], errors: int) -> dict:
+    return {
+        "name": name,
+        "count": len(latencies_ms),
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(latencies_ms), 1) if latencies_ms else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 50), 1),
+        "p95_ms": round(percentile(latencies_ms, 95), 1),
+        "p99_ms": round(percentile(latencies_ms, 99), 1),
+    }
+
+
+async def run_searches(session: aiohttp.ClientSession, base_url: str, total: int, concurrency: int) -> dict:
+    latencies_ms: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            params = SEARCH_PARAMS[i % len(SEARCH_PARAMS)]
+            start = time.perf_counter()
+            try:
+                async with session.get(f"{base_url}/api/patents/", params=params) as resp:
+                    await resp.read()
+                    if resp.status >= 400:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies_ms.append((time.perf_counter() - start) * 1000.0)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"latencies_ms": latencies_ms, "errors": errors}
+
+
+async def run_chat_load(session: aiohttp.ClientSession, base_url: str, concurrency: int, stop: asyncio.Event) -> dict:
+    completed = 0
+    errors = 0
+
+    async def worker(offset: int):
+        nonlocal completed, errors
+        i = offset
+        while not stop.is_set():
+            query = CHAT_QUERIES[i % len(CHAT_QUERIES)]
+            i += 1
+            try:
+                async with session.post(f"{base_url}/api/chatbot/ask", json={"query": query}) as resp:
+                    await resp.read()
+                    if resp.status >= 400:
+                        errors += 1
+                    else:
+                        completed += 1
+            except aiohttp.ClientError:
+                errors += 1
+
+    tasks = [asyncio.create_task(worker(i)) for i in range(concurrency)]
+    await stop.wait()
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {"completed": completed, "errors": errors}
+
+
+async def main_async(args) -> dict:
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        print(f"▶ [1/2] baseline: 특허 검색 {args.search_requests}건 (챗봇 부하 없음)")
+        baseline = await run_searches(session, args.base_url, args.search_requests, args.search_concurrency)
+
+        print(f"▶ [2/2] 챗봇 동시 {args.chat_concurrency}건 부하 + 특허 검색 {args.search_requests}건")
+        stop = asyncio.Event()
+        chat_task = asyncio.create_task(run_chat_load(session, args.base_url, args.chat_concurrency, stop))
+        # 챗봇 요청이 LLM 단계까지 들어가도록 잠시 대기
+        await asyncio.sleep(args.chat_warmup)
+        loaded = await run_searches(session, args.base_url, args.search_requests, args.search_concurrency)
+        stop.set()
+        chat = await chat_task
+
+    return {
+        "baseline": summarize("patents (no chat load)", baseline["latencies_ms"], baseline["errors"]),
+        "under_chat_load": summarize("patents (chat load)", loaded["latencies_ms"], loaded["errors"]),
+        "chat": chat,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:3001")
+    parser.add_argument("--search-requests", type=int, default=200)
+    parser.add_argument("--search-concurrency", type=int, default=8)
+    parser.add_argument("--chat-concurrency", type=int, default=4)
+    parser.add_argument("--chat-warmup", type=float, default=2.0, help="챗봇 부하 시작 후 측정 전 대기(초)")
+    parser.add_argument("--timeout", type=float, default=900.0)
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    for key in ("baseline", "under_chat_load"):
+        r = result[key]
+        print(
+            f"{r['name']:<26} n={r['count']:<5} err={r['errors']:<3} "
+            f"p50={r['p50_ms']:>8.1f}ms p95={r['p95_ms']:>8.1f}ms p99={r['p99_ms']:>8.1f}ms"
+        )
+    print(f"chat completed={result['chat']['completed']} errors={result['chat']['errors']}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
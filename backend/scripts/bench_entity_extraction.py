@@ -0,0 +1,119 @@
+"""
+엔티티 사전(Aho-Corasick) 질문 → 엔티티 추출 시간 벤치마크
+
+사용 시나리오:
+- 엔티티 사전 크기(출원인/발명자/번호 수)에 따른 질문당 추출 시간 확인
+- 기본: 합성 엔티티로 사전 구성 / --qdrant_url 지정 시 실제 doc_meta payload로 구성
+
+실행 예 (저장소 루트에서):
+    PYTHONPATH=. python backend/scripts/bench_entity_extraction.py --points 20000 --queries 5000
+    PYTHONPATH=. python backend/scripts/bench_entity_extraction.py --qdrant_url http://localhost:6333 --collection patents
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List
+
+from backend.services.entity_index import EntityIndex
+
+
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+GIVEN = "민서준우진영수지현하은도윤호연성"
+COMPANIES = ["삼성전자", "LG에너지솔루션", "SK하이닉스", "현대자동차", "포스코", "한국전자통신연구원", "카이스트", "네이버"]
+FILLER = ["배터리", "특허", "알려줘", "관련", "전극", "기술", "최근", "출원한", "발명한", "요약해줘"]
+
+
+def synthetic_points(n: int, seed: int = 0) -> Dict[str, dict]:
+    rng = random.Random(seed)
+    points = {}
+    for i in range(n):
+        company = rng.choice(COMPANIES) + (f"{i % 500}" if i % 3 else "")
+        points[str(i)] = {
+            "applicants": [f"{company}주식회사"],
+            "inventors": ["".join([rng.choice(SURNAMES), rng.choice(GIVEN), rng.choice(GIVEN)]) for _ in range(rng.randint(1, 4))],
+            "agents": [f"특허법인{rng.choice(GIVEN)}{rng.choice(GIVEN)}"],
+            "application_number": f"10-20{rng.randint(10, 24)}-{rng.randint(0, 9999999):07d}",
+            "patent_no": f"10-20{rng.randint(10, 24)}-{rng.randint(0, 9999999):07d}",
+        }
+    return points
+
+
+def synthetic_queries(points: Dict[str, dict], n: int, seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    payloads = list(points.values())
+    out = []
+    for _ in range(n):
+        p = rng.choice(payloads)
+        parts = rng.sample(FILLER, 3)
+        kind = rng.random()
+        if kind < 0.4:
+            parts.insert(0, p["applicants"][0].replace("주식회사", ""))
+        elif kind < 0.7:
+            parts.insert(0, p["inventors"][0])
+        elif kind < 0.8:
+            parts.insert(0, p["application_number"])
+        out.append(" ".join(parts))
+    return out
+
+
+async def load_from_qdrant(index: EntityIndex, url: str, collection: str) -> None:
+    from qdrant_client import AsyncQdrantClient
+
+    aclient = AsyncQdrantClient(url=url, timeout=60)
+    try:
+        await index.refresh_from_qdrant(aclient, collection, force=True)
+    finally:
+        await aclient.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=20000, help="합성 doc_meta 포인트 수")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--qdrant_url", default=None)
+    parser.add_argument("--collection", default="patents")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    index = EntityIndex()
+    if args.qdrant_url:
+        asyncio.run(load_from_qdrant(index, args.qdrant_url, args.collection))
+        queries = [f"{q} 배터리 특허 알려줘" for q in ["삼성전자", "홍길동", "10-2020-0012345"]] * (args.queries // 3)
+    else:
+        points = synthetic_points(args.points)
+        start = time.perf_counter()
+        asyncio.run(index.apply(points))
+        print(f"▶ 사전 구성: {(time.perf_counter() - start) * 1000.0:.1f}ms")
+        queries = synthetic_queries(points, args.queries)
+
+    latencies_us: List[float] = []
+    found = 0
+    for q in queries:
+        start = time.perf_counter()
+        matches = index.extract(q)
+        latencies_us.append((time.perf_counter() - start) * 1_000_000.0)
+        found += bool(matches)
+
+    latencies_us.sort()
+    pick = lambda pct: latencies_us[min(len(latencies_us) - 1, int(pct / 100.0 * (len(latencies_us) - 1)))]
+    result = {
+        **index.snapshot(),
+        "queries": len(queries),
+        "queries_with_entities": found,
+        "p50_us": round(pick(50), 1),
+        "p95_us": round(pick(95), 1),
+        "p99_us": round(pick(99), 1),
+        "mean_us": round(sum(latencies_us) / len(latencies_us), 1),
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
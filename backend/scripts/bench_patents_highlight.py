@@ -0,0 +1,157 @@
+"""
+특허 검색 하이라이트 방식별 지연시간 벤치마크 (patent_highlight: full / fragments / queried / fvh / none)
+
+사용 시나리오:
+- 같은 검색 순서(기술 / 청구범위 / 발명자 키워드 혼합)를 방식별로 로컬 ES에 실행해
+  took / 왕복 시간 / 응답의 하이라이트 바이트를 비교
+- --single N: 한 건 하이라이트(/api/patents/{출원번호}/highlight와 같은 질의) 지연시간도 측정
+  → 목록은 none / queried, 상세 화면에서만 full로 받는 구성의 비용 확인용
+
+참고:
+- fvh는 .tv 서브필드가 있어야 함 (scripts/put_patents_term_vectors.py 실행 후 --modes에 fvh 추가)
+- 방식마다 요청 캐시를 끄고(request_cache=False) 첫 몇 건은 워밍업으로 제외
+
+실행 예 (저장소 루트에서):
+    PYTHONPATH=. python backend/scripts/bench_patents_highlight.py --es-url http://localhost:9200 --requests 300
+    PYTHONPATH=. python backend/scripts/bench_patents_highlight.py --modes full,queried,fvh,none --single 100 --out /tmp/highlight.json
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import List
+
+from elasticsearch import Elasticsearch
+
+from backend.services.patent_highlight import HIGHLIGHT_MODES, build_highlight
+from backend.services.patent_query import PatentSearchParams, normalize_number, plan_patent_query
+
+
+TECH_TERMS = ["배터리", "이차전지", "전고체", "반도체", "디스플레이", "센서", "자율주행", "양극재", "드론", "인공지능"]
+CLAIM_TERMS = ["전극", "기판", "회로", "하우징", "제어부", "센서부", "분리막", "냉각 유로"]
+WARMUP = 10
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def build_workload(total: int, seed: int, limit: int) -> List[PatentSearchParams]:
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(total):
+        kwargs = {"tech_q": rng.choice(TECH_TERMS)}
+        if rng.random() < 0.5:
+            kwargs["claim_q"] = rng.choice(CLAIM_TERMS)
+        workload.append(PatentSearchParams.from_request(limit=limit, **kwargs))
+    return workload
+
+
+def summarize(mode: str, took_ms: List[float], rtt_ms: List[float], highlight_bytes: List[int]) -> dict:
+    return {
+        "mode": mode,
+        "requests": len(rtt_ms),
+        "took_p50_ms": round(percentile(took_ms, 50), 2),
+        "took_p95_ms": round(percentile(took_ms, 95), 2),
+        "rtt_p50_ms": round(percentile(rtt_ms, 50), 2),
+        "rtt_p95_ms": round(percentile(rtt_ms, 95), 2),
+        "highlight_bytes_mean": round(statistics.fmean(highlight_bytes)) if highlight_bytes else 0,
+    }
+
+
+def run_mode(es: Elasticsearch, index: str, workload: List[PatentSearchParams], mode: str) -> dict:
+    took_ms: List[float] = []
+    rtt_ms: List[float] = []
+    highlight_bytes: List[int] = []
+    for i, params in enumerate(workload):
+        plan = plan_patent_query(params)
+        start = time.perf_counter()
+        resp = es.search(
+            index=index,
+            query=plan.query(),
+            size=params.limit,
+            source=params.source,
+            sort=[{"_score": "desc"}],
+            highlight=build_highlight(params, plan, mode),
+            request_cache=False,
+        )
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        if i < WARMUP:
+            continue
+        rtt_ms.append(elapsed_ms)
+        took_ms.append(float(resp["took"]))
+        highlight_bytes.append(sum(len(json.dumps(h.get("highlight", {}), ensure_ascii=False).encode("utf-8")) for h in resp["hits"]["hits"]))
+    return summarize(mode, took_ms, rtt_ms, highlight_bytes)
+
+
+def run_single(es: Elasticsearch, index: str, workload: List[PatentSearchParams], count: int) -> dict:
+    """목록 첫 hit의 출원번호로 한 건 하이라이트 (full)"""
+    took_ms: List[float] = []
+    rtt_ms: List[float] = []
+    highlight_bytes: List[int] = []
+    for params in workload[:count]:
+        plan = plan_patent_query(params)
+        top = es.search(index=index, query=plan.query(), size=1, source=["applicationNumber"])["hits"]["hits"]
+        if not top:
+            continue
+        app_num = top[0]["_source"]["applicationNumber"]
+        highlight = build_highlight(params, plan, "full")
+        highlight["highlight_query"] = plan.relevance_query() or plan.query()
+        start = time.perf_counter()
+        resp = es.search(
+            index=index,
+            query={"bool": {"should": [
+                {"ids": {"values": [app_num]}},
+                {"terms": {"applicationNumber": list(normalize_number(app_num))}},
+            ], "minimum_should_match": 1}},
+            size=1,
+            source=False,
+            highlight=highlight,
+            request_cache=False,
+        )
+        rtt_ms.append((time.perf_counter() - start) * 1000.0)
+        took_ms.append(float(resp["took"]))
+        highlight_bytes.append(sum(len(json.dumps(h.get("highlight", {}), ensure_ascii=False).encode("utf-8")) for h in resp["hits"]["hits"]))
+    return summarize("single_full", took_ms, rtt_ms, highlight_bytes)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--es-url", default="http://localhost:9200")
+    parser.add_argument("--index", default="patents")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=10, help="페이지 크기")
+    parser.add_argument("--modes", default="full,fragments,queried,none", help=f"비교할 방식 ({', '.join(HIGHLIGHT_MODES)})")
+    parser.add_argument("--single", type=int, default=0, help="한 건 하이라이트 측정 횟수 (0이면 생략)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in HIGHLIGHT_MODES]
+    if unknown:
+        parser.error(f"알 수 없는 방식: {unknown}")
+
+    es = Elasticsearch(args.es_url, verify_certs=False, request_timeout=60)
+    workload = build_workload(args.requests + WARMUP, args.seed, args.limit)
+    results = [run_mode(es, args.index, workload, mode) for mode in modes]
+    if args.single:
+        results.append(run_single(es, args.index, workload, args.single))
+
+    report = {"es_url": args.es_url, "index": args.index, "limit": args.limit, "results": results}
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.out}")
+    es.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,364 @@
+"""
+특허 검색(/api/patents) 부하 테스트 - 로컬 Elasticsearch 또는 녹화 응답 스텁 사용
+
+사용 시나리오:
+- get_patents의 bool/highlight 쿼리 조립 변경이 지연시간/오류율에 주는 영향을 운영 환경 없이 측정
+- tech_q / prod_q / claim_q / status / page 요청을 가중치대로 섞어 FastAPI 앱(인프로세스)에 재생
+- 요청별로 ES가 보고한 took / ES 왕복 시간 / 나머지(Python: 쿼리 조립 + 직렬화 + ASGI) 시간을 분리해 보고
+
+모드:
+- --es-url http://localhost:9200           : 로컬 ES에 직접 질의
+- --es-url ... --record /tmp/es.jsonl       : 위와 같고, ES 응답을 녹화
+- (기본) 스텁                               : --replay 파일의 녹화 응답 재생, 없으면 합성 응답 (--stub-took-ms / --stub-rtt-ms로 지연 흉내)
+
+실행 예 (저장소 루트에서):
+    PYTHONPATH=. python backend/scripts/bench_patents_load.py --requests 2000 --concurrency 16
+    PYTHONPATH=. python backend/scripts/bench_patents_load.py --es-url http://localhost:9200 --record /tmp/es.jsonl
+    PYTHONPATH=. python backend/scripts/bench_patents_load.py --replay /tmp/es.jsonl --mix tech_q=5,prod_q=2,claim_q=2,status=1,page=2
+"""
+import argparse
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import random
+import statistics
+import time
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI
+
+from backend.routes import patents
+
+
+TECH_TERMS = ["배터리", "이차전지", "전고체", "반도체", "디스플레이", "센서", "자율주행", "양극재", "드론", "인공지능"]
+PROD_TERMS = ["스마트폰", "전기차", "웨어러블", "냉장고", "로봇", "카메라", "태양광", "의료기기"]
+CLAIM_TERMS = ["전극", "기판", "회로", "하우징", "제어부", "센서부", "분리막", "냉각 유로"]
+STATUS_VALUES = ["공개", "등록", "소멸", "거절", "취하"]
+
+DEFAULT_MIX = "tech_q=5,prod_q=2,claim_q=2,status=1,page=1"
+
+# 요청별 ES 측정값을 모으는 슬롯 (인프로세스 ASGI 호출은 같은 태스크에서 실행되므로 워커가 만든 dict가 그대로 전달됨)
+_es_sample: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("es_sample", default=None)
+
+
+#--------------------------------------
+# 요청 믹스
+#--------------------------------------
+def _terms(rng: random.Random, vocab: List[str]) -> str:
+    """단일어 / OR / AND 형태를 섞어 get_patents의 분기를 고루 태움"""
+    kind = rng.random()
+    if kind < 0.6:
+        return rng.choice(vocab)
+    op = " OR " if kind < 0.8 else " AND "
+    return op.join(rng.sample(vocab, rng.randint(2, 3)))
+
+
+def make_params(kind: str, rng: random.Random) -> dict:
+    if kind == "tech_q":
+        return {"tech_q": _terms(rng, TECH_TERMS)}
+    if kind == "prod_q":
+        return {"prod_q": _terms(rng, PROD_TERMS)}
+    if kind == "claim_q":
+        return {"claim_q": _terms(rng, CLAIM_TERMS)}
+    if kind == "status":
+        return {"tech_q": rng.choice(TECH_TERMS), "status": rng.sample(STATUS_VALUES, rng.randint(1, 2))}
+    if kind == "page":
+        return {"tech_q": rng.choice(TECH_TERMS), "page": rng.randint(2, 20)}
+    raise ValueError(f"알 수 없는 요청 종류: {kind}")
+
+
+def parse_mix(raw: str) -> Dict[str, float]:
+    mix = {}
+    for part in raw.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def build_plan(mix: Dict[str, float], total: int, seed: int) -> List[tuple]:
+    rng = random.Random(seed)
+    kinds = list(mix.keys())
+    weights = [mix[k] for k in kinds]
+    plan = []
+    for _ in range(total):
+        kind = rng.choices(kinds, weights=weights)[0]
+        plan.append((kind, make_params(kind, rng)))
+    return plan
+
+
+#--------------------------------------
+# Elasticsearch 대체물
+#--------------------------------------
+def _request_key(kwargs: dict) -> str:
+    """같은 검색 요청이면 같은 키 (녹화/재생 매칭용)"""
+    body = {k: kwargs.get(k) for k in ("index", "query", "from_", "size", "sort", "highlight")}
+    return hashlib.sha1(json.dumps(body, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _synthetic_source(rng: random.Random, i: int) -> dict:
+    title = f"{rng.choice(TECH_TERMS)}용 {rng.choice(CLAIM_TERMS)} 및 그 제조 방법"
+    claims = [f"{rng.choice(CLAIM_TERMS)}을 포함하는 {rng.choice(PROD_TERMS)} " * 8 for _ in range(rng.randint(5, 15))]
+    return {
+        "applicationNumber": f"10-20{rng.randint(10, 24)}-{rng.randint(0, 9999999):07d}",
+        "applicationDate": f"20{rng.randint(10, 24)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+        "status": rng.choice(STATUS_VALUES),
+        "title": {"ko": title, "en": f"Apparatus {i}"},
+        "applicant": {"name": f"{rng.choice(['삼성전자', 'LG에너지솔루션', '현대자동차', '네이버'])}주식회사", "country": None},
+        "inventors": [{"name": f"발명자{rng.randint(1, 999)}"} for _ in range(rng.randint(1, 4))],
+        "abstract": f"{title}에 관한 것이다. " + " ".join(rng.choice(TECH_TERMS + CLAIM_TERMS) for _ in range(120)),
+        "representativeClaim": claims[0],
+        "claims": claims,
+        "ipcCodes": ["H01M 10/052"],
+        "openNumber": f"10-20{rng.randint(10, 24)}-{rng.randint(0, 9999999):07d}",
+    }
+
+
+def synthetic_response(kwargs: dict, took_ms: int) -> dict:
+    key = _request_key(kwargs)
+    rng = random.Random(key)
+    size = int(kwargs.get("size") or 10)
+    total = rng.randint(0, 5000)
+    returned = max(0, min(size, total - int(kwargs.get("from_") or 0)))
+    hits = []
+    for i in range(returned):
+        source = _synthetic_source(rng, i)
+        hit = {"_index": "patents", "_id": source["applicationNumber"], "_score": round(rng.uniform(1, 30), 3), "_source": source}
+        if kwargs.get("highlight"):
+            hit["highlight"] = {"title.ko": [source["title"]["ko"].replace("용", "<mark>용</mark>", 1)]}
+        hits.append(hit)
+    return {
+        "took": took_ms,
+        "timed_out": False,
+        "hits": {"total": {"value": total, "relation": "eq"}, "max_score": hits[0]["_score"] if hits else None, "hits": hits},
+    }
+
+
+class StubElasticsearch:
+    """AsyncElasticsearch.search만 흉내내는 스텁 (녹화 응답 우선, 없으면 합성 응답)"""
+
+    def __init__(self, recorded: Dict[str, dict], took_ms: float, rtt_ms: float, seed: int):
+        self.recorded = recorded
+        self.took_ms = took_ms
+        self.rtt_ms = rtt_ms
+        self.replayed = 0
+        self.synthesized = 0
+        self._rng = random.Random(seed)
+
+    async def search(self, **kwargs):
+        recorded = self.recorded.get(_request_key(kwargs))
+        if recorded is not None:
+            self.replayed += 1
+            took = recorded.get("took", 0)
+            response = recorded
+        else:
+            self.synthesized += 1
+            # 지수 분포로 꼬리 지연을 흉내냄 (평균 = took_ms)
+            took = int(self._rng.expovariate(1.0 / self.took_ms)) if self.took_ms > 0 else 0
+            response = synthetic_response(kwargs, took)
+        await asyncio.sleep((took + self.rtt_ms) / 1000.0)
+        return response
+
+    async def close(self):
+        pass
+
+
+class MeasuringElasticsearch:
+    """실제 ES/스텁 앞에 두고 요청별 took과 왕복 시간을 기록 (녹화 파일 지정 시 응답도 저장)"""
+
+    def __init__(self, inner, record_path: Optional[str] = None):
+        self.inner = inner
+        self._record = open(record_path, "a", encoding="utf-8") if record_path else None
+
+    async def search(self, **kwargs):
+        start = time.perf_counter()
+        response = await self.inner.search(**kwargs)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        body = getattr(response, "body", response)
+        sample = _es_sample.get()
+        if sample is not None:
+            sample["es_rtt_ms"] = elapsed_ms
+            sample["es_took_ms"] = float(body.get("took") or 0)
+        if self._record is not None:
+            self._record.write(json.dumps({"key": _request_key(kwargs), "response": body}, ensure_ascii=False) + "\n")
+        return response
+
+    async def close(self):
+        if self._record is not None:
+            self._record.close()
+        await self.inner.close()
+
+
+def load_recording(path: Optional[str]) -> Dict[str, dict]:
+    if not path:
+        return {}
+    out = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                out[row["key"]] = row["response"]
+    return out
+
+
+#--------------------------------------
+# 측정
+#--------------------------------------
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def summarize(values: List[float]) -> dict:
+    return {
+        "mean_ms": round(statistics.fmean(values), 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+    }
+
+
+async def run_load(app: FastAPI, plan: List[tuple], concurrency: int) -> dict:
+    samples: List[dict] = []
+    counter = iter(plan)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker():
+            for kind, params in counter:
+                sample = {"kind": kind, "status": 0}
+                token = _es_sample.set(sample)
+                start = time.perf_counter()
+                try:
+                    resp = await client.get("/api/patents/", params=params)
+                    await resp.aread()
+                    sample["status"] = resp.status_code
+                    sample["bytes"] = len(resp.content)
+                except Exception as e:
+                    sample["error"] = repr(e)
+                finally:
+                    _es_sample.reset(token)
+                sample["latency_ms"] = (time.perf_counter() - start) * 1000.0
+                samples.append(sample)
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall_s = time.perf_counter() - wall_start
+
+    return {"samples": samples, "wall_s": wall_s}
+
+
+def build_report(samples: List[dict], wall_s: float) -> dict:
+    def section(rows: List[dict]) -> dict:
+        ok = [r for r in rows if 200 <= r["status"] < 400]
+        with_es = [r for r in ok if "es_rtt_ms" in r]
+        return {
+            "requests": len(rows),
+            "errors": len(rows) - len(ok),
+            "error_rate": round((len(rows) - len(ok)) / len(rows), 4) if rows else 0.0,
+            "latency": summarize([r["latency_ms"] for r in ok]),
+            "es_took": summarize([r["es_took_ms"] for r in with_es]),
+            "es_rtt": summarize([r["es_rtt_ms"] for r in with_es]),
+            # 클라이언트 관측 지연 - ES 왕복 = 쿼리 조립 + 응답 가공/직렬화 + ASGI
+            "python_overhead": summarize([r["latency_ms"] - r["es_rtt_ms"] for r in with_es]),
+            # ES 왕복 - took = 네트워크 + 클라이언트(역)직렬화
+            "transport_overhead": summarize([max(0.0, r["es_rtt_ms"] - r["es_took_ms"]) for r in with_es]),
+            "mean_response_bytes": round(statistics.fmean([r.get("bytes", 0) for r in ok]), 1) if ok else 0.0,
+        }
+
+    kinds = sorted({r["kind"] for r in samples})
+    status_counts: Dict[str, int] = {}
+    for r in samples:
+        status_counts[str(r["status"] or "exception")] = status_counts.get(str(r["status"] or "exception"), 0) + 1
+    return {
+        "wall_s": round(wall_s, 2),
+        "throughput_rps": round(len(samples) / wall_s, 2) if wall_s > 0 else 0.0,
+        "status_counts": status_counts,
+        "overall": section(samples),
+        "by_kind": {k: section([r for r in samples if r["kind"] == k]) for k in kinds},
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"\n▶ {report['overall']['requests']}건 / {report['wall_s']}초 / {report['throughput_rps']} req/s / 상태 {report['status_counts']}")
+    header = f"{'':<10}{'n':>6}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'took50':>9}{'rtt50':>9}{'py50':>9}{'py95':>9}"
+    print(header)
+    for name, s in [("overall", report["overall"])] + list(report["by_kind"].items()):
+        print(
+            f"{name:<10}{s['requests']:>6}{s['error_rate'] * 100:>6.1f}%"
+            f"{s['latency']['p50_ms']:>9.1f}{s['latency']['p95_ms']:>9.1f}{s['latency']['p99_ms']:>9.1f}"
+            f"{s['es_took']['p50_ms']:>9.1f}{s['es_rtt']['p50_ms']:>9.1f}"
+            f"{s['python_overhead']['p50_ms']:>9.1f}{s['python_overhead']['p95_ms']:>9.1f}"
+        )
+
+
+async def main_async(args) -> dict:
+    if args.es_url:
+        from elasticsearch import AsyncElasticsearch
+
+        inner = AsyncElasticsearch(args.es_url, verify_certs=False, ssl_show_warn=False, request_timeout=30)
+        mode = "elasticsearch"
+    else:
+        inner = StubElasticsearch(load_recording(args.replay), args.stub_took_ms, args.stub_rtt_ms, args.seed)
+        mode = "stub"
+
+    original_es = patents.es
+    patents.es = MeasuringElasticsearch(inner, record_path=args.record)
+    app = FastAPI()
+    app.include_router(patents.router, prefix="/api/patents")
+
+    plan = build_plan(parse_mix(args.mix), args.requests, args.seed)
+    try:
+        if args.warmup:
+            await run_load(app, plan[: args.warmup], min(args.concurrency, args.warmup))
+        result = await run_load(app, plan, args.concurrency)
+    finally:
+        await patents.es.close()
+        patents.es = original_es
+
+    report = build_report(result["samples"], result["wall_s"])
+    report["mode"] = mode
+    report["config"] = {k: v for k, v in vars(args).items() if k != "out"}
+    if isinstance(inner, StubElasticsearch):
+        report["stub"] = {"replayed": inner.replayed, "synthesized": inner.synthesized}
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20, help="측정 전 버리는 요청 수")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="요청 종류=가중치 (tech_q, prod_q, claim_q, status, page)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--es-url", default=None, help="지정 시 로컬 ES 사용, 없으면 스텁")
+    parser.add_argument("--record", default=None, help="ES 응답 녹화 경로 (.jsonl)")
+    parser.add_argument("--replay", default=None, help="스텁이 재생할 녹화 파일")
+    parser.add_argument("--stub-took-ms", type=float, default=15.0, help="스텁 합성 응답의 평균 took")
+    parser.add_argument("--stub-rtt-ms", type=float, default=1.0, help="스텁의 took 외 왕복 지연")
+    parser.add_argument("--log-level", default="WARNING", help="get_patents 로그 레벨 (INFO면 요청마다 로그 출력)")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper())
+    logging.getLogger(patents.__name__).setLevel(args.log_level.upper())
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,142 @@
+"""
+특허 검색 쿼리 플래너 벤치마크 - 모든 조건을 must에 넣는 기존 방식 vs 정확 일치 조건을 filter로 보내는 방식
+
+사용 시나리오:
+- 같은 요청 순서(키워드는 매번 다르고 법적 상태 / 번호 필터 조합은 반복)를 두 방식으로 로컬 ES에 재생
+- 방식마다 노드 쿼리 캐시를 비운 뒤 실행하고, _stats/query_cache의 hit/miss 증가분과 took / 왕복 시간을 비교
+
+참고:
+- ES 노드 쿼리 캐시는 filter 문맥의 절만 캐시하며, 문서 수가 적은 세그먼트(기본 10,000건 미만)는 캐시하지 않음
+  → 작은 테스트 인덱스에서는 hit가 0으로 나올 수 있음 (운영 규모 스냅샷으로 측정할 것)
+- 같은 filter가 여러 번 쓰인 뒤에야 캐시됨 (Lucene usage tracking) → --requests를 충분히 크게
+
+실행 예 (저장소 루트에서):
+    PYTHONPATH=. python backend/scripts/bench_patents_query_cache.py --es-url http://localhost:9200 --requests 2000
+    PYTHONPATH=. python backend/scripts/bench_patents_query_cache.py --filters status,app_num --out /tmp/query_cache.json
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import List
+
+from elasticsearch import Elasticsearch
+
+from backend.services.patent_query import PatentSearchParams, plan_patent_query
+
+
+TECH_TERMS = ["배터리", "이차전지", "전고체", "반도체", "디스플레이", "센서", "자율주행", "양극재", "드론", "인공지능"]
+STATUS_SETS = [["등록"], ["공개"], ["등록", "공개"], ["소멸"], ["거절", "취하"]]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def sample_application_numbers(es: Elasticsearch, index: str, n: int) -> List[str]:
+    """번호 필터 반복용 실제 출원번호 몇 개"""
+    resp = es.search(index=index, size=n, source=["applicationNumber"], query={"match_all": {}})
+    return [h["_source"]["applicationNumber"] for h in resp["hits"]["hits"] if h["_source"].get("applicationNumber")]
+
+
+def build_workload(total: int, seed: int, filters: List[str], app_nums: List[str]) -> List[PatentSearchParams]:
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(total):
+        kwargs = {"tech_q": rng.choice(TECH_TERMS)}
+        if "status" in filters:
+            kwargs["status"] = rng.choice(STATUS_SETS)
+        if "app_num" in filters and app_nums and rng.random() < 0.3:
+            kwargs["app_num"] = rng.choice(app_nums)
+        workload.append(PatentSearchParams.from_request(**kwargs))
+    return workload
+
+
+def query_cache_stats(es: Elasticsearch, index: str) -> dict:
+    return es.indices.stats(index=index, metric="query_cache")["_all"]["total"]["query_cache"]
+
+
+def run_mode(es: Elasticsearch, index: str, workload: List[PatentSearchParams], filter_context: bool) -> dict:
+    es.indices.clear_cache(index=index, query=True, request=True)
+    before = query_cache_stats(es, index)
+
+    rtt_ms: List[float] = []
+    took_ms: List[float] = []
+    for params in workload:
+        plan = plan_patent_query(params, filter_context=filter_context)
+        start = time.perf_counter()
+        resp = es.search(
+            index=index,
+            query=plan.query(),
+            from_=params.skip,
+            size=params.limit,
+            sort=[{"_score": "desc"}],
+            request_cache=False,
+        )
+        rtt_ms.append((time.perf_counter() - start) * 1000.0)
+        took_ms.append(float(resp["took"]))
+
+    after = query_cache_stats(es, index)
+    hits = after["hit_count"] - before["hit_count"]
+    misses = after["miss_count"] - before["miss_count"]
+    return {
+        "mode": "filter" if filter_context else "must",
+        "requests": len(workload),
+        "query_cache_hits": hits,
+        "query_cache_misses": misses,
+        "query_cache_hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        "query_cache_entries": after["cache_count"] - before["cache_count"],
+        "query_cache_bytes": after["memory_size_in_bytes"],
+        "took_p50_ms": round(percentile(took_ms, 50), 2),
+        "took_p95_ms": round(percentile(took_ms, 95), 2),
+        "took_mean_ms": round(statistics.fmean(took_ms), 2),
+        "rtt_p50_ms": round(percentile(rtt_ms, 50), 2),
+        "rtt_p95_ms": round(percentile(rtt_ms, 95), 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--es-url", default="http://localhost:9200")
+    parser.add_argument("--index", default="patents")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--filters", default="status,app_num", help="반복할 필터 종류 (status, app_num)")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    es = Elasticsearch(args.es_url, verify_certs=False, request_timeout=60)
+    filters = [f.strip() for f in args.filters.split(",") if f.strip()]
+    app_nums = sample_application_numbers(es, args.index, 20) if "app_num" in filters else []
+    workload = build_workload(args.requests, args.seed, filters, app_nums)
+
+    # 같은 요청 순서를 두 방식으로 실행 (각각 캐시를 비운 상태에서 시작)
+    results = [run_mode(es, args.index, workload, filter_context=False), run_mode(es, args.index, workload, filter_context=True)]
+    legacy, planned = results
+    report = {
+        "es_url": args.es_url,
+        "index": args.index,
+        "filters": filters,
+        "results": results,
+        "delta": {
+            "hit_rate": round(planned["query_cache_hit_rate"] - legacy["query_cache_hit_rate"], 4),
+            "took_p50_ms": round(planned["took_p50_ms"] - legacy["took_p50_ms"], 2),
+            "took_p95_ms": round(planned["took_p95_ms"] - legacy["took_p95_ms"], 2),
+        },
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.out}")
+    es.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+"""
+특허 목록 응답 크기 벤치마크 - 전체 _source(view=full) vs 목록용 필드만(view=list, PATENTS_LIST_SOURCE)
+
+사용 시나리오:
+- 같은 검색 순서를 두 방식으로 로컬 ES에 실행하고, 한 페이지당
+  ES 응답 바이트 / API 응답 바이트 / 직렬화 시간(jsonable_encoder + json.dumps, FastAPI 응답 경로와 동일) / took / 왕복 시간 비교
+- 프론트 상세 검색은 limit을 크게 잡으므로 --limit을 바꿔 가며 측정할 것
+
+실행 예 (저장소 루트에서):
+    PYTHONPATH=. python backend/scripts/bench_patents_source.py --es-url http://localhost:9200 --requests 200
+    PYTHONPATH=. python backend/scripts/bench_patents_source.py --limit 1000 --out /tmp/patents_source.json
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import List
+
+from elasticsearch import Elasticsearch
+from fastapi.encoders import jsonable_encoder
+
+from backend.services.patent_query import PATENTS_LIST_SOURCE, PatentSearchParams, plan_patent_query
+
+
+TECH_TERMS = ["배터리", "이차전지", "전고체", "반도체", "디스플레이", "센서", "자율주행", "양극재", "드론", "인공지능"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def run_mode(es: Elasticsearch, index: str, workload: List[PatentSearchParams]) -> dict:
+    es_bytes: List[int] = []
+    api_bytes: List[int] = []
+    serialize_ms: List[float] = []
+    took_ms: List[float] = []
+    rtt_ms: List[float] = []
+    for params in workload:
+        start = time.perf_counter()
+        resp = es.search(
+            index=index,
+            query=plan_patent_query(params).query(),
+            from_=params.skip,
+            size=params.limit,
+            source=params.source,
+            sort=[{"_score": "desc"}],
+        )
+        rtt_ms.append((time.perf_counter() - start) * 1000.0)
+        took_ms.append(float(resp["took"]))
+        es_bytes.append(len(json.dumps(resp.body, ensure_ascii=False).encode("utf-8")))
+
+        # get_patents 응답 조립 + FastAPI 직렬화 경로
+        start = time.perf_counter()
+        payload = {
+            "total": resp["hits"]["total"]["value"],
+            "page": params.page,
+            "limit": params.limit,
+            "data": [hit["_source"].copy() for hit in resp["hits"]["hits"]],
+            "engine": "elasticsearch",
+        }
+        body = json.dumps(jsonable_encoder(payload), ensure_ascii=False).encode("utf-8")
+        serialize_ms.append((time.perf_counter() - start) * 1000.0)
+        api_bytes.append(len(body))
+
+    return {
+        "view": workload[0].view if workload else None,
+        "requests": len(workload),
+        "es_bytes_mean": round(statistics.fmean(es_bytes)),
+        "api_bytes_mean": round(statistics.fmean(api_bytes)),
+        "api_bytes_p95": percentile(api_bytes, 95),
+        "serialize_p50_ms": round(percentile(serialize_ms, 50), 3),
+        "serialize_p95_ms": round(percentile(serialize_ms, 95), 3),
+        "took_p50_ms": round(percentile(took_ms, 50), 2),
+        "rtt_p50_ms": round(percentile(rtt_ms, 50), 2),
+        "rtt_p95_ms": round(percentile(rtt_ms, 95), 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--es-url", default="http://localhost:9200")
+    parser.add_argument("--index", default="patents")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10, help="페이지 크기")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    es = Elasticsearch(args.es_url, verify_certs=False, request_timeout=60)
+    rng = random.Random(args.seed)
+    terms = [rng.choice(TECH_TERMS) for _ in range(args.requests)]
+
+    results = []
+    for view in ("full", "list"):
+        workload = [PatentSearchParams.from_request(tech_q=t, limit=args.limit, view=view) for t in terms]
+        results.append(run_mode(es, args.index, workload))
+    full, listed = results
+    report = {
+        "es_url": args.es_url,
+        "index": args.index,
+        "limit": args.limit,
+        "list_source": PATENTS_LIST_SOURCE,
+        "results": results,
+        "reduction": {
+            "api_bytes": round(1 - listed["api_bytes_mean"] / full["api_bytes_mean"], 4) if full["api_bytes_mean"] else 0.0,
+            "serialize_p50": round(1 - listed["serialize_p50_ms"] / full["serialize_p50_ms"], 4) if full["serialize_p50_ms"] else 0.0,
+        },
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.out}")
+    es.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,182 @@
+"""
+특허 검색어 질의 언어 벤치마크 - 파싱/컴파일 비용과 컴파일 캐시 효과, 연산자 우선순위 무작위 검증
+
+사용 시나리오:
+- 대표 검색어 목록을 (1) 캐시 없이 매번 파싱+컴파일 (2) 컴파일 캐시 경유로 반복해 호출당 비용 비교
+- --fuzz N: 무작위 검색어 N개를 만들어 컴파일된 DSL을 진리값으로 평가한 결과가
+  같은 식을 Python 불리언 식(not > and > or 우선순위 동일)으로 평가한 결과와 같은지 확인
+  + 잘못된 검색어 N개(끝나는 NOT, 짝 없는 괄호 / 따옴표, 연속 연산자)가 예외 없이 파싱되고 연산자가 검색어로 새지 않는지 확인
+
+실행 예 (저장소 루트에서, ES 불필요):
+    PYTHONPATH=. python backend/scripts/bench_query_language.py --iterations 20000
+    PYTHONPATH=. python backend/scripts/bench_query_language.py --fuzz 5000 --out /tmp/query_language.json
+"""
+import argparse
+import itertools
+import json
+import random
+import time
+from typing import Dict, List
+
+from backend.services.patent_query import TECH_SPEC
+from backend.services.query_language import CompiledQueryCache, FieldSpec, compile_node, parse
+
+
+EXPRESSIONS = [
+    "배터리",
+    "리튬 이차전지",
+    "배터리 OR 이차전지",
+    "배터리 AND 양극재",
+    '"전고체 전지" AND (황화물 OR 산화물)',
+    "(반도체 OR 디스플레이) AND NOT OLED",
+    '자율주행 AND (라이다 OR "레이더 센서") AND NOT (드론 OR 선박)',
+    "NOT (A OR B) AND C OR D AND NOT E",
+]
+
+
+def _per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for expression in itertools.islice(itertools.cycle(EXPRESSIONS), iterations):
+        fn(expression)
+    return round((time.perf_counter() - start) / iterations * 1e6, 3)
+
+
+def run_benchmark(iterations: int, spec: FieldSpec) -> dict:
+    cache = CompiledQueryCache(max_entries=len(EXPRESSIONS))
+    cache.compile(EXPRESSIONS[0], spec)  # import / 첫 호출 비용 제외
+    cache.clear()
+    results = {
+        "parse_us": _per_call_us(parse, iterations),
+        "parse_compile_us": _per_call_us(lambda e: compile_node(parse(e), spec), iterations),
+        "cached_compile_us": _per_call_us(lambda e: cache.compile(e, spec), iterations),
+        "cache": cache.snapshot(),
+    }
+    results["speedup"] = round(results["parse_compile_us"] / results["cached_compile_us"], 1) if results["cached_compile_us"] else None
+    return results
+
+
+#--------------------------------------
+# 우선순위 무작위 검증
+#--------------------------------------
+VARIABLES = ["a", "b", "c", "d", "e"]
+
+
+def random_expression(rng: random.Random, depth: int = 0) -> List[str]:
+    """토큰 목록 (단어는 한 글자 변수, 인접 단어가 합쳐지지 않도록 항상 연산자로 연결)"""
+    if depth >= 3 or rng.random() < 0.3:
+        tokens = [rng.choice(VARIABLES)] if rng.random() < 0.7 else ['"' + rng.choice(VARIABLES) + '"']
+    else:
+        tokens = random_expression(rng, depth + 1)
+        for _ in range(rng.randint(1, 3)):
+            tokens += [rng.choice(["AND", "OR", "and", "or"])] + random_expression(rng, depth + 1)
+        if rng.random() < 0.5:
+            tokens = ["("] + tokens + [")"]
+    if rng.random() < 0.2:
+        tokens = ["NOT"] + tokens
+    return tokens
+
+
+MALFORMED_TOKENS = VARIABLES + ["AND", "OR", "NOT", "and", "not", "(", ")", "((", "))", '"', '"a', 'b"', '""']
+
+
+def random_malformed(rng: random.Random) -> str:
+    """연산자 / 괄호 / 따옴표를 아무렇게나 섞은 검색어 (끝나는 NOT, 짝 없는 괄호, 연속 연산자 등)"""
+    return " ".join(rng.choice(MALFORMED_TOKENS) for _ in range(rng.randint(1, 8)))
+
+
+def _word_texts(clause: dict) -> List[str]:
+    """따옴표 구문을 제외한 검색어 (구문 안의 연산자 / 괄호는 그대로 검색하는 것이 맞음)"""
+    if "match_phrase" in clause:
+        return []
+    if "match" in clause:
+        return list(clause["match"].values())
+    if "multi_match" in clause:
+        return [] if clause["multi_match"].get("type") == "phrase" else [clause["multi_match"]["query"]]
+    body = clause["bool"]
+    return [t for key in ("must", "must_not", "should") for c in body.get(key, []) for t in _word_texts(c)]
+
+
+def python_eval(tokens: List[str], truth: Dict[str, bool]) -> bool:
+    mapped = []
+    for tok in tokens:
+        if tok.upper() in ("AND", "OR", "NOT"):
+            mapped.append(tok.lower())
+        elif tok in ("(", ")"):
+            mapped.append(tok)
+        else:
+            mapped.append(repr(truth[tok.strip('"')]))
+    return eval(" ".join(mapped))
+
+
+def dsl_eval(clause: dict, truth: Dict[str, bool]) -> bool:
+    if "match" in clause or "match_phrase" in clause:
+        return truth[next(iter((clause.get("match") or clause["match_phrase"]).values()))]
+    if "multi_match" in clause:
+        return truth[clause["multi_match"]["query"]]
+    body = clause["bool"]
+    ok = all(dsl_eval(c, truth) for c in body.get("must", []))
+    ok = ok and not any(dsl_eval(c, truth) for c in body.get("must_not", []))
+    if "should" in body:
+        ok = ok and sum(dsl_eval(c, truth) for c in body["should"]) >= body.get("minimum_should_match", 1)
+    return ok
+
+
+def run_fuzz(count: int, seed: int, spec: FieldSpec) -> dict:
+    rng = random.Random(seed)
+    failures = []
+    for _ in range(count):
+        tokens = random_expression(rng)
+        expression = " ".join(tokens)
+        compiled = compile_node(parse(expression), spec)
+        top = {"bool": {"must": list(compiled.must), "must_not": list(compiled.must_not)}}
+        for values in itertools.product([False, True], repeat=len(VARIABLES)):
+            truth = dict(zip(VARIABLES, values))
+            if dsl_eval(top, truth) != python_eval(tokens, truth):
+                failures.append({"expression": expression, "truth": truth})
+                break
+
+    # 잘못된 입력: 예외 없이 파싱되고, 연산자 / 괄호가 검색어로 새지 않아야 함
+    malformed_failures = []
+    for _ in range(count):
+        expression = random_malformed(rng)
+        try:
+            compiled = compile_node(parse(expression), spec)
+        except Exception as e:
+            malformed_failures.append({"expression": expression, "error": repr(e)})
+            continue
+        texts = [t for c in compiled.must + compiled.must_not for t in _word_texts(c)]
+        leaked = [t for t in texts if any(w.upper() in ("AND", "OR", "NOT") or w in ("(", ")") for w in t.split())]
+        if leaked:
+            malformed_failures.append({"expression": expression, "leaked": leaked})
+    return {
+        "expressions": count,
+        "failures": len(failures),
+        "examples": failures[:5],
+        "malformed_expressions": count,
+        "malformed_failures": len(malformed_failures),
+        "malformed_examples": malformed_failures[:5],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--fuzz", type=int, default=0, help="무작위 우선순위 검증 식 개수 (0이면 생략)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    report = {"iterations": args.iterations, "benchmark": run_benchmark(args.iterations, TECH_SPEC)}
+    if args.fuzz:
+        report["fuzz"] = run_fuzz(args.fuzz, args.seed, FieldSpec(("abstract",)))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.out}")
+    fuzz = report.get("fuzz", {})
+    return 1 if fuzz.get("failures") or fuzz.get("malformed_failures") else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,389 @@
+"""
+챗봇 RAG 경로(run_llamaindex_query) 오프라인 지연시간 벤치마크
+
+사용 시나리오:
+- search_service / loader 변경이 챗봇 지연시간을 악화시키는지 Qdrant/Ollama 없이 확인
+- 합성 특허 코퍼스를 qdrant_client 인메모리 모드에 적재
+- 결정적(deterministic) 가짜 임베딩 / LLM / cross-encoder로 각 단계의 외부 지연을 흉내냄
+- 동시성 단계별 단계(stage)별 p50/p95/p99와 처리량을 JSON으로 저장 → --baseline으로 두 실행 비교
+
+실행 예 (저장소 루트에서):
+    PYTHONPATH=. python backend/scripts/bench_rag_offline.py --concurrency 1 4 8 --rounds 5 --out /tmp/rag_before.json
+    PYTHONPATH=. python backend/scripts/bench_rag_offline.py --concurrency 1 4 8 --rounds 5 --baseline /tmp/rag_before.json
+"""
+import os
+
+# search_service가 import 시점에 읽는 환경 변수 (실제 서비스 설정과 섞이지 않도록 먼저 지정)
+os.environ.setdefault("PATENTS_COLLECTION_NAME", "bench_patents")
+os.environ.setdefault("OLLAMA_LLM_MODEL", "fake-llm")
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import math
+import random
+import re
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Sequence, Tuple
+
+from llama_index.core import Settings, StorageContext, VectorStoreIndex
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.llms import CompletionResponse, CustomLLM, LLMMetadata
+from llama_index.core.llms.callbacks import llm_completion_callback
+from llama_index.core.schema import TextNode
+from llama_index.vector_stores.qdrant import QdrantVectorStore
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from backend.services import search_service
+from backend.services.embedding_cache import CachedEmbedding, EmbeddingLRU
+from backend.services.entity_index import entity_index
+from backend.services.rerank_batcher import RerankBatcher
+
+
+STAGES = ["retrieve_ms", "rerank_ms", "meta_ms", "fanout_ms", "combine_ms", "llm_ms", "total_ms"]
+
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+GIVEN = "민서준우진영수지현하은도윤호연성"
+COMPANIES = ["삼성전자", "LG에너지솔루션", "SK하이닉스", "현대자동차", "포스코", "한국전자통신연구원", "카이스트", "네이버"]
+TOPICS = [
+    ("이차전지", ["양극재", "음극", "전해질", "분리막", "리튬", "셀", "모듈", "냉각", "충전", "방전"]),
+    ("반도체", ["기판", "식각", "증착", "웨이퍼", "트랜지스터", "게이트", "메모리", "패키지", "회로", "공정"]),
+    ("디스플레이", ["패널", "발광", "화소", "구동", "편광", "터치", "기판", "봉지", "색변환", "휘도"]),
+    ("자동차", ["모터", "제동", "조향", "센서", "배터리팩", "열관리", "충돌", "자율주행", "제어기", "차체"]),
+]
+_WORD_RE = re.compile(r"[가-힣A-Za-z0-9\-]+")
+
+
+#--------------------------------------
+# 결정적 가짜 모델
+#--------------------------------------
+def _hashed_bag_of_words(text: str, dim: int) -> List[float]:
+    """단어 해시 → 차원 누적 후 정규화 (같은 단어를 공유하는 문서끼리 가까워짐)"""
+    vec = [0.0] * dim
+    for word in _WORD_RE.findall(text.lower()):
+        h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+        vec[h % dim] += 1.0 if (h >> 32) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vec))
+    return [v / norm for v in vec] if norm > 0 else [1.0 / math.sqrt(dim)] * dim
+
+
+class FakeEmbedding(BaseEmbedding):
+    """Ollama 임베딩 대신 쓰는 결정적 임베딩 (질문 임베딩에만 지연 적용, 코퍼스 적재는 즉시)"""
+
+    dim: int = 128
+    delay_ms: float = 0.0
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "FakeEmbedding"
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        time.sleep(self.delay_ms / 1000.0)
+        return _hashed_bag_of_words(query, self.dim)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        await asyncio.sleep(self.delay_ms / 1000.0)
+        return _hashed_bag_of_words(query, self.dim)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return _hashed_bag_of_words(text, self.dim)
+
+
+class FakeLLM(CustomLLM):
+    """Ollama LLM 대신 쓰는 결정적 LLM (첫 토큰 지연 + 토큰당 지연)"""
+
+    first_token_ms: float = 300.0
+    per_token_ms: float = 20.0
+    output_tokens: int = 40
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(model_name="fake-llm", context_window=8192, num_output=self.output_tokens)
+
+    def _tokens(self, prompt: str) -> List[str]:
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+        return [f"토큰{digest[i % len(digest)]} " for i in range(self.output_tokens)]
+
+    def _total_delay_s(self) -> float:
+        return (self.first_token_ms + self.per_token_ms * self.output_tokens) / 1000.0
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        time.sleep(self._total_delay_s())
+        return CompletionResponse(text="".join(self._tokens(prompt)))
+
+    @llm_completion_callback()
+    async def acomplete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        await asyncio.sleep(self._total_delay_s())
+        return CompletionResponse(text="".join(self._tokens(prompt)))
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+        def gen():
+            text = ""
+            time.sleep(self.first_token_ms / 1000.0)
+            for tok in self._tokens(prompt):
+                text += tok
+                yield CompletionResponse(text=text, delta=tok)
+                time.sleep(self.per_token_ms / 1000.0)
+        return gen()
+
+    @llm_completion_callback()
+    async def astream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+        async def gen() -> AsyncIterator[CompletionResponse]:
+            text = ""
+            await asyncio.sleep(self.first_token_ms / 1000.0)
+            for tok in self._tokens(prompt):
+                text += tok
+                yield CompletionResponse(text=text, delta=tok)
+                await asyncio.sleep(self.per_token_ms / 1000.0)
+        return gen()
+
+
+def make_fake_score_pairs(batch_ms: float, per_pair_ms: float):
+    """cross-encoder.predict 대체: 배치 고정 비용 + 쌍당 비용만큼 스레드를 점유하고 단어 겹침으로 점수화"""
+
+    def score_pairs(pairs: List[Tuple[str, str]]) -> Sequence[float]:
+        time.sleep((batch_ms + per_pair_ms * len(pairs)) / 1000.0)
+        scores = []
+        for query, text in pairs:
+            q = set(_WORD_RE.findall(query.lower()))
+            t = set(_WORD_RE.findall(text.lower()))
+            scores.append(len(q & t) / (len(q) or 1))
+        return scores
+
+    return score_pairs
+
+
+#--------------------------------------
+# 합성 코퍼스 / 질문
+#--------------------------------------
+def synthetic_corpus(n_patents: int, chunks_per_patent: int, seed: int = 0) -> Tuple[List[TextNode], List[dict]]:
+    rng = random.Random(seed)
+    nodes: List[TextNode] = []
+    metas: List[dict] = []
+    for i in range(n_patents):
+        topic, words = TOPICS[i % len(TOPICS)]
+        base_meta = {
+            "source": f"synthetic/{i}.txt",
+            "title": f"{topic} {rng.choice(words)} {rng.choice(words)} 장치 및 방법",
+            "patent_no": f"10-20{rng.randint(10, 24)}-{i:07d}",
+            "application_number": f"10-20{rng.randint(10, 24)}-{i + 5000000:07d}",
+            "applicants": [f"{rng.choice(COMPANIES)}주식회사"],
+            "inventors": ["".join([rng.choice(SURNAMES), rng.choice(GIVEN), rng.choice(GIVEN)]) for _ in range(rng.randint(1, 3))],
+            "agents": [f"특허법인{rng.choice(GIVEN)}{rng.choice(GIVEN)}"],
+        }
+        metas.append(base_meta)
+        doc_meta_text = "\n".join(f"{k}: {v}" for k, v in base_meta.items())
+        nodes.append(TextNode(text=doc_meta_text, metadata={**base_meta, "section": "doc_meta"}))
+        nodes.append(TextNode(
+            text=f"{base_meta['title']}에 관한 것으로 " + " ".join(rng.choice(words) for _ in range(60)),
+            metadata={**base_meta, "section": "abstract"},
+        ))
+        for c in range(chunks_per_patent):
+            nodes.append(TextNode(
+                text=" ".join(rng.choice(words) for _ in range(rng.randint(80, 200))),
+                metadata={**base_meta, "section": "claim", "claim_no": c + 1},
+            ))
+    return nodes, metas
+
+
+def synthetic_queries(metas: List[dict], n: int, seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        m = rng.choice(metas)
+        topic, words = rng.choice(TOPICS)
+        kind = rng.random()
+        if kind < 0.5:
+            out.append(f"{topic} {rng.choice(words)} {rng.choice(words)} 관련 특허 알려줘")
+        elif kind < 0.75:
+            out.append(f"{m['applicants'][0].replace('주식회사', '')} {topic} 특허 요약해줘")
+        elif kind < 0.9:
+            out.append(f"{m['inventors'][0]} 발명자가 출원한 {rng.choice(words)} 특허")
+        else:
+            out.append(f"{m['application_number']} 특허의 청구항 설명해줘")
+    return out
+
+
+#--------------------------------------
+# 런타임 구성 (initialize_llamaindex와 같은 구성 요소를 로컬 대체물로 연결)
+#--------------------------------------
+async def build_runtime(args) -> Tuple[ThreadPoolExecutor, List[dict]]:
+    embed_model = FakeEmbedding(dim=args.dim, delay_ms=args.embed_ms)
+    Settings.embed_model = (
+        CachedEmbedding(inner=embed_model, cache=EmbeddingLRU(path=None)) if args.embed_cache else embed_model
+    )
+    Settings.llm = FakeLLM(
+        first_token_ms=args.llm_first_token_ms,
+        per_token_ms=args.llm_token_ms,
+        output_tokens=args.llm_tokens,
+    )
+
+    nodes, metas = synthetic_corpus(args.patents, args.chunks, seed=args.seed)
+    for node in nodes:
+        node.embedding = embed_model.get_text_embedding(node.get_content())
+
+    # 인메모리 클라이언트는 인스턴스마다 저장소가 따로이므로 동기/비동기 양쪽에 같은 포인트를 적재
+    collection = search_service.COLLECTION_NAME
+    client = QdrantClient(location=":memory:")
+    aclient = AsyncQdrantClient(location=":memory:")
+    vector_store = QdrantVectorStore(client=client, aclient=aclient, collection_name=collection)
+    load_start = time.perf_counter()
+    vector_store.add(nodes)
+    await vector_store.async_add(nodes)
+    print(f"▶ 코퍼스 적재: 특허 {args.patents}건 / 노드 {len(nodes)}개 ({time.perf_counter() - load_start:.1f}초)")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        await entity_index.refresh_from_qdrant(aclient, collection, force=True)
+
+    executor = ThreadPoolExecutor(max_workers=args.rerank_workers, thread_name_prefix="rerank")
+    index = VectorStoreIndex.from_vector_store(
+        vector_store=vector_store,
+        storage_context=StorageContext.from_defaults(vector_store=vector_store),
+    )
+    search_service.client = client
+    search_service.client_qdrant_async = aclient
+    search_service.index = index
+    search_service.retriever = index.as_retriever(similarity_top_k=search_service.RETRIEVER_TOP_K)
+    search_service.reranker = RerankBatcher(
+        score_pairs=make_fake_score_pairs(args.rerank_batch_ms, args.rerank_pair_ms),
+        top_n=search_service.RERANKER_TOP_K,
+        executor=executor,
+        max_concurrent_batches=args.rerank_workers,
+    )
+    return executor, metas
+
+
+#--------------------------------------
+# 측정
+#--------------------------------------
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def summarize_stage(values: List[float]) -> dict:
+    return {
+        "count": len(values),
+        "mean_ms": round(statistics.fmean(values), 1) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 1),
+        "p95_ms": round(percentile(values, 95), 1),
+        "p99_ms": round(percentile(values, 99), 1),
+    }
+
+
+async def run_level(concurrency: int, queries: List[str], rounds: int, verbose: bool) -> dict:
+    per_stage: Dict[str, List[float]] = {s: [] for s in STAGES}
+    errors = 0
+    total = concurrency * rounds
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            timings: dict = {}
+            try:
+                await search_service.run_llamaindex_query(queries[i % len(queries)], timings=timings)
+            except Exception:
+                errors += 1
+                continue
+            for s in STAGES:
+                if s in timings:
+                    per_stage[s].append(timings[s])
+
+    sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    wall_start = time.perf_counter()
+    with sink:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_s = time.perf_counter() - wall_start
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "wall_s": round(wall_s, 2),
+        "throughput_rps": round((total - errors) / wall_s, 2) if wall_s > 0 else 0.0,
+        "stages": {s.removesuffix("_ms"): summarize_stage(v) for s, v in per_stage.items() if v},
+    }
+
+
+def print_level(r: dict, baseline: dict = None) -> None:
+    print(f"\n[c={r['concurrency']}] {r['requests']}건 / 오류 {r['errors']} / {r['throughput_rps']} req/s")
+    for stage, s in r["stages"].items():
+        line = f"  {stage:<9} p50={s['p50_ms']:>8.1f}ms p95={s['p95_ms']:>8.1f}ms p99={s['p99_ms']:>8.1f}ms"
+        base = (baseline or {}).get("stages", {}).get(stage)
+        if base:
+            line += f"  (p50 {s['p50_ms'] - base['p50_ms']:+.1f}ms / p95 {s['p95_ms'] - base['p95_ms']:+.1f}ms)"
+        print(line)
+    if baseline:
+        print(f"  처리량 변화: {r['throughput_rps'] - baseline['throughput_rps']:+.2f} req/s")
+
+
+async def main_async(args) -> dict:
+    executor, metas = await build_runtime(args)
+    queries = synthetic_queries(metas, max(args.queries, 1), seed=args.seed + 1)
+    baseline_by_c = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline_by_c = {r["concurrency"]: r for r in json.load(f)["results"]}
+
+    try:
+        # 첫 호출 비용(토크나이저 로드 등)이 측정에 섞이지 않도록 한 번 실행
+        await run_level(1, queries, 1, verbose=False)
+        results = []
+        for c in args.concurrency:
+            r = await run_level(c, queries, args.rounds, args.verbose)
+            results.append(r)
+            print_level(r, baseline_by_c.get(c))
+    finally:
+        await search_service.reranker.close()
+        executor.shutdown(wait=True)
+        await search_service.client_qdrant_async.close()
+
+    config = {k: v for k, v in vars(args).items() if k not in ("out", "baseline", "verbose")}
+    config["retriever_top_k"] = search_service.RETRIEVER_TOP_K
+    config["reranker_top_k"] = search_service.RERANKER_TOP_K
+    return {"config": config, "results": results}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--rounds", type=int, default=5, help="동시성 단계별 워커당 요청 수")
+    parser.add_argument("--patents", type=int, default=500, help="합성 특허 수")
+    parser.add_argument("--chunks", type=int, default=6, help="특허당 청구항 청크 수")
+    parser.add_argument("--queries", type=int, default=200, help="합성 질문 수 (순환 사용)")
+    parser.add_argument("--dim", type=int, default=128, help="가짜 임베딩 차원")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embed-ms", type=float, default=30.0, help="질문 임베딩 지연")
+    parser.add_argument("--embed-cache", action="store_true", help="CachedEmbedding 래퍼 사용")
+    parser.add_argument("--rerank-batch-ms", type=float, default=20.0, help="cross-encoder 배치 고정 비용")
+    parser.add_argument("--rerank-pair-ms", type=float, default=2.0, help="cross-encoder 쌍당 비용")
+    parser.add_argument("--rerank-workers", type=int, default=search_service.RERANK_MAX_WORKERS)
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-token-ms", type=float, default=20.0)
+    parser.add_argument("--llm-tokens", type=int, default=40)
+    parser.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument("--verbose", action="store_true", help="파이프라인 로그 출력")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,135 @@
+"""
+cross-encoder reranker 마이크로 배칭 처리량 벤치마크
+
+사용 시나리오:
+- RERANK_BATCH_MAX_PAIRS / RERANK_BATCH_MAX_WAIT_MS 값을 정할 때
+- 동시 요청 C개가 각각 (질문, 청크) 30쌍을 rerank하는 상황을 재현
+- 배칭 끔(요청마다 개별 forward pass) vs 배칭 켬을 같은 모델/스레드 수로 비교
+
+실행 예 (저장소 루트에서):
+    PYTHONPATH=. python backend/scripts/bench_rerank_batching.py --concurrency 1 4 8 16 --rounds 5
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from sentence_transformers import CrossEncoder
+
+from backend.services.rerank_batcher import RerankBatcher
+
+
+WORDS = [
+    "배터리", "전극", "양극재", "음극", "전해질", "분리막", "이차전지", "리튬", "고체", "셀",
+    "모듈", "냉각", "충전", "방전", "반도체", "기판", "센서", "디스플레이", "패널", "회로",
+]
+
+QUERIES = [
+    "삼성전자 배터리 특허 알려줘",
+    "전고체 전해질 조성물",
+    "디스플레이 패널 구동 회로",
+    "이차전지 냉각 구조",
+]
+
+
+def make_chunk(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def make_requests(n: int, pairs_per_request: int, seed: int) -> List[List[Tuple[str, str]]]:
+    rng = random.Random(seed)
+    return [
+        [(QUERIES[i % len(QUERIES)], make_chunk(rng, 120)) for _ in range(pairs_per_request)]
+        for i in range(n)
+    ]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+async def run_mode(model: CrossEncoder, batching: bool, concurrency: int, rounds: int, args) -> dict:
+    executor = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="rerank")
+    batcher = RerankBatcher(
+        score_pairs=model.predict,
+        top_n=6,
+        executor=executor,
+        # 배칭 끔: 요청 하나(30쌍)가 곧 배치, 대기 없음
+        max_batch_pairs=args.max_batch_pairs if batching else args.pairs,
+        max_wait_ms=args.max_wait_ms if batching else 0.0,
+        max_concurrent_batches=args.workers,
+    )
+    requests = make_requests(concurrency * rounds, args.pairs, seed=concurrency)
+    latencies_ms: List[float] = []
+
+    async def one(pairs):
+        start = time.perf_counter()
+        await batcher.score(pairs)
+        latencies_ms.append((time.perf_counter() - start) * 1000.0)
+
+    wall_start = time.perf_counter()
+    for r in range(rounds):
+        await asyncio.gather(*(one(p) for p in requests[r * concurrency:(r + 1) * concurrency]))
+    wall_s = time.perf_counter() - wall_start
+
+    stats = batcher.snapshot()
+    await batcher.close()
+    executor.shutdown(wait=True)
+    return {
+        "mode": "batched" if batching else "per_request",
+        "concurrency": concurrency,
+        "requests": len(requests),
+        "throughput_rps": round(len(requests) / wall_s, 2),
+        "pairs_per_s": round(len(requests) * args.pairs / wall_s, 1),
+        "p50_ms": round(percentile(latencies_ms, 50), 1),
+        "p95_ms": round(percentile(latencies_ms, 95), 1),
+        "mean_ms": round(statistics.fmean(latencies_ms), 1),
+        "avg_batch_pairs": stats["avg_batch_pairs"],
+    }
+
+
+async def main_async(args) -> List[dict]:
+    print(f"▶ 모델 로드: {args.model}")
+    model = CrossEncoder(args.model, max_length=512, device="cpu")
+    model.predict([("warmup", "warmup")])
+
+    results = []
+    for c in args.concurrency:
+        for batching in (False, True):
+            r = await run_mode(model, batching, c, args.rounds, args)
+            results.append(r)
+            print(
+                f"c={c:<3} {r['mode']:<12} rps={r['throughput_rps']:>7.2f} pairs/s={r['pairs_per_s']:>8.1f} "
+                f"p50={r['p50_ms']:>8.1f}ms p95={r['p95_ms']:>8.1f}ms avg_batch={r['avg_batch_pairs']}"
+            )
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--pairs", type=int, default=30, help="요청당 (질문, 청크) 쌍 수 (RETRIEVER_TOP_K)")
+    parser.add_argument("--workers", type=int, default=2, help="RERANK_MAX_WORKERS")
+    parser.add_argument("--max-batch-pairs", type=int, default=128)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+"""
+Reranker 백엔드 비교 벤치마크 (PyTorch vs ONNX Runtime int8)
+
+사용 시나리오:
+- RERANK_BACKEND=onnx 로 바꾸기 전에 속도와 순위 일치도를 확인할 때
+- 요청 하나 = (질문, 청크) 30쌍 → 상위 6개 (RETRIEVER_TOP_K / RERANKER_TOP_K 기본값)
+- 지표: 요청당 지연시간(p50/p95), top-6 집합 일치율, top-1 일치율
+
+실행 예 (저장소 루트에서, ONNX 모델이 없으면 처음 한 번 자동 생성):
+    PYTHONPATH=. python backend/scripts/bench_reranker_backends.py --requests 50 --max-length 512 --threads 4
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import List, Tuple
+
+from backend.services.rerankers import OnnxCrossEncoder, TorchCrossEncoder, RERANK_MODEL, RERANK_ONNX_PATH
+
+
+WORDS = [
+    "배터리", "전극", "양극재", "음극", "전해질", "분리막", "이차전지", "리튬", "고체", "셀",
+    "모듈", "냉각", "충전", "방전", "반도체", "기판", "센서", "디스플레이", "패널", "회로",
+    "battery", "electrode", "cathode", "solid", "electrolyte", "module", "cooling", "sensor",
+]
+
+QUERIES = [
+    "삼성전자 배터리 특허 알려줘",
+    "전고체 전해질 조성물",
+    "디스플레이 패널 구동 회로",
+    "이차전지 냉각 구조",
+    "solid electrolyte battery cathode",
+]
+
+
+def make_requests(n: int, pairs: int, seed: int = 0) -> List[List[Tuple[str, str]]]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        q = QUERIES[i % len(QUERIES)]
+        out.append([(q, " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 400)))) for _ in range(pairs)])
+    return out
+
+
+def top_k(scores, k: int) -> List[int]:
+    return sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:k]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def time_backend(model, requests) -> Tuple[List[List[float]], List[float]]:
+    model.predict(requests[0][:2])  # warmup
+    all_scores, latencies_ms = [], []
+    for pairs in requests:
+        start = time.perf_counter()
+        scores = model.predict(pairs)
+        latencies_ms.append((time.perf_counter() - start) * 1000.0)
+        all_scores.append(list(scores))
+    return all_scores, latencies_ms
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=RERANK_MODEL)
+    parser.add_argument("--onnx-path", default=RERANK_ONNX_PATH)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--pairs", type=int, default=30)
+    parser.add_argument("--top-n", type=int, default=6)
+    parser.add_argument("--max-length", type=int, default=512)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    requests = make_requests(args.requests, args.pairs)
+
+    torch_model = TorchCrossEncoder(args.model, max_length=args.max_length, num_threads=args.threads)
+    onnx_model = OnnxCrossEncoder(args.model, onnx_path=args.onnx_path, max_length=args.max_length, num_threads=args.threads)
+
+    torch_scores, torch_lat = time_backend(torch_model, requests)
+    onnx_scores, onnx_lat = time_backend(onnx_model, requests)
+
+    overlaps, top1 = [], 0
+    for ts, os_ in zip(torch_scores, onnx_scores):
+        t_top, o_top = top_k(ts, args.top_n), top_k(os_, args.top_n)
+        overlaps.append(len(set(t_top) & set(o_top)) / args.top_n)
+        top1 += int(t_top[0] == o_top[0])
+
+    result = {
+        "requests": args.requests,
+        "pairs_per_request": args.pairs,
+        "max_length": args.max_length,
+        "threads": args.threads,
+        "torch": {"p50_ms": round(percentile(torch_lat, 50), 1), "p95_ms": round(percentile(torch_lat, 95), 1), "mean_ms": round(statistics.fmean(torch_lat), 1)},
+        "onnx_int8": {"p50_ms": round(percentile(onnx_lat, 50), 1), "p95_ms": round(percentile(onnx_lat, 95), 1), "mean_ms": round(statistics.fmean(onnx_lat), 1)},
+        f"top{args.top_n}_overlap": round(statistics.fmean(overlaps), 4),
+        "top1_agreement": round(top1 / len(requests), 4),
+    }
+    result["speedup"] = round(result["torch"]["mean_ms"] / result["onnx_int8"]["mean_ms"], 2) if result["onnx_int8"]["mean_ms"] else None
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+"""
+API 서버 기동 시간 벤치마크 (import 시간 / 첫 요청까지의 시간 / 챗봇 준비 시간)
+
+사용 시나리오:
+- backend.main import에 무거운 모듈이 다시 끌려 들어오지 않았는지 확인
+- uvicorn 프로세스 시작 → 첫 HTTP 응답 → 첫 특허 검색 응답 → /ready 200(API) → /ready/chat 200(챗봇 워밍업 완료)까지 측정
+- 표준 라이브러리만 사용 (서버와 같은 가상환경에서 실행)
+
+실행 예 (저장소 루트에서):
+    python backend/scripts/bench_startup.py --runs 3 --out /tmp/startup.json
+    CHAT_INIT_MODE=on_demand python backend/scripts/bench_startup.py --skip-chat
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import List, Optional, Tuple
+
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure_import(module: str, runs: int) -> dict:
+    """새 인터프리터에서 모듈 import 시간 측정 (프로세스마다 새로 import)"""
+    samples: List[float] = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": os.getcwd()},
+        )
+        if out.returncode != 0:
+            return {"module": module, "error": out.stderr.strip().splitlines()[-1] if out.stderr else "import failed"}
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return {
+        "module": module,
+        "runs": runs,
+        "mean_s": round(statistics.fmean(samples), 3),
+        "min_s": round(min(samples), 3),
+        "max_s": round(max(samples), 3),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get(url: str, timeout: float = 5.0) -> Tuple[Optional[int], float]:
+    """(HTTP 상태 코드 또는 연결 실패 시 None, 소요 시간)"""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            resp.read()
+            return resp.status, time.perf_counter() - start
+    except urllib.error.HTTPError as e:
+        return e.code, time.perf_counter() - start
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return None, time.perf_counter() - start
+
+
+def _wait_until(predicate, deadline: float, interval_s: float = 0.05) -> Optional[float]:
+    while time.perf_counter() < deadline:
+        if predicate():
+            return time.perf_counter()
+        time.sleep(interval_s)
+    return None
+
+
+def measure_server(args) -> dict:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    proc_start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, "PYTHONPATH": os.getcwd()},
+        stdout=subprocess.DEVNULL if not args.verbose else None,
+        stderr=subprocess.DEVNULL if not args.verbose else None,
+    )
+    result: dict = {}
+    try:
+        deadline = proc_start + args.timeout
+        first_http = _wait_until(lambda: _get(f"{base}/", timeout=1.0)[0] == 200, deadline)
+        if first_http is None:
+            result["error"] = "서버가 제한 시간 안에 응답하지 않았습니다."
+            return result
+        result["first_response_s"] = round(first_http - proc_start, 3)
+
+        # 특허 검색은 ES 상태와 무관하게 "응답이 오는지"를 본다 (ES가 없으면 500)
+        status, elapsed = _get(f"{base}/api/patents/?tech_q=%EB%B0%B0%ED%84%B0%EB%A6%AC", timeout=30.0)
+        result["first_patents_search_s"] = round(time.perf_counter() - proc_start, 3)
+        result["first_patents_search_status"] = status
+        result["first_patents_search_ms"] = round(elapsed * 1000.0, 1)
+
+        status, _ = _get(f"{base}/api/chatbot/sessions", timeout=5.0)
+        result["chat_status_during_startup"] = status
+
+        # API readiness는 챗봇 준비와 무관하게 바로 200이어야 함
+        api_ready = _wait_until(lambda: _get(f"{base}/ready", timeout=5.0)[0] == 200, deadline, interval_s=0.2)
+        result["api_ready_s"] = round(api_ready - proc_start, 3) if api_ready else None
+
+        if not args.skip_chat:
+            chat_ready = _wait_until(lambda: _get(f"{base}/ready/chat", timeout=5.0)[0] == 200, deadline, interval_s=0.5)
+            result["chat_ready_s"] = round(chat_ready - proc_start, 3) if chat_ready else None
+        status, _ = _get(f"{base}/ready/chat")
+        result["chat_ready_status"] = status
+        return result
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3, help="import 측정 반복 수 / 서버 기동 반복 수")
+    parser.add_argument("--timeout", type=float, default=900.0, help="서버 기동 + 챗봇 준비 최대 대기 시간")
+    parser.add_argument("--skip-chat", action="store_true", help="/ready/chat 200까지 기다리지 않음")
+    parser.add_argument("--verbose", action="store_true", help="서버 로그 출력")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    report = {
+        "imports": [
+            measure_import("backend.main", args.runs),
+            measure_import("backend.services.search_service", args.runs),
+        ],
+        "server": [measure_server(args) for _ in range(args.runs)],
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,70 @@
+"""
+patents 인덱스에 fast vector highlighter(하이라이트 fvh 모드)용 term vector 서브필드 추가
+
+사용 시나리오:
+- abstract / claims에 .tv 서브필드(term_vector: with_positions_offsets)를 매핑에 추가하고
+  update_by_query로 기존 문서를 다시 색인해 채움 (이후 새로 색인되는 문서는 자동으로 채워짐)
+- 기존 필드의 term_vector 설정은 바꿀 수 없으므로 서브필드로 추가 → 검색 / 점수는 원 필드 그대로
+
+참고:
+- term vector는 위치 / 오프셋을 저장하므로 해당 필드의 인덱스 크기가 대략 1.5~2배로 커짐
+- update_by_query는 태스크로 실행됨 → GET _tasks/<task_id>로 진행 확인, 완료 전 fvh 모드는 일부 문서에서 하이라이트가 비어 있음
+- 서브필드 분석기는 원 필드와 같게 맞춤 (다르면 하이라이트 위치가 어긋남)
+
+실행 예 (저장소 루트에서):
+    PYTHONPATH=. python backend/scripts/put_patents_term_vectors.py --dry-run
+    PYTHONPATH=. python backend/scripts/put_patents_term_vectors.py --es-url http://localhost:9200
+"""
+import argparse
+import json
+
+from elasticsearch import Elasticsearch
+
+from backend.services.patent_highlight import LONG_FIELDS, TERM_VECTOR_SUFFIX
+
+
+def build_properties(mapping: dict, fields) -> dict:
+    """원 필드 정의(분석기 / 기존 서브필드 유지)에 .tv 서브필드를 더한 properties"""
+    properties = {}
+    for name in fields:
+        current = mapping.get(name)
+        if not current or current.get("type") != "text":
+            print(f"⚠️  {name}: text 필드가 아니어서 건너뜀 ({current})")
+            continue
+        sub = {"type": "text", "term_vector": "with_positions_offsets"}
+        for key in ("analyzer", "search_analyzer"):
+            if key in current:
+                sub[key] = current[key]
+        definition = {k: v for k, v in current.items() if k != "fields"}
+        definition["fields"] = {**current.get("fields", {}), TERM_VECTOR_SUFFIX.lstrip("."): sub}
+        properties[name] = definition
+    return properties
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--es-url", default="http://localhost:9200")
+    parser.add_argument("--index", default="patents")
+    parser.add_argument("--dry-run", action="store_true", help="추가할 매핑만 출력")
+    args = parser.parse_args()
+
+    es = Elasticsearch(args.es_url, verify_certs=False, request_timeout=60)
+    mapping = es.indices.get_mapping(index=args.index)[args.index]["mappings"].get("properties", {})
+    properties = build_properties(mapping, LONG_FIELDS)
+    print(json.dumps({"properties": properties}, ensure_ascii=False, indent=2))
+    if args.dry_run or not properties:
+        es.close()
+        return 0
+
+    es.indices.put_mapping(index=args.index, properties=properties)
+    print(f"✅ 매핑 추가 완료: {', '.join(f + TERM_VECTOR_SUFFIX for f in properties)}")
+
+    # 기존 문서를 그대로 다시 색인해 새 서브필드를 채움
+    task = es.update_by_query(index=args.index, conflicts="proceed", wait_for_completion=False)
+    print(f"🚀 기존 문서 재색인 시작 - 진행 확인: GET _tasks/{task['task']}")
+    es.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
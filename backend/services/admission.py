@@ -0,0 +1,207 @@
+import asyncio
+import heapq
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Optional
+
+from backend.services.metrics import (
+    ADMISSION_INFLIGHT,
+    ADMISSION_QUEUE_SECONDS,
+    ADMISSION_QUEUED,
+    ADMISSION_REJECTED,
+)
+
+
+#-----------------------------------
+#환경 변수
+CHAT_MAX_INFLIGHT = int(os.getenv("CHAT_MAX_INFLIGHT", "2"))            # 동시에 LLM 생성을 수행할 요청 수 (Ollama OLLAMA_NUM_PARALLEL과 맞춤)
+CHAT_MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", "16"))                 # 대기열 길이 상한 - 초과 시 즉시 429
+CHAT_QUEUE_TIMEOUT_S = float(os.getenv("CHAT_QUEUE_TIMEOUT_S", "120"))  # 대기열에서 기다리는 최대 시간 - 초과 시 503
+CHAT_SHORT_QUERY_CHARS = int(os.getenv("CHAT_SHORT_QUERY_CHARS", "40")) # 이보다 짧은 엔티티 조회 질문은 우선 처리
+
+# 낮을수록 먼저 처리
+PRIORITY_LOOKUP = 0      # 출원인/발명자/번호 등 짧은 메타데이터 조회
+PRIORITY_GENERATION = 1  # 일반 RAG 답변 생성
+PRIORITY_NAMES = {PRIORITY_LOOKUP: "lookup", PRIORITY_GENERATION: "generation"}
+
+
+class AdmissionRejected(Exception):
+    """대기열이 가득 찼거나(429) 대기 시간이 초과된(503) 요청"""
+
+    def __init__(self, status_code: int, retry_after_s: int, reason: str):
+        self.status_code = status_code
+        self.retry_after_s = retry_after_s
+        self.reason = reason
+        super().__init__(f"챗봇 요청이 많아 처리할 수 없습니다 ({reason}). {retry_after_s}초 후 다시 시도해 주세요.")
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    future: asyncio.Future = field(compare=False)
+
+
+@dataclass
+class AdmissionTicket:
+    priority: int
+    queue_ms: float
+    admitted_at: float
+
+    def as_dict(self) -> dict:
+        return {"priority": PRIORITY_NAMES.get(self.priority, str(self.priority)), "queue_ms": round(self.queue_ms, 1)}
+
+
+class AdmissionController:
+    """
+    LLM 생성 요청 입장 제어
+    - 동시 실행 수를 max_inflight로 제한하고 나머지는 우선순위 대기열에서 대기
+    - 대기열이 가득 차면 즉시 거절(429). 더 낮은 우선순위 대기자가 있으면 그 요청을 대신 내보냄
+    - 대기 시간이 queue_timeout_s를 넘으면 거절(503)
+    - Retry-After는 최근 처리 시간 이동 평균 × 앞선 대기자 수로 추정
+    """
+
+    def __init__(
+        self,
+        max_inflight: int = CHAT_MAX_INFLIGHT,
+        max_queue: int = CHAT_MAX_QUEUE,
+        queue_timeout_s: float = CHAT_QUEUE_TIMEOUT_S,
+    ):
+        self.max_inflight = max(1, max_inflight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_s = queue_timeout_s
+        self._inflight = 0
+        self._queued = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = 0
+        self._service_time_ema_s = 10.0
+
+        # 통계
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.evicted = 0
+
+    # --------------------------------------
+    # 공개 API
+    # --------------------------------------
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_GENERATION) -> AsyncIterator[AdmissionTicket]:
+        ticket = await self.acquire(priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    async def acquire(self, priority: int = PRIORITY_GENERATION) -> AdmissionTicket:
+        start = time.perf_counter()
+        if self._inflight < self.max_inflight and self._queued == 0:
+            self._inflight += 1
+            return self._admit(priority, start)
+
+        if self._queued >= self.max_queue:
+            victim = self._lowest_priority_waiter()
+            if victim is None or victim.priority <= priority:
+                self.rejected_full += 1
+                ADMISSION_REJECTED.inc(reason="queue_full")
+                raise AdmissionRejected(429, self.retry_after_s(), "queue_full")
+            # 낮은 우선순위 대기자를 내보내고 자리를 차지
+            self._queued -= 1
+            self.evicted += 1
+            ADMISSION_REJECTED.inc(reason="evicted")
+            victim.future.set_exception(AdmissionRejected(429, self.retry_after_s(), "evicted"))
+
+        future = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        heapq.heappush(self._waiters, _Waiter(priority, self._seq, future))
+        self._queued += 1
+        ADMISSION_QUEUED.set(self._queued)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            if not self._granted(future):
+                self._abandon(future)
+                self.rejected_timeout += 1
+                ADMISSION_REJECTED.inc(reason="queue_timeout")
+                raise AdmissionRejected(503, self.retry_after_s(), "queue_timeout")
+        except asyncio.CancelledError:
+            # 대기 중 클라이언트가 끊긴 경우: 이미 자리를 받았다면 반납, 아니면 대기열에서 제거
+            if self._granted(future):
+                self._inflight -= 1
+                self._grant_next()
+            else:
+                self._abandon(future)
+            raise
+        return self._admit(priority, start)
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        held_s = time.perf_counter() - ticket.admitted_at
+        self._service_time_ema_s = 0.8 * self._service_time_ema_s + 0.2 * held_s
+        self._inflight -= 1
+        self._grant_next()
+        ADMISSION_INFLIGHT.set(self._inflight)
+
+    def retry_after_s(self) -> int:
+        ahead = self._queued + 1
+        return max(1, math.ceil(ahead / self.max_inflight * self._service_time_ema_s))
+
+    def snapshot(self) -> dict:
+        return {
+            "inflight": self._inflight,
+            "queued": self._queued,
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "evicted": self.evicted,
+            "service_time_ema_s": round(self._service_time_ema_s, 2),
+        }
+
+    # --------------------------------------
+    # 내부 유틸
+    # --------------------------------------
+
+    def _admit(self, priority: int, start: float) -> AdmissionTicket:
+        now = time.perf_counter()
+        self.admitted += 1
+        ADMISSION_QUEUE_SECONDS.observe(now - start, priority=PRIORITY_NAMES.get(priority, str(priority)))
+        ADMISSION_INFLIGHT.set(self._inflight)
+        ADMISSION_QUEUED.set(self._queued)
+        return AdmissionTicket(priority=priority, queue_ms=(now - start) * 1000.0, admitted_at=now)
+
+    @staticmethod
+    def _granted(future: asyncio.Future) -> bool:
+        return future.done() and not future.cancelled() and future.exception() is None
+
+    def _abandon(self, future: asyncio.Future) -> None:
+        # 대기열 항목은 꺼낼 때 건너뜀 (지연 삭제)
+        if not future.done():
+            future.cancel()
+            self._queued -= 1
+            ADMISSION_QUEUED.set(self._queued)
+
+    def _grant_next(self) -> None:
+        while self._waiters and self._inflight < self.max_inflight:
+            waiter = heapq.heappop(self._waiters)
+            if waiter.future.done():
+                continue
+            self._inflight += 1
+            self._queued -= 1
+            waiter.future.set_result(True)
+
+    def _lowest_priority_waiter(self) -> Optional[_Waiter]:
+        live = [w for w in self._waiters if not w.future.done()]
+        if not live:
+            return None
+        return max(live, key=lambda w: (w.priority, w.seq))
+
+
+#-------------------------------
+#전역 인스턴스 (워커 프로세스당 1개)
+chat_admission = AdmissionController()
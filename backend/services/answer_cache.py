@@ -0,0 +1,251 @@
+import os
+import re
+import sys
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+
+#-----------------------------------
+#환경 변수
+ANSWER_CACHE_ENABLED = (os.getenv("ANSWER_CACHE_ENABLED") or "true").strip().lower() in ["1", "true", "yes", "y", "on"]
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+ANSWER_CACHE_MAX_BYTES = int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # 64MB
+ANSWER_CACHE_TTL_S = float(os.getenv("ANSWER_CACHE_TTL_S", "3600"))
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))  # 코사인 유사도 임계값
+ANSWER_CACHE_VERSION_CHECK_S = float(os.getenv("ANSWER_CACHE_VERSION_CHECK_S", "30"))  # 컬렉션 변경 확인 주기
+
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """정확 일치 키: 유니코드 정규화 + 소문자 + 구두점 제거 + 공백 축약"""
+    text = unicodedata.normalize("NFKC", query or "").lower()
+    text = _PUNCT_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    answer: str
+    sources: List[Any]
+    vector: Optional[np.ndarray]
+    created_at: float
+    size_bytes: int
+    hits: int = 0
+
+
+@dataclass
+class CacheStats:
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        hits = self.exact_hits + self.semantic_hits
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _estimate_size(answer: str, sources: List[Any], vector: Optional[np.ndarray]) -> int:
+    size = sys.getsizeof(answer) + sys.getsizeof(sources)
+    for src in sources:
+        size += sys.getsizeof(src)
+        if isinstance(src, (tuple, list)):
+            size += sum(sys.getsizeof(v) for v in src)
+    if vector is not None:
+        size += vector.nbytes
+    return size
+
+
+class SemanticAnswerCache:
+    """
+    챗봇 답변 캐시
+    - 1차: 정규화된 질문 문자열 정확 일치
+    - 2차: 질문 임베딩 코사인 유사도 >= similarity_threshold
+    - LRU + TTL 만료, 항목 수/메모리 상한
+    - Qdrant 컬렉션 버전이 바뀌면 전체 무효화
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        max_bytes: int = ANSWER_CACHE_MAX_BYTES,
+        ttl_s: float = ANSWER_CACHE_TTL_S,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.similarity_threshold = similarity_threshold
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._collection_version: Optional[Hashable] = None
+        self._version_checked_at = 0.0
+        self.stats = CacheStats()
+
+        # 유사도 검색용 행렬 (항목 추가/삭제 시 다시 만듦)
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+
+    # --------------------------------------
+    # 조회 / 저장
+    # --------------------------------------
+
+    def get(
+        self,
+        query: str,
+        vector: Optional[np.ndarray] = None,
+        record_miss: bool = True,
+    ) -> Tuple[Optional[CacheEntry], Optional[str], float]:
+        """(항목, 히트 종류 'exact'|'semantic'|None, 유사도) 반환
+        record_miss=False: 임베딩을 구해 다시 조회할 예정인 1차(정확 일치) 조회용
+        """
+        self._expire()
+        key = normalize_query(query)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._touch(entry)
+            self.stats.exact_hits += 1
+            return entry, "exact", 1.0
+
+        if vector is not None and self._entries:
+            matched_key, similarity = self._nearest(vector)
+            if matched_key is not None and similarity >= self.similarity_threshold:
+                entry = self._entries[matched_key]
+                self._touch(entry)
+                self.stats.semantic_hits += 1
+                return entry, "semantic", similarity
+
+        if record_miss:
+            self.stats.misses += 1
+        return None, None, 0.0
+
+    def put(self, query: str, answer: str, sources: List[Any], vector: Optional[np.ndarray] = None) -> None:
+        key = normalize_query(query)
+        if not key:
+            return
+        unit = _unit_vector(vector) if vector is not None else None
+        size = _estimate_size(answer, sources, unit)
+        if size > self.max_bytes:
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._total_bytes -= old.size_bytes
+
+        self._entries[key] = CacheEntry(
+            key=key,
+            answer=answer,
+            sources=list(sources),
+            vector=unit,
+            created_at=time.monotonic(),
+            size_bytes=size,
+        )
+        self._total_bytes += size
+        self._matrix = None
+
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.stats.evictions += 1
+
+    # --------------------------------------
+    # 무효화
+    # --------------------------------------
+
+    def invalidate(self) -> None:
+        if self._entries:
+            self.stats.invalidations += 1
+        self._entries.clear()
+        self._total_bytes = 0
+        self._matrix = None
+        self._matrix_keys = []
+
+    def needs_version_check(self) -> bool:
+        return time.monotonic() - self._version_checked_at >= ANSWER_CACHE_VERSION_CHECK_S
+
+    def observe_collection_version(self, version: Hashable) -> None:
+        """컬렉션 버전(포인트 수 등)이 이전과 다르면 캐시 전체를 비운다."""
+        self._version_checked_at = time.monotonic()
+        if self._collection_version is not None and version != self._collection_version:
+            print(f"♻️  [답변 캐시] 컬렉션 변경 감지 ({self._collection_version} → {version}) → 캐시 무효화")
+            self.invalidate()
+        self._collection_version = version
+
+    # --------------------------------------
+    # 상태 조회
+    # --------------------------------------
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats.as_dict(),
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+        }
+
+    # --------------------------------------
+    # 내부 유틸
+    # --------------------------------------
+
+    def _touch(self, entry: CacheEntry) -> None:
+        entry.hits += 1
+        self._entries.move_to_end(entry.key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size_bytes
+            self._matrix = None
+
+    def _expire(self) -> None:
+        if self.ttl_s <= 0:
+            return
+        deadline = time.monotonic() - self.ttl_s
+        expired = [k for k, e in self._entries.items() if e.created_at < deadline]
+        for k in expired:
+            self._remove(k)
+            self.stats.expirations += 1
+
+    def _nearest(self, vector: np.ndarray) -> Tuple[Optional[str], float]:
+        if self._matrix is None:
+            keys = [k for k, e in self._entries.items() if e.vector is not None]
+            if not keys:
+                return None, 0.0
+            self._matrix_keys = keys
+            self._matrix = np.stack([self._entries[k].vector for k in keys])
+        if self._matrix.size == 0:
+            return None, 0.0
+        scores = self._matrix @ _unit_vector(vector)
+        best = int(np.argmax(scores))
+        return self._matrix_keys[best], float(scores[best])
+
+
+def _unit_vector(vector) -> np.ndarray:
+    arr = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(arr))
+    return arr / norm if norm > 0 else arr
+
+
+#-------------------------------
+#전역 캐시 인스턴스
+answer_cache = SemanticAnswerCache()
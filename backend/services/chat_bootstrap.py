@@ -0,0 +1,165 @@
+"""
+챗봇(RAG) 서브시스템 지연/백그라운드 초기화
+
+- backend.main은 LlamaIndex / Ollama / Qdrant / sentence-transformers를 import하지 않음
+  → 특허 검색(/api/patents)은 프로세스 시작 직후부터 응답
+- 챗봇 모듈 import는 스레드에서, initialize_llamaindex + 워밍업은 백그라운드 태스크에서 실행
+- 준비 전 챗봇 요청은 get_engine()에서 ChatNotReady → 라우터가 503 "warming_up"으로 변환
+"""
+import asyncio
+import importlib
+import os
+import time
+from typing import Optional
+
+from backend.services import metrics
+
+
+#-----------------------------------
+#환경 변수
+# background: 서버 시작 직후 백그라운드에서 초기화 / on_demand: 첫 챗봇 요청이 들어올 때 초기화 시작
+CHAT_INIT_MODE = (os.getenv("CHAT_INIT_MODE") or "background").strip().lower()
+CHAT_INIT_RETRY_AFTER_S = int(os.getenv("CHAT_INIT_RETRY_AFTER_S", "10"))  # 준비 전 응답의 Retry-After
+
+
+class ChatNotReady(Exception):
+    """챗봇 파이프라인이 아직 준비되지 않음 (초기화 중 / 실패)"""
+
+    def __init__(self, status: str, retry_after_s: int = CHAT_INIT_RETRY_AFTER_S):
+        self.status = status
+        self.retry_after_s = retry_after_s
+        message = "챗봇을 준비하고 있습니다. 잠시 후 다시 시도해 주세요." if status != "failed" \
+            else "챗봇 초기화에 실패했습니다. 서버 로그를 확인해 주세요."
+        super().__init__(message)
+
+
+class ChatBootstrap:
+    def __init__(self):
+        self.status = "cold"          # cold → importing → initializing → warming → ready | failed
+        self.error: Optional[str] = None
+        self.timings: dict = {}
+        self._task: Optional[asyncio.Task] = None
+        self._keepalive_task: Optional[asyncio.Task] = None
+        self._embed_save_task: Optional[asyncio.Task] = None
+        self._engine = None
+        self._search_service = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    # --------------------------------------
+    # 시작 / 조회
+    # --------------------------------------
+
+    def start(self) -> None:
+        """초기화를 백그라운드로 시작 (이미 진행 중이거나 끝났으면 아무것도 하지 않음)"""
+        if self._task is None or (self._task.done() and self.status == "failed"):
+            self._task = asyncio.create_task(self._initialize())
+
+    def get_engine(self):
+        """준비된 ChatbotEngine 반환. 준비 전이면 (on_demand 모드에서는 초기화를 시작하고) ChatNotReady"""
+        if self._engine is not None:
+            return self._engine
+        if self.status in ("cold", "failed") and CHAT_INIT_MODE == "on_demand":
+            self.start()
+        raise ChatNotReady(self.status)
+
+    def snapshot(self) -> dict:
+        out = {"status": self.status, "mode": CHAT_INIT_MODE, "timings": self.timings}
+        if self.error:
+            out["error"] = self.error
+        if self._search_service is not None:
+            from backend.services import warmup
+
+            out["warmup"] = warmup.warmup_state.snapshot()
+        return out
+
+    # --------------------------------------
+    # 초기화 단계
+    # --------------------------------------
+
+    async def _initialize(self) -> None:
+        start = time.perf_counter()
+        self.error = None
+        try:
+            # 1. 무거운 모듈 import - 이벤트 루프를 막지 않도록 스레드에서 수행
+            self.status = "importing"
+            step = time.perf_counter()
+            search_service = await asyncio.to_thread(importlib.import_module, "backend.services.search_service")
+            chatbot_engine = await asyncio.to_thread(importlib.import_module, "backend.services.chatbot_engine")
+            warmup = await asyncio.to_thread(importlib.import_module, "backend.services.warmup")
+            self.timings["import_s"] = round(time.perf_counter() - step, 2)
+
+            # 2. 클라이언트 / 인덱스 / reranker 구성
+            self.status = "initializing"
+            step = time.perf_counter()
+            await search_service.initialize_llamaindex()
+            self._search_service = search_service
+            self.timings["initialize_s"] = round(time.perf_counter() - step, 2)
+
+            # 3. 첫 사용자 요청이 모델 로딩을 떠안지 않도록 워밍업 후 keep-alive 시작
+            self.status = "warming"
+            step = time.perf_counter()
+            await warmup.warm_up()
+            self._keepalive_task = asyncio.create_task(warmup.run_keepalive_loop())
+            # 임베딩 캐시 디스크 저장은 요청 경로가 아닌 백그라운드에서 (EMBED_CACHE_PATH 설정 시)
+            from backend.services.embedding_cache import embedding_cache
+
+            self._embed_save_task = asyncio.create_task(embedding_cache.run_save_loop())
+            self.timings["warmup_s"] = round(time.perf_counter() - step, 2)
+
+            self._engine = chatbot_engine.ChatbotEngine()
+            metrics.REGISTRY.on_collect(self._collect_metrics)
+            self.status = "ready"
+            self.timings["total_s"] = round(time.perf_counter() - start, 2)
+            print(f"✅ 챗봇 검색 서비스 준비 완료 ({self.timings})")
+        except Exception as e:
+            self.status = "failed"
+            self.error = repr(e)
+            print(f"챗봇 검색 서비스 초기화 실패:{e}")
+
+    def _collect_metrics(self) -> None:
+        """캐시/배처 통계는 조회 시점에 게이지로 옮김 (hot path에서는 아무것도 하지 않음)"""
+        from backend.services.answer_cache import answer_cache
+        from backend.services.embedding_cache import embedding_cache
+
+        for name, snapshot in (("answer", answer_cache.snapshot()), ("embedding", embedding_cache.snapshot())):
+            metrics.CACHE_HIT_RATIO.set(snapshot["hit_ratio"], cache=name)
+            metrics.CACHE_ENTRIES.set(snapshot["entries"], cache=name)
+        if self._search_service.reranker is not None:
+            metrics.RERANK_PENDING_PAIRS.set(self._search_service.reranker.snapshot()["pending_pairs"])
+
+    # --------------------------------------
+    # 종료
+    # --------------------------------------
+
+    async def shutdown(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+        if self._embed_save_task is not None:
+            self._embed_save_task.cancel()
+        search_service = self._search_service
+        if search_service is None:
+            return
+
+        #비동기 클라이언트 정리
+        if getattr(search_service, "client_qdrant_async", None):
+            await search_service.client_qdrant_async.close()
+        if getattr(search_service, "_entity_refresh_task", None):
+            search_service._entity_refresh_task.cancel()
+        if getattr(search_service, "reranker", None):
+            await search_service.reranker.close()
+        if getattr(search_service, "_rerank_executor", None):
+            search_service._rerank_executor.shutdown(wait=False, cancel_futures=True)
+        # 재시작한 워커가 따뜻한 캐시로 시작하도록 임베딩 캐시 저장 (EMBED_CACHE_PATH 설정 시)
+        from backend.services.embedding_cache import embedding_cache
+
+        embedding_cache.save()
+
+
+#-------------------------------
+#전역 인스턴스 (워커 프로세스당 1개)
+chat_bootstrap = ChatBootstrap()
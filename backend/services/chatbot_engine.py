@@ -1,12 +1,23 @@
-import os
 import time
 import uuid
 import logging
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+from datetime import datetime
 
-from motor.motor_asyncio import AsyncIOMotorClient
 from backend.services import search_service
+from backend.services.answer_cache import ANSWER_CACHE_ENABLED, answer_cache, normalize_query
+from backend.services.admission import (
+    CHAT_SHORT_QUERY_CHARS,
+    PRIORITY_GENERATION,
+    PRIORITY_LOOKUP,
+    chat_admission,
+)
+from backend.services.entity_index import entity_index
+from backend.services.session_store import make_title, make_turn, session_store
+from backend.services.single_flight import SingleFlight
+
+# 같은 질문이 동시에 들어오면 검색 + LLM 생성을 한 번만 수행하고 결과를 공유
+chat_single_flight = SingleFlight("chat")
 
 class ChatbotEngine:
     """특허 검색 챗봇 엔진 - 세션 관리 및 RAG 로직 연동"""
@@ -14,13 +25,8 @@ class ChatbotEngine:
     def __init__(self):
         self._initialized = False
         
-        # MongoDB 설정/클라이언트는 현재 비활성화 (대화 내역은 MongoDB에 저장하지 않음)
-        self.mongo_uri = None
-        self.db_name = None
-        self.chat_history_ttl_days = int(os.getenv("CHAT_HISTORY_TTL_DAYS", "30"))
-        self.client = None
-        self.db = None
-        self._indexes_ensured = False
+        # 대화 내역 저장소 (CHAT_SESSION_STORE=memory|mongo)
+        self.sessions = session_store
 
     # --------------------------------------
     # 답변 생성 로직 (RAG 서비스 호출)
@@ -31,8 +37,9 @@ class ChatbotEngine:
         query: str, 
         session_id: Optional[str] = None,
         top_k: int = 30,
+        history_query: Optional[str] = None,
     ) -> dict:
-        """기본 RAG 답변 생성 및 메시지 저장"""
+        """기본 RAG 답변 생성 및 메시지 저장 (history_query: 대화 내역에 남길 질문, 기본은 query)"""
         # 1. 세션 ID가 없으면 새로 생성
         if not session_id:
             session_id = str(uuid.uuid4())
@@ -40,27 +47,141 @@ class ChatbotEngine:
         # 2. 성능 측정을 위한 시작 시간
         start_time = time.time()
         
-        # 3. RAG 답변 생성 (search_service의 비동기 함수 호출)
-        answer, sources = await search_service.run_llamaindex_query(query, top_k=top_k)
+        # 3~4. 답변 캐시 조회 → RAG 답변 생성 (동시에 들어온 같은 질문은 결과 공유)
+        shared, coalesced = await chat_single_flight.do(
+            (normalize_query(query), top_k),
+            lambda: self._compute_answer(query, top_k),
+        )
         
-        # 4. 처리 시간 계산
+        # 5. 처리 시간 계산
         query_time = time.time() - start_time
         
-        # 5. MongoDB 대화 내역 저장 비활성화
-        # await self.save_message(session_id, query, answer)
+        # 6. 대화 내역 저장 (메모리 반영 + write-behind 대기열 추가만 하므로 응답 지연 없음)
+        await self.save_message(session_id, history_query or query, shared["answer"])
         
-        # 6. 최종 응답 객체 반환 (출처 정보 포함)
+        # 7. 최종 응답 객체 반환 (출처 정보 포함)
         return {
-            "answer": answer,
+            "answer": shared["answer"],
             "session_id": session_id,
             "timestamp": datetime.utcnow().isoformat(),
             "metadata": {
                 "query_time": round(query_time, 2),
                 "top_k": top_k,
-                "sources": sources,
+                "sources": shared["sources"],
+                "timings": shared["timings"],
+                "cache": shared["cache"],
+                "admission": shared["admission"],
+                "coalesced": coalesced,
             },
         }
 
+    async def _compute_answer(self, query: str, top_k: int) -> dict:
+        """세션과 무관한 답변 계산 (single-flight로 공유되므로 반환값을 수정하지 말 것)"""
+        # 답변 캐시 조회 (정확 일치 → 임베딩 유사도)
+        cache_info, query_vector = await self._lookup_answer_cache(query)
+        timings: dict = {}
+        admission_info = None
+        if cache_info.get("hit"):
+            answer, sources = cache_info.pop("answer"), cache_info.pop("sources")
+        else:
+            # RAG 답변 생성 (LLM 동시 실행 수 제한 - 대기열이 가득 차면 AdmissionRejected)
+            async with chat_admission.slot(self._admission_priority(query)) as ticket:
+                admission_info = ticket.as_dict()
+                answer, sources = await search_service.run_llamaindex_query(query, top_k=top_k, timings=timings)
+            if ANSWER_CACHE_ENABLED:
+                answer_cache.put(query, answer, sources, vector=query_vector)
+        return {
+            "answer": answer,
+            "sources": sources,
+            "timings": timings,
+            "cache": cache_info,
+            "admission": admission_info,
+        }
+
+    @staticmethod
+    def _admission_priority(query: str) -> int:
+        """알려진 출원인/발명자/번호를 묻는 짧은 질문은 긴 답변 생성보다 먼저 처리"""
+        if len(query.strip()) <= CHAT_SHORT_QUERY_CHARS and entity_index.ready and entity_index.extract(query):
+            return PRIORITY_LOOKUP
+        return PRIORITY_GENERATION
+
+    async def _lookup_answer_cache(self, query: str) -> tuple:
+        """답변 캐시 조회. (캐시 메타데이터, 질문 임베딩) 반환 - 임베딩은 미스 시 저장에 재사용"""
+        if not ANSWER_CACHE_ENABLED:
+            return {"enabled": False}, None
+
+        # 컬렉션이 재색인되면 이전 답변은 더 이상 유효하지 않으므로 주기적으로 버전 확인
+        if answer_cache.needs_version_check():
+            try:
+                answer_cache.observe_collection_version(await search_service.get_collection_version())
+            except Exception as e:
+                logging.getLogger(__name__).warning("answer_cache_version_check_failed err=%r", e)
+
+        entry, hit_type, similarity = answer_cache.get(query, record_miss=False)
+        query_vector = None
+        if entry is None:
+            try:
+                query_vector = await search_service.embed_query(query)
+            except Exception as e:
+                logging.getLogger(__name__).warning("answer_cache_embed_failed err=%r", e)
+            entry, hit_type, similarity = answer_cache.get(query, vector=query_vector)
+
+        info = {
+            "enabled": True,
+            "hit": hit_type,
+            "similarity": round(similarity, 4) if entry is not None else None,
+            "stats": answer_cache.snapshot(),
+        }
+        if entry is not None:
+            info["answer"] = entry.answer
+            info["sources"] = entry.sources
+        return info, query_vector
+
+    async def answer_stream(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        스트리밍 RAG 답변 생성 - 입장 → 출처 → 토큰 → 메타데이터 순으로 이벤트를 내보냄
+        (첫 이벤트 전에 AdmissionRejected가 발생할 수 있으므로 호출 측은 첫 이벤트를 응답 헤더 전에 받아야 함)
+        """
+        if not session_id:
+            session_id = str(uuid.uuid4())
+
+        async with chat_admission.slot(self._admission_priority(query)) as ticket:
+            yield {"event": "admitted", "data": {"session_id": session_id, **ticket.as_dict()}}
+            async for item in self._stream_events(query, session_id, ticket.as_dict()):
+                yield item
+
+    async def _stream_events(self, query: str, session_id: str, admission_info: dict) -> AsyncIterator[dict]:
+        answer_parts: List[str] = []
+        sources: list = []
+        async for event, payload in search_service.stream_llamaindex_query(query):
+            if event == "sources":
+                sources = payload
+                yield {"event": "sources", "data": {"session_id": session_id, "sources": sources}}
+            elif event == "token":
+                answer_parts.append(payload)
+                yield {"event": "token", "data": {"token": payload}}
+            elif event == "done":
+                answer = search_service.append_sources_to_answer("".join(answer_parts), sources)
+                await self.save_message(session_id, query, answer)
+                yield {
+                    "event": "done",
+                    "data": {
+                        "answer": answer,
+                        "session_id": session_id,
+                        "timestamp": datetime.utcnow().isoformat(),
+                        "metadata": {
+                            "query_time": round(payload["timings"]["total_ms"] / 1000.0, 2),
+                            "timings": payload["timings"],
+                            "sources": sources,
+                            "admission": admission_info,
+                        },
+                    },
+                }
+
     async def answer_with_context(
         self,
         query: str,
@@ -68,11 +189,8 @@ class ChatbotEngine:
         top_k: int = 30
     ) -> dict:
         """이전 대화 내역을 참고하여 답변 생성 (대화 맥락 유지)"""
-        # 1. 이전 대화 내역 조회 (MongoDB 비활성화로 현재 미사용)
-        history = []
-        
-        # 2. 최근 3개 문답(최대 6개 메시지)만 컨텍스트로 사용
-        recent_messages = history[-6:] if len(history) > 6 else history
+        # 1~2. 최근 3개 문답(최대 6개 메시지)만 컨텍스트로 사용 (최근 대화는 메모리에서 바로 조회)
+        recent_messages = await self.sessions.get_messages(session_id, limit=6)
         
         context = ""
         for msg in recent_messages:
@@ -87,120 +205,45 @@ class ChatbotEngine:
 위 대화 내용을 바탕으로 자연스럽게 답변해줘."""
         
         # 4. 기존 answer 메서드 재사용
-        return await self.answer(enhanced_query, session_id, top_k)
+        return await self.answer(enhanced_query, session_id, top_k, history_query=query)
 
     # --------------------------------------
-    # 세션 및 대화 내역 관리 (MongoDB)
+    # 세션 및 대화 내역 관리 (session_store)
     # --------------------------------------
     
     async def save_message(self, session_id: str, user_query: str, ai_answer: str) -> None:
-        """대화 내용을 MongoDB에 업데이트 (Upsert)"""
-        collection = self.db["chat_history"]
-        now_dt = datetime.utcnow()
-        
-        # 세션 제목: 첫 질문이 너무 길면 자름
-        title = (user_query[:25] + "...") if len(user_query) > 25 else user_query
-        
-        await collection.update_one(
-            {"session_id": session_id},
-            {
-                "$setOnInsert": {
-                    "session_id": session_id,
-                    "created_at": now_dt,
-                    "title": title,
-                },
-                "$push": {
-                    "messages": {
-                        "$each": [
-                        {"role": "user", "content": user_query, "timestamp": time.time()},
-                        {"role": "assistant", "content": ai_answer, "timestamp": time.time()},
-                        ]
-                    }
-                },
-                "$set": {
-                    "updated_at": now_dt,
-                    "expires_at": now_dt + timedelta(days=self.chat_history_ttl_days),
-                },
-            },
-            upsert=True,
-        )
+        """대화 내용을 세션 저장소에 추가 (저장 실패가 답변 응답을 막지 않도록 로그만 남김)"""
+        try:
+            await self.sessions.append_messages(session_id, make_turn(user_query, ai_answer), make_title(user_query))
+        except Exception as e:
+            print(f"⚠️ 대화 내역 저장 실패: {e}")
 
     async def get_all_session(self, limit: int = 100) -> list:
-        """모든 채팅 세션 목록 조회"""
-        collection = self.db["chat_history"]
-        cursor = collection.find(
-            {}, 
-            {"_id": 0, "session_id": 1, "title": 1, "updated_at": 1}
-        ).sort("updated_at", -1).limit(limit)
-        
-        sessions = await cursor.to_list(length=limit)
-        
-        for session in sessions:
-            if "updated_at" in session and isinstance(session["updated_at"], datetime):
-                session["updated_at"] = int(session["updated_at"].timestamp() * 1000)
+        """최근 채팅 세션 목록 조회 (첫 페이지)"""
+        sessions, _ = await self.sessions.list_sessions(limit)
         return sessions
 
     async def get_chat_history(self, session_id: str) -> list:
         """특정 세션의 전체 메시지 내역 조회"""
-        collection = self.db["chat_history"]
-        doc = await collection.find_one({"session_id": session_id}, {"_id": 0, "messages": 1})
-        if not doc:
-            return []
-        messages = doc.get("messages", [])
-        return messages
+        return await self.sessions.get_messages(session_id)
 
     async def delete_session(self, session_id: str) -> bool:
         """세션 삭제"""
-        collection = self.db["chat_history"]
-        result = await collection.delete_one({"session_id": session_id})
-        return bool(result.deleted_count > 0)
+        return await self.sessions.delete_session(session_id)
 
     async def update_session_title(self, session_id: str, new_title: str) -> bool:
         """세션 제목 수동 변경"""
-        collection = self.db["chat_history"]
-        result = await collection.update_one(
-            {"session_id": session_id},
-            {"$set": {"title": new_title}}
-        )
-        return bool(result.modified_count > 0)
+        return await self.sessions.update_title(session_id, new_title)
 
     async def get_session_statistics(self, session_id: str) -> dict:
         """세션 데이터 통계 조회 (메시지 수 등)"""
-        collection = self.db["chat_history"]
-        doc = await collection.find_one({"session_id": session_id})
-        if not doc:
+        record = await self.sessions.get_session(session_id)
+        if record is None:
             return {}
         
-        messages = doc.get("messages", [])
-        created_at = doc.get("created_at")
-        updated_at = doc.get("updated_at")
-        duration = int((updated_at - created_at).total_seconds()) if created_at and updated_at else 0
-        
         return {
-            "message_count": len(messages),
-            "created_at": created_at.isoformat() if created_at else None,
-            "updated_at": updated_at.isoformat() if updated_at else None,
-            "duration_seconds": duration
+            "message_count": record.message_count,
+            "created_at": datetime.utcfromtimestamp(record.created_at).isoformat(),
+            "updated_at": datetime.utcfromtimestamp(record.updated_at).isoformat(),
+            "duration_seconds": int(record.updated_at - record.created_at),
         }
-
-    # --------------------------------------
-    # 인덱스 관리 (MongoDB 성능 최적화)
-    # --------------------------------------
-    
-    async def _ensure_indexes_once(self):
-        """런타임 중 인덱스 설정을 한 번만 수행하도록 보장"""
-        if not self._indexes_ensured:
-            await self._ensure_chat_history_indexes()
-            self._indexes_ensured = True
-
-    async def _ensure_chat_history_indexes(self) -> None:
-        """조회 및 TTL 삭제를 위한 인덱스 생성"""
-        try:
-            collection = self.db["chat_history "]
-            await collection.create_index([("session_id",1)], name = "chat_history_session_id_idx")
-            
-            await collection.create_index([("expires_at", 1)], expireAfterSeconds=0, name="chat_history_expires_at_ttl")
-            print("✅ MongoDB indexes verified.")
-        except Exception as e:
-            print(f"⚠️ MongoDB index warning (can be ignored if already exists): {e}")
-            
\ No newline at end of file
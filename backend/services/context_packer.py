@@ -0,0 +1,171 @@
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from llama_index.core.schema import NodeWithScore
+
+
+#-----------------------------------
+#환경 변수
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))          # 컨텍스트 전체 토큰 상한
+CONTEXT_CHUNK_MAX_TOKENS = int(os.getenv("CONTEXT_CHUNK_MAX_TOKENS", "400"))   # 청크 하나당 토큰 상한
+CONTEXT_CHUNK_MIN_TOKENS = int(os.getenv("CONTEXT_CHUNK_MIN_TOKENS", "32"))    # 남은 예산이 이보다 작으면 청크를 넣지 않음
+
+
+#--------------------------------------
+# 토크나이저 (tiktoken 사용, 없으면 글자 단위로 보수적으로 계산)
+#--------------------------------------
+class _Tokenizer:
+    def __init__(self):
+        self._encode: Callable[[str], List[int]]
+        self._decode: Callable[[List[int]], str]
+        try:
+            import tiktoken
+
+            enc = tiktoken.get_encoding("cl100k_base")
+            self._encode, self._decode = enc.encode, enc.decode
+        except Exception:
+            self._encode = lambda text: [ord(c) for c in text]
+            self._decode = lambda ids: "".join(chr(i) for i in ids)
+
+    def count(self, text: str) -> int:
+        return len(self._encode(text))
+
+    def truncate(self, text: str, max_tokens: int) -> Tuple[str, int, bool]:
+        """(잘린 텍스트, 토큰 수, 잘렸는지 여부)"""
+        ids = self._encode(text)
+        if len(ids) <= max_tokens:
+            return text, len(ids), False
+        return self._decode(ids[:max_tokens]).rstrip() + " …", max_tokens, True
+
+
+_tokenizer: Optional[_Tokenizer] = None
+
+
+def get_tokenizer() -> _Tokenizer:
+    global _tokenizer
+    if _tokenizer is None:
+        _tokenizer = _Tokenizer()
+    return _tokenizer
+
+
+#--------------------------------------
+# 컨텍스트 패킹
+#--------------------------------------
+@dataclass
+class PackedContext:
+    text: str
+    nodes: List[NodeWithScore]          # 실제로 컨텍스트에 들어간 노드 (출처 표시에 사용)
+    context_tokens: int = 0
+    patents: int = 0
+    duplicates_dropped: int = 0
+    chunks_truncated: int = 0
+    chunks_over_budget: int = 0
+
+    def stats(self) -> dict:
+        return {
+            "context_tokens": self.context_tokens,
+            "context_nodes": len(self.nodes),
+            "context_patents": self.patents,
+            "duplicates_dropped": self.duplicates_dropped,
+            "chunks_truncated": self.chunks_truncated,
+            "chunks_over_budget": self.chunks_over_budget,
+        }
+
+
+@dataclass
+class _PatentGroup:
+    header: str
+    chunks: List[str] = field(default_factory=list)
+
+
+def _patent_key(nws: NodeWithScore) -> str:
+    meta = nws.node.metadata or {}
+    return str(
+        meta.get("application_number")
+        or meta.get("patent_no")
+        or meta.get("title")
+        or nws.node.node_id
+    )
+
+
+def _meta_header(nws: NodeWithScore) -> str:
+    meta = nws.node.metadata or {}
+    return (
+        f"[META]\n"
+        f" - 공개번호: {meta.get('patent_no', '')}\n"
+        f" - 출원번호: {meta.get('application_number', '')}\n"
+        f" - 제목:  {meta.get('title', '')}\n"
+        f"[/META]"
+    )
+
+
+class ContextPacker:
+    """
+    rerank 결과 + 메타데이터 검색 결과를 LLM 한 번에 들어갈 컨텍스트로 묶는다.
+    - node id / (특허, 본문) 기준 중복 청크 제거
+    - [META] 헤더는 특허당 한 번만 출력하고 같은 특허의 청크를 그 아래에 모음
+    - 청크당/전체 토큰 예산에 맞게 청크를 자르거나 제외 (입력 순서 = 우선순위)
+    """
+
+    def __init__(
+        self,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        chunk_max_tokens: int = CONTEXT_CHUNK_MAX_TOKENS,
+        chunk_min_tokens: int = CONTEXT_CHUNK_MIN_TOKENS,
+        tokenizer: Optional[_Tokenizer] = None,
+    ):
+        self.token_budget = token_budget
+        self.chunk_max_tokens = chunk_max_tokens
+        self.chunk_min_tokens = chunk_min_tokens
+        self.tokenizer = tokenizer or get_tokenizer()
+
+    def pack(self, nodes: List[NodeWithScore]) -> PackedContext:
+        groups: "OrderedDict[str, _PatentGroup]" = OrderedDict()
+        included: List[NodeWithScore] = []
+        seen_ids: set = set()
+        seen_texts: set = set()
+        packed = PackedContext(text="", nodes=included)
+        remaining = self.token_budget
+
+        for nws in nodes:
+            node = nws.node
+            text = (node.get_content() or "").strip()
+            pkey = _patent_key(nws)
+            text_key = (pkey, text)
+            if not text or node.node_id in seen_ids or text_key in seen_texts:
+                packed.duplicates_dropped += 1
+                continue
+            seen_ids.add(node.node_id)
+            seen_texts.add(text_key)
+
+            header_tokens = 0
+            header = None
+            if pkey not in groups:
+                header = _meta_header(nws)
+                header_tokens = self.tokenizer.count(header)
+
+            allowance = min(self.chunk_max_tokens, remaining - header_tokens)
+            if allowance < self.chunk_min_tokens:
+                packed.chunks_over_budget += 1
+                continue
+
+            chunk, chunk_tokens, truncated = self.tokenizer.truncate(text, allowance)
+            if truncated:
+                packed.chunks_truncated += 1
+            if header is not None:
+                groups[pkey] = _PatentGroup(header=header)
+            groups[pkey].chunks.append(chunk)
+            included.append(nws)
+            remaining -= header_tokens + chunk_tokens
+
+        blocks = [g.header + "\n\n" + "\n\n".join(g.chunks) for g in groups.values()]
+        packed.text = "\n\n---\n\n".join(blocks)
+        packed.context_tokens = self.token_budget - remaining
+        packed.patents = len(groups)
+        return packed
+
+
+def count_tokens(text: str) -> int:
+    return get_tokenizer().count(text)
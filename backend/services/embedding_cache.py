@@ -0,0 +1,231 @@
+import asyncio
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+
+#-----------------------------------
+#환경 변수
+EMBED_CACHE_ENABLED = (os.getenv("EMBED_CACHE_ENABLED") or "true").strip().lower() in ["1", "true", "yes", "y", "on"]
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "20000"))
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH")  # 설정 시 재시작 후에도 캐시 유지 (.npz)
+EMBED_CACHE_SAVE_S = float(os.getenv("EMBED_CACHE_SAVE_S", "300"))  # 변경분이 있을 때 디스크 저장 주기 (백그라운드, 0이면 종료 시에만)
+
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """임베딩 키용 정규화: 유니코드 NFKC + 공백 축약 (대소문자는 모델 입력 의미가 달라질 수 있어 유지)"""
+    return _SPACE_RE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+class EmbeddingLRU:
+    """
+    (모델명, 종류, 정규화 텍스트) → float32 벡터 LRU
+    - 항목 수 상한 초과 시 가장 오래 안 쓴 항목부터 제거
+    - path 지정 시 .npz 파일로 저장/복원 (pickle 미사용)
+      put은 변경 표시만 하고, 저장은 run_save_loop(스레드) / 종료 시 save()에서 → 요청 / 적재 경로는 디스크 쓰기를 기다리지 않음
+    """
+
+    def __init__(self, max_entries: int = EMBED_CACHE_MAX_ENTRIES, path: Optional[str] = EMBED_CACHE_PATH):
+        self.max_entries = max_entries
+        self.path = path
+        self._data: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model_name: str, kind: str, text: str) -> str:
+        return f"{model_name}\x1f{kind}\x1f{normalize_text(text)}"
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vec = self._data.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        return vec.tolist()
+
+    def put(self, key: str, embedding: List[float]) -> None:
+        vec = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._data[key] = vec
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            self._dirty += 1
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty > 0
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    # --------------------------------------
+    # 디스크 저장 / 복원
+    # --------------------------------------
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            keys = list(self._data.keys())
+            vectors = list(self._data.values())
+            self._dirty = 0
+        if not keys:
+            return
+        # 모델마다 차원이 다를 수 있으므로 평탄화한 데이터 + 오프셋으로 저장
+        lengths = np.array([v.shape[0] for v in vectors], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        data = np.concatenate(vectors).astype(np.float32)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                np.savez(f, keys=np.array(keys), offsets=offsets, data=data)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ 임베딩 캐시 저장 실패: {self.path} ({e})")
+
+    async def run_save_loop(self, interval_s: float = EMBED_CACHE_SAVE_S) -> None:
+        """변경분이 있으면 주기적으로 저장 - np.savez는 전체 캐시를 쓰므로 이벤트 루프 밖(스레드)에서"""
+        if not self.path or interval_s <= 0:
+            return
+        while True:
+            await asyncio.sleep(interval_s)
+            if self.dirty:
+                await asyncio.to_thread(self.save)
+
+    def load(self) -> int:
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with np.load(self.path, allow_pickle=False) as f:
+                keys, offsets, data = f["keys"], f["offsets"], f["data"]
+        except Exception as e:
+            print(f"⚠️ 임베딩 캐시 로드 실패: {self.path} ({e})")
+            return 0
+        with self._lock:
+            # 파일에는 오래된 것 → 최근 순으로 저장되어 있으므로 순서대로 넣으면 LRU 순서 유지
+            for i, key in enumerate(keys.tolist()):
+                self._data[key] = data[offsets[i]:offsets[i + 1]].copy()
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            return len(self._data)
+
+
+class CachedEmbedding(BaseEmbedding):
+    """OllamaEmbedding/OpenAIEmbedding 등 임의의 임베딩 모델 앞에 두는 메모이징 래퍼"""
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingLRU = PrivateAttr()
+
+    def __init__(self, inner: BaseEmbedding, cache: EmbeddingLRU, **kwargs: Any):
+        super().__init__(
+            model_name=inner.model_name,
+            embed_batch_size=inner.embed_batch_size,
+            **kwargs,
+        )
+        self._inner = inner
+        self._cache = cache
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def inner(self) -> BaseEmbedding:
+        return self._inner
+
+    @property
+    def cache(self) -> EmbeddingLRU:
+        return self._cache
+
+    def _key(self, kind: str, text: str) -> str:
+        return EmbeddingLRU.make_key(self.model_name, kind, text)
+
+    # --- 질문 임베딩 ---
+    def _get_query_embedding(self, query: str) -> List[float]:
+        key = self._key("query", query)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        embedding = self._inner.get_query_embedding(query)
+        self._cache.put(key, embedding)
+        return embedding
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        key = self._key("query", query)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        embedding = await self._inner.aget_query_embedding(query)
+        self._cache.put(key, embedding)
+        return embedding
+
+    # --- 문서 임베딩 ---
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    def _split_cached(self, texts: List[str]) -> Tuple[List[Optional[List[float]]], List[int]]:
+        results: List[Optional[List[float]]] = [self._cache.get(self._key("text", t)) for t in texts]
+        missing = [i for i, r in enumerate(results) if r is None]
+        return results, missing
+
+    def _fill(self, texts: List[str], results: list, missing: List[int], embeddings: List[List[float]]) -> List[List[float]]:
+        for i, embedding in zip(missing, embeddings):
+            results[i] = embedding
+            self._cache.put(self._key("text", texts[i]), embedding)
+        return results
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        results, missing = self._split_cached(texts)
+        if missing:
+            embeddings = self._inner.get_text_embedding_batch([texts[i] for i in missing])
+            self._fill(texts, results, missing, embeddings)
+        return results
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        results, missing = self._split_cached(texts)
+        if missing:
+            embeddings = await self._inner.aget_text_embedding_batch([texts[i] for i in missing])
+            self._fill(texts, results, missing, embeddings)
+        return results
+
+
+#-------------------------------
+#전역 캐시 인스턴스 (워커 프로세스당 1개)
+embedding_cache = EmbeddingLRU()
+
+
+def wrap_embed_model(model: BaseEmbedding) -> BaseEmbedding:
+    """EMBED_CACHE_ENABLED이면 캐시 래퍼를 씌워 반환 (디스크 캐시가 있으면 미리 로드)"""
+    if not EMBED_CACHE_ENABLED or isinstance(model, CachedEmbedding):
+        return model
+    loaded = embedding_cache.load()
+    if loaded:
+        print(f"▶ 임베딩 캐시 로드: {loaded}개 ({embedding_cache.path})")
+    return CachedEmbedding(inner=model, cache=embedding_cache)
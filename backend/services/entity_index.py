@@ -0,0 +1,362 @@
+import asyncio
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import FieldCondition, Filter, MatchValue, Range
+
+
+#-----------------------------------
+#환경 변수
+ENTITY_INDEX_ENABLED = (os.getenv("ENTITY_INDEX_ENABLED") or "true").strip().lower() in ["1", "true", "yes", "y", "on"]
+ENTITY_INDEX_REFRESH_S = float(os.getenv("ENTITY_INDEX_REFRESH_S", "300"))  # 컬렉션 변경 확인 주기
+ENTITY_MIN_LEN = int(os.getenv("ENTITY_MIN_LEN", "3"))                      # 이보다 짧은 이름 별칭은 등록하지 않음 ("이전", "전자" 같은 일반 단어 방지)
+ENTITY_MIN_ID_LEN = int(os.getenv("ENTITY_MIN_ID_LEN", "8"))                # 번호 별칭(숫자만) 최소 길이 - 짧은 숫자는 연도 / 수량과 겹침
+
+ENTITY_NAME_FIELDS = ("applicants", "inventors", "agents")
+ENTITY_ID_FIELDS = ("patent_no", "application_number")
+INGESTED_AT_FIELD = "ingested_at"   # 적재 시각 (epoch ms, loader가 기록 / integer 인덱스) - 증분 갱신 기준
+
+# 회사명 앞뒤에 붙는 법인 표기 - 질문에는 보통 빠져 있으므로 제거한 별칭도 함께 등록
+_CORP_AFFIX_RE = re.compile(r"(주식회사|유한회사|\(주\)|㈜|\(유\))")
+_SPACE_RE = re.compile(r"\s+")
+
+# 엔티티 바로 뒤에 붙어도 단어 경계로 보는 조사 ("삼성전자의", "홍길동이 발명한")
+_JOSA = ("에서는", "에게서", "으로는", "이라는", "에서", "에게", "으로", "라는", "과의", "와의",
+         "의", "이", "가", "은", "는", "을", "를", "에", "와", "과", "도", "로", "만")
+
+
+def _normalize(text: str) -> str:
+    return _SPACE_RE.sub(" ", (text or "").lower()).strip()
+
+
+def _aliases(field_name: str, value: str) -> Set[str]:
+    """엔티티 값 하나로부터 질문에서 찾을 표기들을 만든다."""
+    base = _normalize(value)
+    out = {base}
+    if field_name in ENTITY_ID_FIELDS:
+        digits = re.sub(r"\D", "", base)
+        if digits:
+            out.add(digits)
+        return {a for a in out if len(re.sub(r"\D", "", a)) >= ENTITY_MIN_ID_LEN}
+    stripped = _normalize(_CORP_AFFIX_RE.sub(" ", base))
+    if stripped:
+        out.add(stripped)
+    out.add(base.replace(" ", ""))
+    return {a for a in out if len(a) >= ENTITY_MIN_LEN}
+
+
+def _is_word_char(ch: str) -> bool:
+    # 한글 음절 / 자모, 영문, 숫자 (str.isalnum은 한글도 포함)
+    return ch.isalnum()
+
+
+def _on_word_boundary(text: str, start: int, end: int) -> bool:
+    """매칭 앞뒤가 한글 / 영숫자가 아닐 때만 인정 (뒤에 조사 하나가 붙은 경우는 허용) - 단어 안쪽 부분 일치 방지"""
+    if start > 0 and _is_word_char(text[start - 1]):
+        return False
+    if end >= len(text) or not _is_word_char(text[end]):
+        return True
+    for josa in _JOSA:
+        if text.startswith(josa, end):
+            after = end + len(josa)
+            if after >= len(text) or not _is_word_char(text[after]):
+                return True
+    return False
+
+
+#--------------------------------------
+# Aho-Corasick 오토마톤
+#--------------------------------------
+class AhoCorasick:
+    """여러 패턴을 질문 한 번 훑는 것으로 모두 찾는 오토마톤 (최장-최좌측 비중첩 매칭)"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]  # 상태에서 끝나는 패턴 길이들
+        self.patterns = 0
+        for p in patterns:
+            self._add(p)
+        self._build()
+
+    def _add(self, pattern: str) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        if len(pattern) not in self._out[state]:
+            self._out[state] = self._out[state] + (len(pattern),)
+            self.patterns += 1
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str, accept: Optional[Callable[[str, int, int], bool]] = None) -> List[Tuple[int, int]]:
+        """(start, end) 목록 - accept를 통과한 매칭 중 겹치면 더 왼쪽, 같은 위치면 더 긴 매칭을 남김"""
+        found: List[Tuple[int, int]] = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length in self._out[state]:
+                if accept is None or accept(text, i + 1 - length, i + 1):
+                    found.append((i + 1 - length, i + 1))
+        found.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        selected: List[Tuple[int, int]] = []
+        last_end = -1
+        for start, end in found:
+            if start >= last_end:
+                selected.append((start, end))
+                last_end = end
+        return selected
+
+
+#--------------------------------------
+# 엔티티 사전
+#--------------------------------------
+@dataclass(frozen=True)
+class EntityMatch:
+    field: str       # applicants / inventors / agents / patent_no / application_number
+    value: str       # payload에 저장된 원래 값 (Qdrant MatchValue에 그대로 사용)
+    surface: str     # 질문에서 찾은 표기
+
+
+class EntityIndex:
+    """
+    doc_meta payload의 출원인/발명자/대리인/공개번호/출원번호 사전
+    - 시작 시 Qdrant에서 한 번 적재, 이후에는 ingested_at이 마지막 적재 시각 이후인 포인트만 읽어 반영
+      (삭제는 doc_meta 포인트 수가 맞지 않을 때만 id 목록을 훑어 확인)
+    - 오토마톤은 별도 스레드에서 새로 만들고 참조 한 번 교체 → 재구성 중에도 이벤트 루프는 막히지 않음
+    - 질문 한 번 훑기로 알려진 엔티티를 찾아 필드별 정확 일치 필터로 변환 (단어 경계에 걸친 매칭만, 단어 안쪽 부분 일치는 제외)
+    """
+
+    def __init__(self):
+        # 별칭 → {(필드, 원래 값): 참조 수}
+        self._aliases: Dict[str, Dict[Tuple[str, str], int]] = {}
+        # 포인트 id → 그 포인트가 등록한 (필드, 원래 값) 목록
+        self._point_entities: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+        self._automaton: Optional[AhoCorasick] = None
+        self._watermark: Optional[int] = None   # 반영한 포인트 중 가장 큰 ingested_at
+        self._refresh_lock = asyncio.Lock()
+        self.loaded_at: Optional[float] = None
+        self.last_build_ms = 0.0
+
+    # --------------------------------------
+    # 조회
+    # --------------------------------------
+
+    @property
+    def ready(self) -> bool:
+        return self._automaton is not None
+
+    @property
+    def watermark(self) -> Optional[int]:
+        """반영한 포인트 중 가장 큰 ingested_at"""
+        return self._watermark
+
+    def extract(self, query: str) -> List[EntityMatch]:
+        if self._automaton is None:
+            return []
+        text = _normalize(query)
+        matches: List[EntityMatch] = []
+        seen: Set[Tuple[str, str]] = set()
+        for start, end in self._automaton.find(text, accept=_on_word_boundary):
+            surface = text[start:end]
+            for field_name, value in sorted(self._aliases.get(surface, {})):
+                if (field_name, value) in seen:
+                    continue
+                seen.add((field_name, value))
+                matches.append(EntityMatch(field=field_name, value=value, surface=surface))
+        return matches
+
+    def snapshot(self) -> dict:
+        return {
+            "points": len(self._point_entities),
+            "aliases": len(self._aliases),
+            "patterns": self._automaton.patterns if self._automaton else 0,
+            "build_ms": round(self.last_build_ms, 1),
+        }
+
+    # --------------------------------------
+    # 갱신
+    # --------------------------------------
+
+    async def apply(self, points: Dict[str, dict], removed: Iterable[str] = (), full: bool = True) -> Tuple[int, int]:
+        """
+        doc_meta 포인트({id: payload})를 이전 상태와의 차이만 반영한다.
+        - full=True: points가 전체 목록 (없는 포인트는 삭제로 처리)
+        - full=False: points는 추가/변경분, removed는 삭제된 포인트 id
+        반환: (추가/변경된 포인트 수, 삭제된 포인트 수)
+        """
+        gone = set(removed)
+        if full:
+            gone.update(pid for pid in self._point_entities if pid not in points)
+        removed_count = 0
+        for pid in gone:
+            if pid in self._point_entities:
+                self._unregister(pid)
+                removed_count += 1
+        changed = 0
+        for pid, payload in points.items():
+            entities = self._entities_of(payload)
+            if self._point_entities.get(pid) == entities:
+                continue
+            if pid in self._point_entities:
+                self._unregister(pid)
+            self._register(pid, entities)
+            changed += 1
+        if changed or removed_count or self._automaton is None:
+            # 별칭 목록만 루프에서 복사하고, 오토마톤 구성은 스레드에서 (완성된 뒤 한 번에 교체)
+            patterns = list(self._aliases.keys())
+            start = time.perf_counter()
+            automaton = await asyncio.to_thread(AhoCorasick, patterns)
+            self._automaton = automaton
+            self.last_build_ms = (time.perf_counter() - start) * 1000.0
+        return changed, removed_count
+
+    @staticmethod
+    def _entities_of(payload: dict) -> Tuple[Tuple[str, str], ...]:
+        out = []
+        for f in ENTITY_NAME_FIELDS + ENTITY_ID_FIELDS:
+            values = payload.get(f) or []
+            if isinstance(values, str):
+                values = [values]
+            out.extend((f, str(v)) for v in values if v)
+        return tuple(sorted(set(out)))
+
+    def _register(self, pid: str, entities: Tuple[Tuple[str, str], ...]) -> None:
+        self._point_entities[pid] = entities
+        for ent in entities:
+            for alias in _aliases(*ent):
+                refs = self._aliases.setdefault(alias, {})
+                refs[ent] = refs.get(ent, 0) + 1
+
+    def _unregister(self, pid: str) -> None:
+        for ent in self._point_entities.pop(pid, ()):
+            for alias in _aliases(*ent):
+                refs = self._aliases.get(alias)
+                if not refs or ent not in refs:
+                    continue
+                refs[ent] -= 1
+                if refs[ent] <= 0:
+                    del refs[ent]
+                if not refs:
+                    del self._aliases[alias]
+
+    async def refresh_from_qdrant(self, aclient: AsyncQdrantClient, collection_name: str, force: bool = False) -> bool:
+        """워터마크 이후 적재된 doc_meta 포인트가 있거나 포인트 수가 달라졌을 때만 읽어 차이를 반영한다."""
+        async with self._refresh_lock:
+            # 처음 / 강제 갱신 / ingested_at 없는 데이터만 있는 경우는 전체, 그 외에는 워터마크 이후만
+            full = force or self._automaton is None or self._watermark is None
+            doc_meta = FieldCondition(key="section", match=MatchValue(value="doc_meta"))
+            must = [doc_meta]
+            total = None
+            if not full:
+                # 변경 확인은 count 두 번 (컬렉션 크기가 아니라 내용 기준 - 같은 id 재적재 / 이름 변경도 ingested_at으로 감지)
+                newer = (await aclient.count(
+                    collection_name=collection_name,
+                    count_filter=Filter(must=[doc_meta, FieldCondition(key=INGESTED_AT_FIELD, range=Range(gt=self._watermark))]),
+                    exact=True,
+                )).count
+                total = await self._count(aclient, collection_name, doc_meta)
+                if newer == 0 and total == len(self._point_entities):
+                    return False
+                # 같은 ms에 적재된 포인트를 놓치지 않도록 gte (이미 반영한 포인트는 apply에서 건너뜀)
+                must.append(FieldCondition(key=INGESTED_AT_FIELD, range=Range(gte=self._watermark)))
+
+            points: Dict[str, dict] = {}
+            watermark = self._watermark
+            offset = None
+            while True:
+                hits, offset = await aclient.scroll(
+                    collection_name=collection_name,
+                    scroll_filter=Filter(must=must),
+                    limit=1000,
+                    offset=offset,
+                    with_payload=list(ENTITY_NAME_FIELDS + ENTITY_ID_FIELDS) + [INGESTED_AT_FIELD],
+                    with_vectors=False,
+                )
+                for h in hits:
+                    payload = h.payload or {}
+                    points[str(h.id)] = payload
+                    ingested_at = payload.get(INGESTED_AT_FIELD)
+                    if isinstance(ingested_at, int) and (watermark is None or ingested_at > watermark):
+                        watermark = ingested_at
+                if offset is None:
+                    break
+
+            removed: Set[str] = set()
+            if not full:
+                removed = await self._find_removed(aclient, collection_name, doc_meta, points, total)
+
+            changed, removed_count = await self.apply(points, removed=removed, full=full)
+            self._watermark = watermark
+            self.loaded_at = time.time()
+            print(
+                f"▶ [엔티티 사전] {'전체' if full else '증분'} 포인트 {len(points)}개 읽음 (변경 {changed} / 삭제 {removed_count}) "
+                f"→ 별칭 {len(self._aliases)}개, 오토마톤 {self.last_build_ms:.1f}ms"
+            )
+            return True
+
+    @staticmethod
+    async def _count(aclient: AsyncQdrantClient, collection_name: str, doc_meta: FieldCondition) -> int:
+        return (await aclient.count(collection_name=collection_name, count_filter=Filter(must=[doc_meta]), exact=True)).count
+
+    async def _find_removed(self, aclient: AsyncQdrantClient, collection_name: str, doc_meta: FieldCondition, new_points: Dict[str, dict], count: int) -> Set[str]:
+        """doc_meta 포인트 수가 (기존 + 새 포인트)와 다를 때만 id 목록(payload 없이)을 훑어 삭제된 포인트를 찾는다."""
+        known = set(self._point_entities) | set(new_points)
+        if count == len(known):
+            return set()
+
+        live: Set[str] = set()
+        offset = None
+        while True:
+            hits, offset = await aclient.scroll(
+                collection_name=collection_name,
+                scroll_filter=Filter(must=[doc_meta]),
+                limit=5000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            live.update(str(h.id) for h in hits)
+            if offset is None:
+                break
+        return set(self._point_entities) - live
+
+    async def run_refresh_loop(self, aclient: AsyncQdrantClient, collection_name: str, interval_s: float = ENTITY_INDEX_REFRESH_S) -> None:
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                await self.refresh_from_qdrant(aclient, collection_name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ [엔티티 사전] 갱신 실패: {e}")
+
+
+#-------------------------------
+#전역 인스턴스
+entity_index = EntityIndex()
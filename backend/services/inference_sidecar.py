@@ -0,0 +1,395 @@
+"""
+모델 추론 사이드카 (uvicorn 워커 여러 개가 reranker / 임베딩 모델 하나를 공유)
+
+- 워커마다 cross-encoder를 올리면 메모리가 워커 수만큼 늘고, 워커 안에서는 GIL 때문에 rerank가 직렬화됨
+- 사이드카 프로세스가 모델을 한 번만 올리고 Unix 소켓으로 요청을 받음
+  → 여러 워커의 (질문, 청크) 쌍이 사이드카의 RerankBatcher에서 한 배치로 합쳐짐
+- INFERENCE_SIDECAR_SOCKET이 없거나 사이드카에 연결할 수 없으면 기존처럼 워커 안에서 모델을 올림
+
+실행 예 (저장소 루트에서, API 워커보다 먼저):
+    INFERENCE_SIDECAR_SOCKET=/tmp/linkai-inference.sock python -m backend.services.inference_sidecar
+    INFERENCE_SIDECAR_SOCKET=/tmp/linkai-inference.sock uvicorn backend.main:app --workers 4
+
+프레임 형식: [헤더 길이 u32][본문 길이 u32][JSON 헤더][본문]
+- 요청 본문은 비어 있고, 응답 본문은 float32 배열 (헤더의 shape 참고) - 점수/벡터를 JSON 숫자로 직렬화하지 않음
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import NodeWithScore
+
+from backend.services.rerank_batcher import RerankBatcher, rerank_nodes
+
+
+#-----------------------------------
+#환경 변수
+INFERENCE_SIDECAR_SOCKET = os.getenv("INFERENCE_SIDECAR_SOCKET")                         # 설정 시 사이드카 사용 (Unix 소켓 경로)
+INFERENCE_SIDECAR_POOL_SIZE = int(os.getenv("INFERENCE_SIDECAR_POOL_SIZE", "4"))          # 워커당 사이드카 연결 수 (= 동시 요청 수)
+INFERENCE_SIDECAR_TIMEOUT_S = float(os.getenv("INFERENCE_SIDECAR_TIMEOUT_S", "30"))       # 요청 1건 최대 대기 시간
+INFERENCE_SIDECAR_WORKERS = int(os.getenv("INFERENCE_SIDECAR_WORKERS", "2"))              # 사이드카의 추론 스레드 수 (= 동시 실행 배치 수)
+INFERENCE_SIDECAR_EMBED_MODEL = os.getenv("INFERENCE_SIDECAR_EMBED_MODEL")                # 설정 시 사이드카가 sentence-transformers 임베딩 모델도 올림
+# 워커의 질문 임베딩을 사이드카로 보낼지 (컬렉션을 같은 모델로 적재했을 때만 켤 것 - 차원/공간이 달라지면 검색이 깨짐)
+INFERENCE_SIDECAR_EMBED = (os.getenv("INFERENCE_SIDECAR_EMBED") or "false").strip().lower() in ["1", "true", "yes", "y", "on"]
+
+_FRAME_HEADER = struct.Struct(">II")
+
+
+class SidecarError(RuntimeError):
+    """사이드카가 오류 응답을 보냄"""
+
+
+#--------------------------------------
+# 프레임 인코딩 / 디코딩
+#--------------------------------------
+def encode_frame(header: dict, body: bytes = b"") -> bytes:
+    raw = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    return _FRAME_HEADER.pack(len(raw), len(body)) + raw + body
+
+
+def decode_array(header: dict, body: bytes) -> Optional[np.ndarray]:
+    if "shape" not in header:
+        return None
+    return np.frombuffer(body, dtype=np.float32).reshape(header["shape"])
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[dict, bytes]:
+    header_len, body_len = _FRAME_HEADER.unpack(await reader.readexactly(_FRAME_HEADER.size))
+    header = json.loads(await reader.readexactly(header_len))
+    body = await reader.readexactly(body_len) if body_len else b""
+    return header, body
+
+
+def _recv_exactly(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("사이드카 연결이 끊어졌습니다.")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+#--------------------------------------
+# 서버 (사이드카 프로세스)
+#--------------------------------------
+class InferenceServer:
+    """
+    reranker(+ 선택적 임베딩 모델)를 한 번만 올리고 Unix 소켓으로 여러 워커의 요청을 처리
+    - score: 모든 연결의 요청이 하나의 RerankBatcher로 모여 배치 점수화
+    - embed: 임베딩 모델 encode를 추론 스레드에서 실행
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        cross_encoder,
+        embedder=None,
+        embed_model_name: Optional[str] = None,
+        workers: int = INFERENCE_SIDECAR_WORKERS,
+    ):
+        self.socket_path = socket_path
+        self.embedder = embedder
+        self.embed_model_name = embed_model_name if embedder is not None else None
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="sidecar")
+        self.batcher = RerankBatcher(
+            score_pairs=cross_encoder.predict,
+            top_n=0,
+            executor=self._executor,
+            max_concurrent_batches=max(1, workers),
+        )
+        self.started_at = time.time()
+        self.connections = 0
+        self.embed_requests = 0
+
+    async def serve_forever(self) -> None:
+        # 이전 실행이 남긴 소켓 파일 정리
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        print(f"🧠 추론 사이드카 대기 중: {self.socket_path} (embed_model={self.embed_model_name})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.close()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request, _ = await read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                try:
+                    header, body = await self._dispatch(request)
+                except Exception as e:
+                    header, body = {"ok": False, "error": repr(e)}, b""
+                writer.write(encode_frame(header, body))
+                await writer.drain()
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _dispatch(self, request: dict) -> Tuple[dict, bytes]:
+        op = request.get("op")
+        if op == "score":
+            scores = await self.batcher.score([tuple(p) for p in request["pairs"]])
+            arr = np.asarray(scores, dtype=np.float32)
+            return {"ok": True, "shape": list(arr.shape)}, arr.tobytes()
+        if op == "embed":
+            if self.embedder is None:
+                raise SidecarError("임베딩 모델이 설정되지 않았습니다 (INFERENCE_SIDECAR_EMBED_MODEL).")
+            self.embed_requests += 1
+            loop = asyncio.get_running_loop()
+            arr = await loop.run_in_executor(self._executor, self._encode, request["texts"])
+            return {"ok": True, "shape": list(arr.shape)}, arr.tobytes()
+        if op == "ping":
+            return {"ok": True, **self.snapshot()}, b""
+        raise SidecarError(f"지원하지 않는 op 입니다: {op}")
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.embedder.encode(texts, show_progress_bar=False), dtype=np.float32)
+
+    def snapshot(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "connections": self.connections,
+            "embed_model": self.embed_model_name,
+            "embed_requests": self.embed_requests,
+            "rerank": self.batcher.snapshot(),
+        }
+
+
+#--------------------------------------
+# 클라이언트 (API 워커)
+#--------------------------------------
+# 재사용한 유휴 연결에서 쓰기 / 읽기가 이렇게 실패하면 상대가 이미 닫은 연결 (요청은 처리되지 않음)
+_STALE_CONNECTION_ERRORS = (ConnectionError, asyncio.IncompleteReadError)
+
+
+class SidecarClient:
+    """
+    사이드카 연결 풀 (연결 하나에 요청 하나씩)
+    - 연결은 필요할 때 열고 재사용, 오류가 난 연결은 버림
+    - 재사용한 유휴 연결이 끊겨 있으면(사이드카 재시작) 남은 유휴 연결도 버리고 새 연결로 한 번만 재시도
+      → 재시작 직후 요청도 사용자 오류 없이 처리 (score / embed / ping은 다시 보내도 결과가 같음)
+    """
+
+    def __init__(self, socket_path: str, pool_size: int = INFERENCE_SIDECAR_POOL_SIZE, timeout_s: float = INFERENCE_SIDECAR_TIMEOUT_S):
+        self.socket_path = socket_path
+        self.timeout_s = timeout_s
+        self._slots = asyncio.Semaphore(max(1, pool_size))
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self.info: dict = {}
+
+        # 통계
+        self.requests = 0
+        self.errors = 0
+        self.reconnects = 0
+        self.pending_pairs = 0
+
+    async def call(self, request: dict) -> Tuple[dict, bytes]:
+        async with self._slots:
+            reused = bool(self._idle)
+            conn = self._idle.pop() if reused else await asyncio.open_unix_connection(self.socket_path)
+            try:
+                header, body = await self._roundtrip(conn, request)
+            except _STALE_CONNECTION_ERRORS as e:
+                if not reused:
+                    raise
+                print(f"⚠️ [사이드카] 유휴 연결이 끊겨 있음 → 새 연결로 재시도: {e!r}")
+                self.reconnects += 1
+                self._drop_idle()
+                conn = await asyncio.open_unix_connection(self.socket_path)
+                header, body = await self._roundtrip(conn, request)
+            self._idle.append(conn)
+        self.requests += 1
+        if not header.get("ok"):
+            raise SidecarError(header.get("error", "사이드카 오류"))
+        return header, body
+
+    async def _roundtrip(self, conn: Tuple[asyncio.StreamReader, asyncio.StreamWriter], request: dict) -> Tuple[dict, bytes]:
+        try:
+            conn[1].write(encode_frame(request))
+            await conn[1].drain()
+            return await asyncio.wait_for(read_frame(conn[0]), timeout=self.timeout_s)
+        except BaseException:
+            # 응답을 다 읽지 못한 연결은 다음 요청과 섞이지 않도록 폐기
+            self.errors += 1
+            conn[1].close()
+            raise
+
+    def _drop_idle(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    def call_blocking(self, request: dict) -> Tuple[dict, bytes]:
+        """동기 코드 경로용 (이벤트 루프 밖) - 요청마다 새 연결"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout_s)
+            sock.connect(self.socket_path)
+            sock.sendall(encode_frame(request))
+            header_len, body_len = _FRAME_HEADER.unpack(_recv_exactly(sock, _FRAME_HEADER.size))
+            header = json.loads(_recv_exactly(sock, header_len))
+            body = _recv_exactly(sock, body_len) if body_len else b""
+        if not header.get("ok"):
+            raise SidecarError(header.get("error", "사이드카 오류"))
+        return header, body
+
+    async def ping(self) -> dict:
+        header, _ = await self.call({"op": "ping"})
+        self.info = header
+        return header
+
+    async def score(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        if not pairs:
+            return []
+        self.pending_pairs += len(pairs)
+        try:
+            header, body = await self.call({"op": "score", "pairs": [list(p) for p in pairs]})
+        finally:
+            self.pending_pairs -= len(pairs)
+        return decode_array(header, body).tolist()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        header, body = await self.call({"op": "embed", "texts": texts})
+        return decode_array(header, body).tolist()
+
+    def embed_blocking(self, texts: List[str]) -> List[List[float]]:
+        header, body = self.call_blocking({"op": "embed", "texts": texts})
+        return decode_array(header, body).tolist()
+
+    async def close(self) -> None:
+        self._drop_idle()
+
+
+class SidecarReranker:
+    """RerankBatcher와 같은 인터페이스 (rerank / score / snapshot / close) - 배치는 사이드카 쪽에서 모음"""
+
+    def __init__(self, client: SidecarClient, top_n: int):
+        self.client = client
+        self.top_n = top_n
+
+    async def rerank(self, query: str, nodes: List[NodeWithScore], top_n: Optional[int] = None) -> List[NodeWithScore]:
+        return await rerank_nodes(self.score, query, nodes, top_n or self.top_n)
+
+    async def score(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        return await self.client.score(pairs)
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": "sidecar",
+            "socket": self.client.socket_path,
+            "requests": self.client.requests,
+            "errors": self.client.errors,
+            "reconnects": self.client.reconnects,
+            "pending_pairs": self.client.pending_pairs,
+        }
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+class SidecarEmbedding(BaseEmbedding):
+    """사이드카의 sentence-transformers 모델로 임베딩 (질문/문서 구분 없이 같은 encode 사용)"""
+
+    _client: SidecarClient = PrivateAttr()
+
+    def __init__(self, client: SidecarClient, model_name: str, **kwargs: Any):
+        super().__init__(model_name=model_name, **kwargs)
+        self._client = client
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "SidecarEmbedding"
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._client.embed_blocking([query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return (await self._client.embed([query]))[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._client.embed_blocking([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._client.embed([text]))[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._client.embed_blocking(texts)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return await self._client.embed(texts)
+
+
+async def connect_sidecar(socket_path: Optional[str] = INFERENCE_SIDECAR_SOCKET) -> Optional[SidecarClient]:
+    """사이드카 사용 설정 + 연결 가능하면 클라이언트 반환, 아니면 None (워커 안에서 모델을 올리는 기존 경로)"""
+    if not socket_path:
+        return None
+    client = SidecarClient(socket_path)
+    try:
+        info = await client.ping()
+    except Exception as e:
+        print(f"⚠️ 추론 사이드카 연결 실패 - 워커 내 모델로 동작: {socket_path} ({e!r})")
+        await client.close()
+        return None
+    print(f"▶ 추론 사이드카 연결: {socket_path} (pid={info.get('pid')}, embed_model={info.get('embed_model')})")
+    return client
+
+
+#--------------------------------------
+# 사이드카 실행
+#--------------------------------------
+def _load_embedder(model_name: Optional[str]):
+    if not model_name:
+        return None
+    from sentence_transformers import SentenceTransformer
+
+    print(f"▶ Sidecar embedding model: {model_name}")
+    return SentenceTransformer(model_name, device="cpu")
+
+
+def main() -> int:
+    from backend.services.rerankers import load_cross_encoder
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--socket", default=INFERENCE_SIDECAR_SOCKET, help="Unix 소켓 경로 (기본: INFERENCE_SIDECAR_SOCKET)")
+    parser.add_argument("--workers", type=int, default=INFERENCE_SIDECAR_WORKERS, help="추론 스레드 수")
+    parser.add_argument("--embed-model", default=INFERENCE_SIDECAR_EMBED_MODEL, help="함께 올릴 sentence-transformers 임베딩 모델")
+    args = parser.parse_args()
+    if not args.socket:
+        parser.error("--socket 또는 INFERENCE_SIDECAR_SOCKET이 필요합니다.")
+
+    server = InferenceServer(
+        args.socket,
+        cross_encoder=load_cross_encoder(),
+        embedder=_load_embedder(args.embed_model),
+        embed_model_name=args.embed_model,
+        workers=args.workers,
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
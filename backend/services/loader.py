@@ -1,4 +1,5 @@
 import re
+import time
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
 
@@ -195,6 +196,8 @@ def load_txt_as_docs(txt_path: str) -> List[Document]:
         "applicants": applicants or None,
         "inventors": inventors or None,
         "agents": agents or None,
+        # 적재 시각 (epoch ms) - 엔티티 사전이 새로 적재된 doc_meta만 읽는 기준 (임베딩 / LLM 텍스트에는 넣지 않음)
+        "ingested_at": int(time.time() * 1000),
     }
 
     def norm_section(name: str) -> str:
@@ -272,4 +275,7 @@ def load_txt_as_docs(txt_path: str) -> List[Document]:
                     )
                 )
 
+    for doc in docs:
+        doc.excluded_embed_metadata_keys.append("ingested_at")
+        doc.excluded_llm_metadata_keys.append("ingested_at")
     return docs
@@ -0,0 +1,293 @@
+"""
+경량 메트릭 수집기 (Prometheus text format 0.0.4)
+
+- 외부 의존성 없이 Counter / Gauge / Histogram 제공
+- hot path에서는 dict 조회 + bisect 한 번 정도만 수행 (누적 버킷 계산은 /metrics 조회 시)
+- 값 갱신은 이벤트 루프 스레드에서만 한다는 전제로 잠금을 쓰지 않음
+"""
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> Iterable[str]:
+        return []
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> Iterable[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def _samples(self) -> Iterable[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 값 → [버킷별 개수(비누적) ..., +Inf 개수], 합계
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def time(self, **labels: str) -> "_Timer":
+        return _Timer(self, labels)
+
+    def _samples(self) -> Iterable[str]:
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(bound)))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(self._sums[key])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self._histogram = histogram
+        self._labels = labels
+        self._start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._histogram.observe(time.perf_counter() - self._start, **self._labels)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collect_hooks: List[Callable[[], None]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def on_collect(self, hook: Callable[[], None]) -> None:
+        """/metrics 조회 직전에 호출되는 콜백 등록 (캐시 통계 등을 게이지로 옮길 때 사용)"""
+        self._collect_hooks.append(hook)
+
+    def render(self) -> str:
+        for hook in self._collect_hooks:
+            try:
+                hook()
+            except Exception:
+                pass
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+#-------------------------------
+#전역 레지스트리 및 공용 메트릭
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간 (스트리밍은 응답 종료까지)", ["method", "route", "status"]
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "처리 중인 HTTP 요청 수")
+
+RAG_STAGE_SECONDS = REGISTRY.histogram("rag_stage_duration_seconds", "RAG 파이프라인 단계별 소요 시간", ["stage"])
+RAG_REQUESTS_IN_FLIGHT = REGISTRY.gauge("rag_requests_in_flight", "실행 중인 RAG 질의 수", ["mode"])
+RAG_REQUESTS_TOTAL = REGISTRY.counter("rag_requests_total", "RAG 질의 수", ["mode", "outcome"])
+RAG_CONTEXT_NODES = REGISTRY.gauge("rag_context_nodes", "마지막 질의에서 LLM 컨텍스트에 들어간 노드 수")
+RAG_CONTEXT_TOKENS = REGISTRY.gauge("rag_context_tokens", "마지막 질의의 컨텍스트 토큰 수")
+RAG_PROMPT_TOKENS = REGISTRY.gauge("rag_prompt_tokens", "마지막 질의의 프롬프트 토큰 수")
+RAG_BRANCH_TIMEOUTS = REGISTRY.counter("rag_branch_timeouts_total", "검색 분기 타임아웃 횟수", ["branch"])
+
+PATENTS_ES_SECONDS = REGISTRY.histogram("patents_es_request_seconds", "특허 검색 Elasticsearch 왕복 시간")
+PATENTS_ES_TOOK_SECONDS = REGISTRY.histogram("patents_es_took_seconds", "Elasticsearch가 보고한 took 시간")
+
+RERANK_PENDING_PAIRS = REGISTRY.gauge("rerank_pending_pairs", "rerank 배처 대기 중인 (질문, 문서) 쌍 수")
+
+ADMISSION_QUEUE_SECONDS = REGISTRY.histogram("chat_admission_queue_seconds", "챗봇 LLM 생성 대기열 대기 시간", ["priority"])
+ADMISSION_INFLIGHT = REGISTRY.gauge("chat_admission_inflight", "실행 중인 챗봇 LLM 생성 수")
+ADMISSION_QUEUED = REGISTRY.gauge("chat_admission_queued", "대기열에서 기다리는 챗봇 요청 수")
+ADMISSION_REJECTED = REGISTRY.counter("chat_admission_rejected_total", "입장 거절된 챗봇 요청 수", ["reason"])
+
+SINGLE_FLIGHT_REQUESTS = REGISTRY.counter("single_flight_requests_total", "동시 동일 요청 합치기 (leader=직접 계산, follower=결과 공유)", ["name", "role"])
+SINGLE_FLIGHT_SAVED_SECONDS = REGISTRY.counter("single_flight_saved_seconds_total", "결과 공유로 생략된 계산 시간 합계", ["name"])
+
+SESSION_STORE_PENDING = REGISTRY.gauge("chat_session_pending_messages", "MongoDB 저장 대기 중인 대화 메시지 수")
+SESSION_STORE_FLUSH_SECONDS = REGISTRY.histogram("chat_session_flush_seconds", "대화 내역 write-behind bulk_write 소요 시간")
+SESSION_STORE_DROPPED = REGISTRY.counter("chat_session_dropped_messages_total", "저장 대기열 초과로 버려진 대화 메시지 수")
+
+CACHE_HIT_RATIO = REGISTRY.gauge("cache_hit_ratio", "캐시 적중률", ["cache"])
+CACHE_ENTRIES = REGISTRY.gauge("cache_entries", "캐시 항목 수", ["cache"])
+
+# timings dict 키 → 단계 이름
+_RAG_STAGE_KEYS = {
+    "retrieve_ms": "retrieve",
+    "rerank_ms": "rerank",
+    "meta_ms": "meta",
+    "fanout_ms": "fanout",
+    "combine_ms": "pack",
+    "llm_ms": "llm",
+    "llm_first_token_ms": "llm_first_token",
+    "sources_ms": "time_to_sources",
+    "total_ms": "total",
+}
+
+
+def observe_rag_timings(timings: dict) -> None:
+    """run_llamaindex_query / stream_llamaindex_query가 채운 timings를 메트릭으로 반영"""
+    for key, stage in _RAG_STAGE_KEYS.items():
+        value = timings.get(key)
+        if value is not None:
+            RAG_STAGE_SECONDS.observe(value / 1000.0, stage=stage)
+    if "context_nodes" in timings:
+        RAG_CONTEXT_NODES.set(timings["context_nodes"])
+    if "context_tokens" in timings:
+        RAG_CONTEXT_TOKENS.set(timings["context_tokens"])
+    if "prompt_tokens" in timings:
+        RAG_PROMPT_TOKENS.set(timings["prompt_tokens"])
+    for branch in ("dense", "meta"):
+        if timings.get(f"{branch}_timeout"):
+            RAG_BRANCH_TIMEOUTS.inc(branch=branch)
+
+
+#--------------------------------------
+# ASGI 미들웨어 (엔드포인트별 지연시간 / 처리 중 요청 수)
+#--------------------------------------
+class MetricsMiddleware:
+    """BaseHTTPMiddleware 대신 순수 ASGI로 구현해 스트리밍 응답도 끝까지 측정하고 오버헤드를 줄임"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # 라우팅 후 scope에 채워진 경로 템플릿 사용 (/sessions/{session_id} 등 카디널리티 제한)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope.get("method", ""),
+                route=route,
+                status=str(status["code"]),
+            )
@@ -0,0 +1,28 @@
+"""
+페이지 커서 (클라이언트에게는 불투명한 문자열)
+
+- JSON → base64url (패딩 제거), 디코딩 시 필수 키 확인
+- 대화 내역(session_store) / 특허 검색(search_after) 커서가 함께 사용
+"""
+import base64
+import binascii
+import json
+
+
+class InvalidCursor(ValueError):
+    """디코딩할 수 없는 페이지 커서"""
+
+
+def encode_cursor(data: dict) -> str:
+    raw = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str, *keys: str) -> dict:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError) as e:
+        raise InvalidCursor(f"잘못된 커서입니다: {cursor}") from e
+    if not isinstance(data, dict) or any(k not in data for k in keys):
+        raise InvalidCursor(f"잘못된 커서입니다: {cursor}")
+    return data
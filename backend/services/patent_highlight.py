@@ -0,0 +1,109 @@
+"""
+특허 검색 하이라이트 방식 (get_patents highlight 파라미터 / PATENTS_HIGHLIGHT_MODE)
+
+- full:      기존 방식 - 7개 필드 전체 텍스트(number_of_fragments 0), require_field_match False
+             → hit마다 청구항 전체를 다시 분석하고 응답에 통째로 실음 (가장 비쌈)
+- fragments: 같은 필드, 긴 필드(abstract / claims)는 조각(fragment_size × 개수)만 반환 (기본값)
+             → 목록이 그리는 title.ko 하이라이트는 어떤 검색 조건이든 full과 같음
+- queried:   검색 조건에 쓰인 필드만, 각 필드는 자기 조건에 맞은 단어만 (require_field_match True) + 조각
+             → 제목을 검색하지 않는 조건(desc_q / claim_q / 발명자 등)에서는 title.ko 하이라이트가 없음 - 호출하는 쪽이 선택할 때만
+- fvh:       queried와 같되 긴 필드는 term vector(.tv 서브필드)로 fast vector highlighter 사용 - 재분석 없음
+             → 매핑에 .tv 서브필드가 있어야 함 (scripts/put_patents_term_vectors.py)
+- none:      하이라이트 안 함 (필요하면 /api/patents/{출원번호}/highlight로 한 건만)
+
+하이라이트 질의는 키워드 절(QueryPlan.relevance_query)만 사용 - 법적 상태 / 번호 filter는 하이라이트 대상이 아님
+"""
+import os
+from typing import Dict, Optional, Tuple
+
+from backend.services.patent_query import PROD_FIELDS, TECH_FIELDS, PatentSearchParams, QueryPlan
+
+
+#-----------------------------------
+#환경 변수
+PATENTS_HIGHLIGHT_MODE = (os.getenv("PATENTS_HIGHLIGHT_MODE") or "fragments").strip().lower()  # full | fragments | queried | fvh | none
+PATENTS_HIGHLIGHT_FRAGMENT_SIZE = int(os.getenv("PATENTS_HIGHLIGHT_FRAGMENT_SIZE", "150"))   # 조각 길이 (문자)
+PATENTS_HIGHLIGHT_FRAGMENTS = int(os.getenv("PATENTS_HIGHLIGHT_FRAGMENTS", "3"))             # 긴 필드당 조각 수
+
+HIGHLIGHT_MODES = ("full", "fragments", "queried", "fvh", "none")
+
+# 긴 필드만 조각, 나머지(제목 / 이름)는 짧으므로 항상 전체 텍스트
+LONG_FIELDS = ("abstract", "claims")
+ALL_FIELDS = ("title.ko", "title.en", "abstract", "claims", "inventors.name", "responsibleInventor", "applicant.name")
+
+# term_vector(with_positions_offsets)를 켠 서브필드 접미사
+TERM_VECTOR_SUFFIX = ".tv"
+
+_TAGS = {"pre_tags": ["<mark>"], "post_tags": ["</mark>"]}
+
+
+def _strip_boost(fields: Tuple[str, ...]) -> Tuple[str, ...]:
+    return tuple(f.split("^", 1)[0] for f in fields)
+
+
+def queried_fields(params: PatentSearchParams) -> Tuple[str, ...]:
+    """검색 조건에 쓰인 필드 (ALL_FIELDS 순서)"""
+    used = set()
+    if params.tech_q:
+        used.update(_strip_boost(TECH_FIELDS))
+    if params.prod_q:
+        used.update(_strip_boost(PROD_FIELDS))
+    if params.desc_q:
+        used.add("abstract")
+    if params.claim_q:
+        used.add("claims")
+    if params.inventor:
+        used.add("inventors.name")
+    if params.manager:
+        used.add("responsibleInventor")
+    if params.applicant:
+        used.add("applicant.name")
+    return tuple(f for f in ALL_FIELDS if f in used)
+
+
+def _fragment_options() -> dict:
+    return {"fragment_size": PATENTS_HIGHLIGHT_FRAGMENT_SIZE, "number_of_fragments": PATENTS_HIGHLIGHT_FRAGMENTS}
+
+
+def _with_query(highlight: dict, highlight_query: Optional[dict]) -> dict:
+    # 키워드가 NOT뿐이면 relevance_query가 없음 → ES가 검색 쿼리를 그대로 사용
+    if highlight_query is not None:
+        highlight["highlight_query"] = highlight_query
+    return highlight
+
+
+def build_highlight(params: PatentSearchParams, plan: QueryPlan, mode: str = PATENTS_HIGHLIGHT_MODE) -> Optional[dict]:
+    """es.search의 highlight 인자 (하이라이트하지 않으면 None)"""
+    if mode == "none" or not params.has_keywords:
+        return None
+    highlight_query = plan.relevance_query()
+
+    if mode == "full":
+        return {
+            "fields": {f: {"number_of_fragments": 0} for f in ALL_FIELDS},  # 전체 텍스트 하이라이팅
+            **_TAGS,
+            "require_field_match": False,  # 모든 필드에서 하이라이팅
+        }
+
+    if mode == "fragments":
+        fields: Dict[str, dict] = {f: (_fragment_options() if f in LONG_FIELDS else {"number_of_fragments": 0}) for f in ALL_FIELDS}
+        return _with_query({"fields": fields, **_TAGS, "require_field_match": False}, highlight_query)
+
+    # queried / fvh: 조건에 쓰인 필드만
+    fields = {}
+    for f in queried_fields(params):
+        if f not in LONG_FIELDS:
+            fields[f] = {"number_of_fragments": 0}
+        elif mode == "fvh":
+            # .tv 서브필드는 질의 대상이 아니므로 원 필드의 질의 단어를 그대로 쓰도록 필드 일치 조건을 끔
+            fields[f + TERM_VECTOR_SUFFIX] = {"type": "fvh", "require_field_match": False, **_fragment_options()}
+        else:
+            fields[f] = _fragment_options()
+    if not fields or highlight_query is None:
+        return None
+    return {"fields": fields, **_TAGS, "require_field_match": True, "highlight_query": highlight_query}
+
+
+def normalize_highlight(highlight: dict) -> dict:
+    """fvh 모드의 서브필드 키(abstract.tv)를 원 필드 키(abstract)로 - 응답 형식은 모드와 무관하게 동일"""
+    return {(k[: -len(TERM_VECTOR_SUFFIX)] if k.endswith(TERM_VECTOR_SUFFIX) else k): v for k, v in highlight.items()}
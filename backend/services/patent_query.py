@@ -0,0 +1,227 @@
+"""
+특허 검색 쿼리 플래너 (get_patents 파라미터 → Elasticsearch bool 쿼리)
+
+- 요청 파라미터를 정규화된 PatentSearchParams(불변, 해시 가능)로 변환
+- 점수에 영향을 주는 키워드 조건만 bool.must, 정확 일치 조건(법적 상태 / 출원·공개·등록번호)은 bool.filter
+  → filter 절은 점수 계산을 건너뛰고 ES 노드 쿼리 캐시(비트셋)를 재사용할 수 있음
+- 키워드는 불리언 질의 언어(AND/OR/NOT, 괄호, "구문")로 파싱 - 최상위 AND는 must, NOT은 must_not으로 펼침
+- 중복 절 제거: 같은 절 반복, 값이 하나뿐인 should/must 래퍼, must 안의 must 중첩, terms 값 중복
+- 깊은 페이지는 커서 모드: point-in-time(PIT) + search_after (from+size 정렬 비용 없음, 색인 중에도 결과가 밀리지 않음)
+"""
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field, fields
+from typing import Iterable, List, Optional, Tuple
+
+from backend.services.page_cursor import InvalidCursor, decode_cursor, encode_cursor
+from backend.services.query_language import FieldSpec, compiled_query_cache
+
+
+#-----------------------------------
+#환경 변수
+# false면 모든 조건을 must에 넣는 기존 방식 (벤치마크 비교 / 롤백용)
+PATENTS_FILTER_CONTEXT = (os.getenv("PATENTS_FILTER_CONTEXT") or "true").strip().lower() in ["1", "true", "yes", "y", "on"]
+PATENTS_PIT_KEEP_ALIVE = os.getenv("PATENTS_PIT_KEEP_ALIVE", "2m")                  # 커서 페이지 사이 PIT 유지 시간 (요청마다 연장)
+PATENTS_MAX_RESULT_WINDOW = int(os.getenv("PATENTS_MAX_RESULT_WINDOW", "10000"))   # page 방식 from+size 상한 (ES index.max_result_window)
+# 목록(view=list)에서 가져올 _source 필드 - 청구항 / 패밀리 / 대리인 정보 등 큰 필드는 상세 API(/api/patents/{출원번호})에서만
+PATENTS_LIST_SOURCE = [f.strip() for f in os.getenv(
+    "PATENTS_LIST_SOURCE",
+    "applicationNumber,applicationDate,status,title,applicant.name,inventors.name,responsibleInventor,"
+    "openNumber,publicationNumber,publicationDate,registrationNumber,registrationDate,countryCode,pdfPath",
+).split(",") if f.strip()]
+
+TECH_FIELDS = ("title.ko^2", "abstract")
+PROD_FIELDS = ("title.ko", "abstract")
+
+def _clean(value: Optional[str]) -> Optional[str]:
+    # 앞뒤/연속 공백 정리, 공백뿐인 값은 조건 없음으로 처리
+    if value is None:
+        return None
+    value = " ".join(value.split())
+    return value or None
+
+
+def normalize_number(raw: str) -> Tuple[str, ...]:
+    """
+    출원/공개번호 검색값 후보: 숫자만 / 한국식(10-YYYY-NNNNNNN) 하이픈 형식 / 입력 원문 (중복 제거, 순서 유지)
+    """
+    raw = (raw or "").strip()
+    digits = re.sub(r"\D", "", raw)
+    values: List[str] = []
+    if digits:
+        values.append(digits)
+        if len(digits) >= 13 and digits.startswith("10"):
+            values.append(f"10-{digits[2:6]}-{digits[6:]}")
+    if raw:
+        values.append(raw)
+    return tuple(dict.fromkeys(values))
+
+
+@dataclass(frozen=True)
+class PatentSearchParams:
+    """get_patents 검색 조건 (정규화 후 불변 - 같은 검색이면 같은 값/해시)"""
+
+    tech_q: Optional[str] = None
+    prod_q: Optional[str] = None
+    desc_q: Optional[str] = None
+    claim_q: Optional[str] = None
+    inventor: Optional[str] = None
+    manager: Optional[str] = None
+    applicant: Optional[str] = None
+    app_num: Optional[str] = None
+    open_num: Optional[str] = None
+    reg_num: Optional[str] = None
+    status: Tuple[str, ...] = ()
+    page: int = 1
+    limit: int = 10
+    cursor: Optional[str] = None   # 커서 모드 ("*"이면 첫 페이지, 이후 응답의 next_cursor)
+    view: str = "list"             # list: PATENTS_LIST_SOURCE 필드만 / full: 전체 문서
+    highlight: Optional[str] = None  # 하이라이트 방식 (None이면 PATENTS_HIGHLIGHT_MODE, patent_highlight 참고)
+
+    @classmethod
+    def from_request(cls, status: Optional[Iterable[str]] = None, page: int = 1, limit: int = 10, **text: Optional[str]) -> "PatentSearchParams":
+        statuses = tuple(sorted({s.strip() for s in (status or []) if s and s.strip()}))
+        return cls(status=statuses, page=max(1, page), limit=max(1, limit), **{k: _clean(v) for k, v in text.items()})
+
+    @property
+    def has_keywords(self) -> bool:
+        """하이라이트 대상 키워드 조건이 있는지"""
+        return any((self.tech_q, self.prod_q, self.desc_q, self.claim_q, self.inventor, self.manager, self.applicant))
+
+    @property
+    def source(self):
+        """es.search의 _source 인자"""
+        return PATENTS_LIST_SOURCE if self.view == "list" else True
+
+    @property
+    def skip(self) -> int:
+        return (self.page - 1) * self.limit
+
+    def as_dict(self) -> dict:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    def query_digest(self) -> str:
+        """커서가 같은 검색 조건에서 발급됐는지 확인하는 값 (페이지 / 크기 / 커서 / 응답 형태 제외)"""
+        conditions = {k: v for k, v in self.as_dict().items() if k not in ("page", "limit", "cursor", "view", "highlight")}
+        raw = json.dumps(conditions, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha1(raw).hexdigest()[:16]
+
+
+#--------------------------------------
+# 커서 (PIT + search_after)
+#--------------------------------------
+CURSOR_START = "*"
+SORT_BY_SCORE = [{"_score": "desc"}]
+# PIT에서만 쓸 수 있는 _shard_doc을 동점 정렬 기준으로 (점수가 같아도 문서 순서가 고정됨)
+SORT_BY_SCORE_STABLE = [{"_score": "desc"}, {"_shard_doc": "asc"}]
+
+
+@dataclass(frozen=True)
+class PatentCursor:
+    pit_id: Optional[str] = None           # None이면 아직 PIT를 열지 않은 첫 페이지
+    search_after: Optional[list] = None    # 이전 페이지 마지막 hit의 sort 값
+    page: int = 1
+    seen: int = 0                          # 이전 페이지까지 반환한 문서 수
+    digest: str = ""
+
+    @classmethod
+    def decode(cls, params: PatentSearchParams) -> "PatentCursor":
+        if params.cursor == CURSOR_START:
+            return cls(digest=params.query_digest())
+        data = decode_cursor(params.cursor, "pit", "after", "page", "seen", "q")
+        if data["q"] != params.query_digest():
+            raise InvalidCursor("검색 조건이 커서를 발급한 요청과 다릅니다")
+        try:
+            return cls(pit_id=str(data["pit"]), search_after=list(data["after"]), page=int(data["page"]), seen=int(data["seen"]), digest=data["q"])
+        except (TypeError, ValueError) as e:
+            raise InvalidCursor(f"잘못된 커서입니다: {params.cursor}") from e
+
+    def next(self, pit_id: str, last_sort: list, seen: int) -> str:
+        return encode_cursor({"pit": pit_id, "after": last_sort, "page": self.page + 1, "seen": seen, "q": self.digest})
+
+
+@dataclass
+class QueryPlan:
+    must: List[dict] = field(default_factory=list)       # 점수 계산 (키워드)
+    filter: List[dict] = field(default_factory=list)     # 점수 없음 + 캐시 가능 (정확 일치)
+    must_not: List[dict] = field(default_factory=list)   # 키워드 NOT (점수 없음)
+
+    def query(self) -> dict:
+        if not self.must and not self.filter and not self.must_not:
+            return {"match_all": {}}
+        bool_query: dict = {}
+        if self.must:
+            bool_query["must"] = self.must
+        if self.filter:
+            bool_query["filter"] = self.filter
+        if self.must_not:
+            bool_query["must_not"] = self.must_not
+        return {"bool": bool_query}
+
+    def relevance_query(self) -> Optional[dict]:
+        """하이라이트용 (filter 절은 하이라이트 대상이 아님)"""
+        if not self.must:
+            return None
+        return self.must[0] if len(self.must) == 1 else {"bool": {"must": self.must}}
+
+
+#--------------------------------------
+# 절 생성
+#--------------------------------------
+TECH_SPEC = FieldSpec(TECH_FIELDS, fuzzy=True)
+PROD_SPEC = FieldSpec(PROD_FIELDS)
+
+
+def _dedupe(clauses: List[dict]) -> List[dict]:
+    seen = set()
+    out = []
+    for clause in clauses:
+        key = json.dumps(clause, sort_keys=True, ensure_ascii=False)
+        if key not in seen:
+            seen.add(key)
+            out.append(clause)
+    return out
+
+
+def plan_patent_query(params: PatentSearchParams, filter_context: bool = PATENTS_FILTER_CONTEXT) -> QueryPlan:
+    """검색 조건 → QueryPlan (filter_context=False면 모든 절을 must에 넣음)"""
+    must: List[dict] = []
+    must_not: List[dict] = []
+    filters: List[dict] = []
+
+    # 키워드 조건 (점수 계산) - 검색어는 불리언 질의 언어로 컴파일 (query_language)
+    keywords = [
+        (params.tech_q, TECH_SPEC),
+        (params.prod_q, PROD_SPEC),
+        (params.desc_q, FieldSpec(("abstract",))),
+        (params.claim_q, FieldSpec(("claims",))),
+        (params.inventor, FieldSpec(("inventors.name",))),
+        # 책임연구자 (responsibleInventor 필드 사용 - inventors[0].name)
+        (params.manager, FieldSpec(("responsibleInventor",))),
+        (params.applicant, FieldSpec(("applicant.name",))),
+    ]
+    for expression, spec in keywords:
+        if expression:
+            compiled = compiled_query_cache.compile(expression, spec)
+            must += compiled.must
+            must_not += compiled.must_not
+
+    # 정확 일치 조건 (점수 없음)
+    if params.app_num:
+        values = normalize_number(params.app_num)
+        if values:
+            filters.append({"terms": {"applicationNumber": list(values)}})
+    if params.open_num:
+        values = normalize_number(params.open_num)
+        if values:
+            filters.append({"terms": {"openNumber": list(values)}})
+    if params.reg_num:
+        filters.append({"match": {"registrationNumber": params.reg_num}})
+    if params.status:
+        filters.append({"terms": {"status": list(params.status)}})
+
+    if not filter_context:
+        return QueryPlan(must=_dedupe(must + filters), must_not=_dedupe(must_not))
+    return QueryPlan(must=_dedupe(must), filter=_dedupe(filters), must_not=_dedupe(must_not))
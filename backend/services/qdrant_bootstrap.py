@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import os
+from typing import Dict, Union
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    PayloadSchemaType,
+    TextIndexParams,
+    TextIndexType,
+    TokenizerType,
+)
+
+
+#--------------------------------------
+# doc_meta 검색용 payload 인덱스 정의
+#--------------------------------------
+# - 번호/섹션: 정확 일치(MatchValue) → keyword 인덱스
+# - 적재 시각(ingested_at): 범위 조회(Range) → integer 인덱스
+# - 출원인/발명자/대리인: 부분 이름 일치(MatchText) → prefix 토크나이저 full-text 인덱스
+#   ("삼성" → "삼성전자주식회사", "홍길" → "홍길동")
+#   엔티티 정확 일치도 이 인덱스로 MatchText 후보를 좁힌 뒤 payload 값으로 재확인 (키당 인덱스는 하나 → keyword 인덱스를 따로 두지 않음)
+NAME_TEXT_INDEX = TextIndexParams(
+    type=TextIndexType.TEXT,
+    tokenizer=TokenizerType.PREFIX,
+    min_token_len=int(os.getenv("QDRANT_TEXT_MIN_TOKEN_LEN", "2")),
+    max_token_len=int(os.getenv("QDRANT_TEXT_MAX_TOKEN_LEN", "20")),
+    lowercase=True,
+)
+
+PAYLOAD_INDEXES: Dict[str, Union[PayloadSchemaType, TextIndexParams]] = {
+    "section": PayloadSchemaType.KEYWORD,
+    "patent_no": PayloadSchemaType.KEYWORD,
+    "application_number": PayloadSchemaType.KEYWORD,
+    "applicants": NAME_TEXT_INDEX,
+    "inventors": NAME_TEXT_INDEX,
+    "agents": NAME_TEXT_INDEX,
+    "ingested_at": PayloadSchemaType.INTEGER,   # 엔티티 사전 증분 갱신 (range 필터)
+}
+
+
+def _schema_type(schema: Union[PayloadSchemaType, TextIndexParams]) -> str:
+    if isinstance(schema, TextIndexParams):
+        return PayloadSchemaType.TEXT.value
+    return schema.value
+
+
+async def ensure_payload_indexes(aclient: AsyncQdrantClient, collection_name: str) -> Dict[str, str]:
+    """
+    컬렉션에 없는(또는 타입이 다른) payload 인덱스만 생성한다. 여러 번 실행해도 안전.
+    반환: {필드명: "created" | "exists"}
+    """
+    info = await aclient.get_collection(collection_name)
+    existing = info.payload_schema or {}
+    result: Dict[str, str] = {}
+
+    for field_name, schema in PAYLOAD_INDEXES.items():
+        current = existing.get(field_name)
+        current_type = getattr(getattr(current, "data_type", None), "value", None)
+        if current_type == _schema_type(schema):
+            result[field_name] = "exists"
+            continue
+        if current_type:
+            print(f"♻️  [Qdrant 인덱스] {field_name}: {current_type} → {_schema_type(schema)} 재생성")
+        await aclient.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=schema,
+            wait=True,
+        )
+        result[field_name] = "created"
+        print(f"✅ [Qdrant 인덱스] {field_name} ({_schema_type(schema)}) 생성 완료")
+
+    return result
+
+
+# run: python -m backend.services.qdrant_bootstrap --collection patents
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--qdrant_url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--collection", default=os.getenv("PATENTS_COLLECTION_NAME", "patents"))
+    args = parser.parse_args()
+
+    async def run():
+        aclient = AsyncQdrantClient(url=args.qdrant_url, timeout=60)
+        try:
+            print(await ensure_payload_indexes(aclient, args.collection))
+        finally:
+            await aclient.close()
+
+    asyncio.run(run())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
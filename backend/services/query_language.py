@@ -0,0 +1,280 @@
+"""
+특허 검색어 불리언 질의 언어 (검색어 → AST → Elasticsearch DSL)
+
+문법 (연산자는 대소문자 무관, 우선순위 NOT > AND > OR):
+    expr   := or
+    or     := and ("OR" and)*
+    and    := not (["AND"] not)*          # 연산자 없이 붙은 괄호/구문은 AND
+    not    := "NOT" not | atom
+    atom   := "(" expr ")" | "\"구문\"" | 단어+   # 연속된 단어는 하나의 match 검색어 (기존 동작과 동일)
+
+- 사용자 입력이므로 오류를 내지 않음: 닫히지 않은 괄호/따옴표는 끝에서 닫고, 남는 ")" / 앞뒤 연산자는 무시
+- 컴파일 결과는 (검색어, 필드 구성) 키의 LRU에 보관 - 반환된 절은 공유 객체이므로 수정하지 말 것
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+
+
+#-----------------------------------
+#환경 변수
+PATENTS_QUERY_CACHE_SIZE = int(os.getenv("PATENTS_QUERY_CACHE_SIZE", "2048"))  # 컴파일된 검색어 LRU 크기 (0이면 캐시 안 함)
+
+
+#--------------------------------------
+# AST
+#--------------------------------------
+@dataclass(frozen=True)
+class Text:
+    text: str
+
+
+@dataclass(frozen=True)
+class Phrase:
+    text: str
+
+
+@dataclass(frozen=True)
+class Not:
+    child: "Node"
+
+
+@dataclass(frozen=True)
+class And:
+    children: Tuple["Node", ...]
+
+
+@dataclass(frozen=True)
+class Or:
+    children: Tuple["Node", ...]
+
+
+Node = Union[Text, Phrase, Not, And, Or]
+
+
+#--------------------------------------
+# 토큰화 / 파싱
+#--------------------------------------
+_TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"?|([^\s()"]+))')
+_OPERATORS = {"AND", "OR", "NOT"}
+
+LPAREN, RPAREN, PHRASE, WORD, OP = "(", ")", "phrase", "word", "op"
+
+
+def tokenize(expression: str) -> List[Tuple[str, str]]:
+    tokens: List[Tuple[str, str]] = []
+    for lparen, rparen, phrase, word in _TOKEN_RE.findall(expression or ""):
+        if lparen:
+            tokens.append((LPAREN, lparen))
+        elif rparen:
+            tokens.append((RPAREN, rparen))
+        elif word:
+            upper = word.upper()
+            tokens.append((OP, upper) if upper in _OPERATORS else (WORD, word))
+        else:
+            tokens.append((PHRASE, phrase))
+    return tokens
+
+
+def _combine(cls, items: List[Node]) -> Optional[Node]:
+    # 같은 연산자 중첩은 펼치고, 항목이 하나면 래퍼 제거
+    flat: List[Node] = []
+    for item in items:
+        flat.extend(item.children if isinstance(item, cls) else (item,))
+    if not flat:
+        return None
+    return flat[0] if len(flat) == 1 else cls(tuple(flat))
+
+
+class _Parser:
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Optional[Tuple[str, str]]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _is(self, kind: str, value: Optional[str] = None) -> bool:
+        tok = self.peek()
+        return tok is not None and tok[0] == kind and (value is None or tok[1] == value)
+
+    def parse(self) -> Optional[Node]:
+        items: List[Node] = []
+        while self.peek() is not None:
+            node = self.parse_or()
+            if node is not None:
+                items.append(node)
+            if self._is(RPAREN):
+                self.pos += 1  # 짝 없는 ")" 무시
+        return _combine(And, items)
+
+    def parse_or(self) -> Optional[Node]:
+        items = [self.parse_and()]
+        while self._is(OP, "OR"):
+            self.pos += 1
+            items.append(self.parse_and())
+        return _combine(Or, [i for i in items if i is not None])
+
+    def parse_and(self) -> Optional[Node]:
+        items: List[Node] = []
+        while True:
+            tok = self.peek()
+            if tok is None or tok[0] == RPAREN or tok == (OP, "OR"):
+                break
+            if tok == (OP, "AND"):
+                self.pos += 1
+                continue
+            node = self.parse_not()
+            if node is not None:
+                items.append(node)
+        return _combine(And, items)
+
+    def parse_not(self) -> Optional[Node]:
+        if self._is(OP, "NOT"):
+            self.pos += 1
+            child = self.parse_not()
+            if child is None:
+                return None
+            return child.child if isinstance(child, Not) else Not(child)
+        return self.parse_atom()
+
+    def parse_atom(self) -> Optional[Node]:
+        tok = self.peek()
+        if tok is None or tok[0] in (OP, RPAREN):
+            # 피연산자 자리의 연산자 / ")" / 입력 끝 ("a NOT", "NOT OR a", "(NOT)") → 항목 없음, 토큰은 상위에서 처리
+            return None
+        kind, value = tok
+        self.pos += 1
+        if kind == LPAREN:
+            node = self.parse_or()
+            if self._is(RPAREN):
+                self.pos += 1
+            return node
+        if kind == PHRASE:
+            value = " ".join(value.split())
+            return Phrase(value) if value else None
+        # 연속된 단어는 하나의 검색어로 합침
+        words = [value]
+        while self._is(WORD):
+            words.append(self.tokens[self.pos][1])
+            self.pos += 1
+        return Text(" ".join(words))
+
+
+def parse(expression: str) -> Optional[Node]:
+    """검색어 → AST (조건이 없으면 None)"""
+    return _Parser(tokenize(expression)).parse()
+
+
+#--------------------------------------
+# DSL 컴파일
+#--------------------------------------
+@dataclass(frozen=True)
+class FieldSpec:
+    """검색어 한 항목을 어느 필드에 어떻게 질의할지 (캐시 키의 일부)"""
+
+    fields: Tuple[str, ...]
+    fuzzy: bool = False
+
+    def leaf(self, node: Union[Text, Phrase]) -> dict:
+        phrase = isinstance(node, Phrase)
+        if len(self.fields) == 1 and "^" not in self.fields[0] and not self.fuzzy:
+            return {"match_phrase" if phrase else "match": {self.fields[0]: node.text}}
+        clause = {"query": node.text, "fields": list(self.fields)}
+        if phrase:
+            clause["type"] = "phrase"   # phrase 타입은 fuzziness를 지원하지 않음
+        elif self.fuzzy:
+            clause["fuzziness"] = "AUTO"
+        return {"multi_match": clause}
+
+
+@dataclass(frozen=True)
+class CompiledQuery:
+    must: Tuple[dict, ...] = ()       # 점수 계산 절
+    must_not: Tuple[dict, ...] = ()   # 제외 절 (점수 없음)
+
+
+def _to_dsl(node: Node, spec: FieldSpec) -> dict:
+    if isinstance(node, (Text, Phrase)):
+        return spec.leaf(node)
+    if isinstance(node, Not):
+        return {"bool": {"must_not": [_to_dsl(node.child, spec)]}}
+    if isinstance(node, Or):
+        return {"bool": {"should": [_to_dsl(c, spec) for c in node.children], "minimum_should_match": 1}}
+    compiled = _compile_and(node.children, spec)
+    bool_query: dict = {}
+    if compiled.must:
+        bool_query["must"] = list(compiled.must)
+    if compiled.must_not:
+        bool_query["must_not"] = list(compiled.must_not)
+    return {"bool": bool_query}
+
+
+def _compile_and(children: Tuple[Node, ...], spec: FieldSpec) -> CompiledQuery:
+    # AND의 NOT 항목은 래퍼 없이 바로 must_not으로
+    must = tuple(_to_dsl(c, spec) for c in children if not isinstance(c, Not))
+    must_not = tuple(_to_dsl(c.child, spec) for c in children if isinstance(c, Not))
+    return CompiledQuery(must=must, must_not=must_not)
+
+
+def compile_node(node: Optional[Node], spec: FieldSpec) -> CompiledQuery:
+    """AST → 최상위 bool의 must / must_not 절 (최상위 AND는 펼쳐서 상위 bool에 바로 합침)"""
+    if node is None:
+        return CompiledQuery()
+    if isinstance(node, And):
+        return _compile_and(node.children, spec)
+    if isinstance(node, Not):
+        return CompiledQuery(must_not=(_to_dsl(node.child, spec),))
+    return CompiledQuery(must=(_to_dsl(node, spec),))
+
+
+#--------------------------------------
+# 컴파일 결과 LRU
+#--------------------------------------
+class CompiledQueryCache:
+    def __init__(self, max_entries: int = PATENTS_QUERY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[tuple, CompiledQuery]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, expression: str, spec: FieldSpec) -> CompiledQuery:
+        key = (expression, spec)
+        with self._lock:
+            compiled = self._data.get(key)
+            if compiled is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+        compiled = compile_node(parse(expression), spec)
+        if self.max_entries > 0:
+            with self._lock:
+                self._data[key] = compiled
+                while len(self._data) > self.max_entries:
+                    self._data.popitem(last=False)
+        return compiled
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+#-------------------------------
+#전역 인스턴스
+compiled_query_cache = CompiledQueryCache()
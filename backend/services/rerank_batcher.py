@@ -0,0 +1,192 @@
+import asyncio
+import os
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple
+
+from llama_index.core.schema import MetadataMode, NodeWithScore
+
+
+#-----------------------------------
+#환경 변수
+RERANK_BATCH_MAX_PAIRS = int(os.getenv("RERANK_BATCH_MAX_PAIRS", "128"))     # 한 번의 forward pass에 넣을 최대 (질문, 청크) 쌍 수
+RERANK_BATCH_MAX_WAIT_MS = float(os.getenv("RERANK_BATCH_MAX_WAIT_MS", "5"))  # 배치를 모으기 위해 기다리는 최대 시간
+
+
+# (질문, 청크) 쌍 목록 → 점수 목록 (CPU 바운드, 스레드 풀에서 실행됨)
+ScorePairsFn = Callable[[List[Tuple[str, str]]], Sequence[float]]
+
+
+async def rerank_nodes(
+    score: Callable[[List[Tuple[str, str]]], Awaitable[List[float]]],
+    query: str,
+    nodes: List[NodeWithScore],
+    top_n: int,
+) -> List[NodeWithScore]:
+    """(질문, 청크) 쌍을 score로 점수화한 뒤 점수 내림차순 상위 top_n 노드 반환 (배처 / 사이드카 공용)"""
+    if not nodes:
+        return []
+    pairs = [(query, nws.node.get_content(metadata_mode=MetadataMode.EMBED)) for nws in nodes]
+    scores = await score(pairs)
+
+    rescored = [NodeWithScore(node=nws.node, score=float(s)) for nws, s in zip(nodes, scores)]
+    rescored.sort(key=lambda x: x.score, reverse=True)
+    return rescored[:top_n]
+
+
+@dataclass
+class _RerankRequest:
+    pairs: List[Tuple[str, str]]
+    future: asyncio.Future
+
+
+class RerankBatcher:
+    """
+    동시 요청의 (질문, 청크) 쌍을 짧은 시간 창 안에서 모아 한 번의 cross-encoder forward pass로 점수화
+    - 배치 크기가 max_batch_pairs에 도달하거나 max_wait_ms가 지나면 즉시 실행
+    - 실행 중인 배치 수는 max_concurrent_batches로 제한 (나머지 요청은 다음 배치로 모임)
+    - 점수화 후 각 호출자에게 자신의 상위 top_n 노드만 돌려줌
+    """
+
+    def __init__(
+        self,
+        score_pairs: ScorePairsFn,
+        top_n: int,
+        executor: Optional[Executor] = None,
+        max_batch_pairs: int = RERANK_BATCH_MAX_PAIRS,
+        max_wait_ms: float = RERANK_BATCH_MAX_WAIT_MS,
+        max_concurrent_batches: int = 1,
+    ):
+        self.score_pairs = score_pairs
+        self.top_n = top_n
+        self.max_batch_pairs = max(1, max_batch_pairs)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self._executor = executor
+        self._max_concurrent_batches = max(1, max_concurrent_batches)
+
+        self._pending: List[_RerankRequest] = []
+        self._pending_pairs = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+
+        # 통계
+        self.batches = 0
+        self.requests = 0
+        self.pairs = 0
+        self.max_observed_batch = 0
+
+    # --------------------------------------
+    # 공개 API
+    # --------------------------------------
+
+    async def rerank(self, query: str, nodes: List[NodeWithScore], top_n: Optional[int] = None) -> List[NodeWithScore]:
+        """SentenceTransformerRerank.postprocess_nodes와 같은 결과 (점수 내림차순 상위 top_n)"""
+        return await rerank_nodes(self.score, query, nodes, top_n or self.top_n)
+
+    async def score(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(_RerankRequest(pairs=pairs, future=future))
+        self._pending_pairs += len(pairs)
+        self._wakeup.set()
+        if self._pending_pairs >= self.max_batch_pairs:
+            self._full.set()
+        return await future
+
+    def snapshot(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "pairs": self.pairs,
+            "avg_batch_pairs": round(self.pairs / self.batches, 1) if self.batches else 0.0,
+            "avg_requests_per_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "max_batch_pairs": self.max_observed_batch,
+            "pending_pairs": self._pending_pairs,
+        }
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for req in self._pending:
+            if not req.future.done():
+                req.future.set_exception(RuntimeError("reranker가 종료되었습니다."))
+        self._pending.clear()
+        self._pending_pairs = 0
+
+    # --------------------------------------
+    # 배치 수집 루프
+    # --------------------------------------
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._full = asyncio.Event()
+            self._slots = asyncio.Semaphore(self._max_concurrent_batches)
+            self._worker = asyncio.create_task(self._run(), name="rerank-batcher")
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            if not self._pending:
+                self._wakeup.clear()
+                continue
+
+            # 배치가 다 차지 않았으면 짧게 기다리며 다른 요청의 쌍을 모음
+            if self.max_wait_s > 0 and self._pending_pairs < self.max_batch_pairs:
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=self.max_wait_s)
+                except asyncio.TimeoutError:
+                    pass
+
+            await self._slots.acquire()
+            batch = self._take_batch()
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    def _take_batch(self) -> List[_RerankRequest]:
+        """요청 단위로 max_batch_pairs까지 꺼냄 (요청 하나가 상한보다 커도 최소 1건은 꺼냄)"""
+        batch: List[_RerankRequest] = []
+        taken = 0
+        while self._pending:
+            req = self._pending[0]
+            if batch and taken + len(req.pairs) > self.max_batch_pairs:
+                break
+            batch.append(self._pending.pop(0))
+            taken += len(req.pairs)
+        self._pending_pairs -= taken
+        if self._pending_pairs < self.max_batch_pairs:
+            self._full.clear()
+        if not self._pending:
+            self._wakeup.clear()
+        return batch
+
+    async def _dispatch(self, batch: List[_RerankRequest]) -> None:
+        flat = [pair for req in batch for pair in req.pairs]
+        try:
+            loop = asyncio.get_running_loop()
+            scores = await loop.run_in_executor(self._executor, self.score_pairs, flat)
+            self.batches += 1
+            self.requests += len(batch)
+            self.pairs += len(flat)
+            self.max_observed_batch = max(self.max_observed_batch, len(flat))
+            offset = 0
+            for req in batch:
+                n = len(req.pairs)
+                if not req.future.done():
+                    req.future.set_result([float(s) for s in scores[offset:offset + n]])
+                offset += n
+        except Exception as e:
+            for req in batch:
+                if not req.future.done():
+                    req.future.set_exception(e)
+        finally:
+            self._slots.release()
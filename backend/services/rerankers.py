@@ -0,0 +1,131 @@
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+#-----------------------------------
+#환경 변수
+RERANK_BACKEND = (os.getenv("RERANK_BACKEND") or "torch").strip().lower()  # torch | onnx
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", "512"))  # (질문+청크) 최대 토큰 수 - 넘치는 청크 뒷부분은 잘림
+RERANK_NUM_THREADS = int(os.getenv("RERANK_NUM_THREADS", "0"))  # 0이면 라이브러리 기본값
+RERANK_ONNX_PATH = os.getenv("RERANK_ONNX_PATH", os.path.join("storage", "reranker", "model_int8.onnx"))
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+#--------------------------------------
+# PyTorch 백엔드 (sentence-transformers CrossEncoder)
+#--------------------------------------
+class TorchCrossEncoder:
+    def __init__(self, model_name: str = RERANK_MODEL, max_length: int = RERANK_MAX_LENGTH, num_threads: int = RERANK_NUM_THREADS):
+        import torch
+        from sentence_transformers import CrossEncoder
+
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
+        self.model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+
+    def predict(self, pairs: List[Tuple[str, str]]) -> Sequence[float]:
+        return self.model.predict(pairs, show_progress_bar=False)
+
+
+#--------------------------------------
+# ONNX Runtime 백엔드 (int8 동적 양자화)
+#--------------------------------------
+def export_quantized_onnx(model_name: str, out_path: str) -> str:
+    """HF cross-encoder를 ONNX로 내보낸 뒤 가중치를 int8로 동적 양자화해 out_path에 저장"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    # 확장자와 무관하게 항상 out_path와 다른 임시 경로 (같으면 양자화가 입력을 덮어쓰고 아래 remove가 결과를 지움)
+    root, ext = os.path.splitext(out_path)
+    fp32_path = f"{root}_fp32{ext or '.onnx'}"
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    sample = tokenizer([("query", "passage")], return_tensors="pt")
+    input_names = list(sample.keys())
+
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[k] for k in input_names),
+                fp32_path,
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes={**{k: {0: "batch", 1: "seq"} for k in input_names}, "logits": {0: "batch"}},
+                opset_version=17,
+            )
+        quantize_dynamic(fp32_path, out_path, weight_type=QuantType.QInt8)
+    finally:
+        if os.path.exists(fp32_path):
+            os.remove(fp32_path)
+    tokenizer.save_pretrained(os.path.dirname(os.path.abspath(out_path)))
+    print(f"▶ ONNX int8 reranker 생성: {out_path}")
+    return out_path
+
+
+class OnnxCrossEncoder:
+    def __init__(
+        self,
+        model_name: str = RERANK_MODEL,
+        onnx_path: str = RERANK_ONNX_PATH,
+        max_length: int = RERANK_MAX_LENGTH,
+        num_threads: int = RERANK_NUM_THREADS,
+    ):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        if not os.path.exists(onnx_path):
+            export_quantized_onnx(model_name, onnx_path)
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            opts.intra_op_num_threads = num_threads
+            opts.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(onnx_path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.max_length = max_length
+
+    def predict(self, pairs: List[Tuple[str, str]]) -> Sequence[float]:
+        if not pairs:
+            return []
+        queries = [q for q, _ in pairs]
+        passages = [p for _, p in pairs]
+        # 질문은 유지하고 청크 쪽만 잘라 max_length를 맞춤
+        enc = self.tokenizer(
+            queries,
+            passages,
+            padding=True,
+            truncation="only_second",
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self.input_names}
+        logits = self.session.run(None, feeds)[0]
+        # CrossEncoder(num_labels=1)의 기본 활성화 함수(sigmoid)와 동일한 점수 범위로 맞춤
+        return _sigmoid(logits[:, 0]).tolist()
+
+
+#--------------------------------------
+# 백엔드 선택
+#--------------------------------------
+def load_cross_encoder(backend: Optional[str] = None):
+    """RERANK_BACKEND(torch|onnx)에 맞는 cross-encoder 반환 (predict(pairs) → 점수 목록)"""
+    backend = (backend or RERANK_BACKEND).lower()
+    if backend == "onnx":
+        print(f"▶ Reranker backend: ONNX Runtime int8 ({RERANK_ONNX_PATH}, max_length={RERANK_MAX_LENGTH})")
+        return OnnxCrossEncoder()
+    if backend != "torch":
+        raise ValueError(f"지원하지 않는 RERANK_BACKEND 입니다: {backend} (torch | onnx)")
+    print(f"▶ Reranker backend: PyTorch ({RERANK_MODEL}, max_length={RERANK_MAX_LENGTH})")
+    return TorchCrossEncoder()
@@ -2,24 +2,31 @@
 import time
 import re
 import json
-import random
-from typing import List, Tuple, Optional
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, List, Tuple, Optional
 
 from llama_index.core import VectorStoreIndex, StorageContext, QueryBundle
-from llama_index.core.postprocessor import SentenceTransformerRerank
-from llama_index.core.response_synthesizers import get_response_synthesizer
 from llama_index.core.schema import TextNode, NodeWithScore
-from llama_index.core.postprocessor.types import BaseNodePostprocessor
 from llama_index.core.prompts import PromptTemplate
 
 from llama_index.core import Settings
 from llama_index.llms.ollama import Ollama
 from llama_index.embeddings.ollama import OllamaEmbedding
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue, MinShould
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import Direction, Filter, FieldCondition, MatchText, MatchValue, MinShould, OrderBy
 from llama_index.vector_stores.qdrant import QdrantVectorStore
 
+from backend.services.embedding_cache import wrap_embed_model
+from backend.services.rerank_batcher import RerankBatcher
+from backend.services.inference_sidecar import INFERENCE_SIDECAR_EMBED, SidecarEmbedding, SidecarReranker, connect_sidecar
+from backend.services.rerankers import load_cross_encoder
+from backend.services.context_packer import ContextPacker, PackedContext, count_tokens
+from backend.services.qdrant_bootstrap import ensure_payload_indexes
+from backend.services.entity_index import ENTITY_INDEX_ENABLED, INGESTED_AT_FIELD, EntityMatch, entity_index
+from backend.services.metrics import RAG_REQUESTS_IN_FLIGHT, RAG_REQUESTS_TOTAL, observe_rag_timings
+
 import os
 
 
@@ -62,15 +69,30 @@ EMBED_MODEL= os.getenv("OLLAMA_EMBED_MODEL")
 RETRIEVER_TOP_K = int(os.getenv("RETRIEVER_TOP_K", "30"))     # 벡터 검색 상위 K개
 RERANKER_TOP_K = int(os.getenv("RERANKER_TOP_K", "6"))       # Reranking 후 상위 K개
 METADATA_TOP_K = int(os.getenv("METADATA_TOP_K", "10"))      # 메타데이터 검색 상우 K개
+META_CANDIDATE_FACTOR = int(os.getenv("META_CANDIDATE_FACTOR", "5"))  # 메타데이터 검색 후보 = METADATA_TOP_K × N (점수 정렬 전)
+META_MAX_PAGES = int(os.getenv("META_MAX_PAGES", "4"))  # 메타데이터 / 엔티티 검색에서 점수 정렬 전에 읽는 최대 scroll 페이지 수 (페이지 = 후보 수)
+RERANK_MAX_WORKERS = int(os.getenv("RERANK_MAX_WORKERS", "2"))  # cross-encoder 전용 스레드 수 (= 동시 실행 배치 수)
+
+# 검색 분기별 타임아웃(초) - 초과 시 해당 분기는 빈 결과로 처리하고 나머지 결과로 답변
+DENSE_BRANCH_TIMEOUT_S = float(os.getenv("DENSE_BRANCH_TIMEOUT_S", "30"))  # 벡터 검색 + Reranking
+META_BRANCH_TIMEOUT_S = float(os.getenv("META_BRANCH_TIMEOUT_S", "5"))     # 메타데이터 검색
 
 
 #-------------------------------
 #전역 변수
 client:Optional[QdrantClient] = None
+client_qdrant_async: Optional[AsyncQdrantClient] = None
 index: Optional[VectorStoreIndex]= None
 retriever= None
-reranker= None
-synth= None 
+reranker: Optional[RerankBatcher] = None   # INFERENCE_SIDECAR_SOCKET 사용 시 SidecarReranker (같은 인터페이스)
+context_packer = ContextPacker()
+
+# CPU 바운드인 cross-encoder는 이벤트 루프를 막지 않도록 전용 스레드 풀에서 실행
+# (워커 수를 제한해 동시 채팅 요청이 많아도 CPU를 모두 점유하지 않도록 함)
+_rerank_executor: Optional[ThreadPoolExecutor] = None
+
+# 엔티티 사전 주기 갱신 태스크
+_entity_refresh_task: Optional[asyncio.Task] = None
 
 
 #--------------------------------
@@ -90,48 +112,6 @@ JOSA_SUFFIX = (
 )
 
 
-#--------------------------------
-
-class MetaPrefixPostprocessor(BaseNodePostprocessor):
-    
-    def _postprocess_nodes(
-        self,
-        nodes: List[NodeWithScore],
-        query_str: Optional[str] = None,
-    ) -> List[NodeWithScore]:
-        
-        for nws in nodes:
-            node = nws.node
-            meta = node.metadata or {}
-            
-            #메타데이터에서 특허 정보 추출
-            patent_no = meta.get("patent_no","")
-            application_no = meta.get("application_number","")
-            title = meta.get("title","")
-            
-            #메타데이터에서 프리픽스 생성
-            prefix= (
-                f"[META]\n"
-                f" - 공개번호: {patent_no}\n"
-                f" - 출원번호: {application_no}\n"
-                f" - 제목:  {title}\n"
-                f"[/META]\n\n"
-            )
-            
-            #기존 텍스트 가져오기
-            orig = getattr(node,"text",None)
-            if not orig:
-                orig = node.get_content() or ""
-            
-            #이미 메타데이터가 있으면 건너뛰기
-            if orig.startswith("[META]\n"):
-                node.text= orig
-            else:
-                node.text = prefix + orig
-        
-        return nodes 
-
-
 #--------------------------------------
 # 토큰화 함수
 #--------------------------------------
@@ -159,25 +139,55 @@ def simple_tokenize_korean(query: str) -> List[str]:
 #--------------------------------------
 # 메타데이터 검색
 #--------------------------------------
-def qdrant_meta_search(
+# 이름 필드는 full-text(prefix) 인덱스로 부분 일치, 번호 필드는 keyword 인덱스로 정확 일치
+META_NAME_FIELDS = ("applicants", "inventors", "agents")   # 출원인 / 발명자 / 대리인
+META_ID_FIELDS = ("patent_no", "application_number")        # 공개번호 / 출원번호
+
+
+def _meta_match_score(payload: dict, tokens: List[str]) -> float:
+    """
+    메타데이터 검색 결과의 결정적(deterministic) 점수
+    - 번호 정확 일치 10점 / 이름 정확 일치 3점 / 이름 접두 일치 2점 / 이름 부분 포함 1점
+    """
+    score = 0.0
+    for t in tokens:
+        t_lower = t.lower()
+        for f in META_ID_FIELDS:
+            if str(payload.get(f) or "") == t:
+                score += 10.0
+        for f in META_NAME_FIELDS:
+            values = payload.get(f) or []
+            if isinstance(values, str):
+                values = [values]
+            for v in values:
+                v_lower = str(v).lower()
+                if v_lower == t_lower:
+                    score += 3.0
+                elif v_lower.startswith(t_lower):
+                    score += 2.0
+                elif t_lower in v_lower:
+                    score += 1.0
+    return score
+
+
+async def qdrant_meta_search(
     tokens: List[str],
     limit: int,
 ) -> List[NodeWithScore]:
-    
-
+    """
+    질문 토큰을 이름(부분 일치) / 번호(정확 일치) 필드에 질의하고 _meta_match_score로 정렬
+    - 후보는 최대 META_MAX_PAGES × (limit × META_CANDIDATE_FACTOR)개 - 일치 포인트가 그보다 많으면 결과는 근사 top-k
+    """
     if not tokens:
         return []
 
     # 각 토큰에 대해 여러 필드에서 검색 조건 생성
     should_conditions = []
     for t in tokens:
-        should_conditions.extend([
-            FieldCondition(key="applicants", match=MatchValue(value=t)),        # 출원인
-            FieldCondition(key="inventors", match=MatchValue(value=t)),         # 발명자
-            FieldCondition(key="agents", match=MatchValue(value=t)),           # 대리인
-            FieldCondition(key="patent_no", match=MatchValue(value=t)),        # 공개번호
-            FieldCondition(key="application_number", match=MatchValue(value=t)), # 출원번호
-        ])
+        for f in META_NAME_FIELDS:
+            should_conditions.append(FieldCondition(key=f, match=MatchText(text=t)))
+        for f in META_ID_FIELDS:
+            should_conditions.append(FieldCondition(key=f, match=MatchValue(value=t)))
 
     # 필터 생성: section이 "doc_meta"이고, 위 조건 중 최소 1개 만족
     flt = Filter(
@@ -185,25 +195,92 @@ def qdrant_meta_search(
         min_should=MinShould(conditions=should_conditions, min_count=1),
     )
 
-    # Qdrant 검색 실행
-    hits, _ = client.scroll(
-        collection_name=COLLECTION_NAME,
-        scroll_filter=flt,
-        limit=limit * 2,
-        with_payload=True,   # 메타데이터 포함
-        with_vectors=False,  # 벡터는 불필요
-    )
-    
-    
-    # 셔플
-    if hits:
-        random.shuffle(hits) #검색 결과를 무작위로 섞음
-    hits = hits[:limit]  #섞은 후 최종 limit만큼 자름
+    # Qdrant 검색 실행 (비동기 클라이언트 사용 → 이벤트 루프 블로킹 없음)
+    # scroll은 점수가 아닌 포인트 id 순이므로 첫 페이지만 보면 뒤쪽의 강한 일치를 놓침
+    # → 최대 META_MAX_PAGES 페이지까지 후보를 모은 뒤 점수 정렬 (그보다 후보가 많으면 근사 top-k)
+    hits = []
+    offset = None
+    for _ in range(META_MAX_PAGES):
+        page, offset = await client_qdrant_async.scroll(
+            collection_name=COLLECTION_NAME,
+            scroll_filter=flt,
+            limit=limit * META_CANDIDATE_FACTOR,
+            offset=offset,
+            with_payload=True,   # 메타데이터 포함
+            with_vectors=False,  # 벡터는 불필요
+        )
+        hits.extend(page)
+        if offset is None:
+            break
     
+    # 점수 정렬 (동점이면 출원번호 → 포인트 id 순) → 같은 질문이면 항상 같은 결과
+    scored = [(_meta_match_score(h.payload or {}, tokens), h) for h in hits]
+    return _scored_hits_to_nodes(scored, limit)
+
+
+async def qdrant_entity_search(
+    entities: List[EntityMatch],
+    limit: int,
+) -> List[NodeWithScore]:
+    """
+    엔티티 사전에서 찾은 (필드, 값)만으로 doc_meta 검색
+    - 번호는 keyword 인덱스로 정확 일치(MatchValue)
+    - 이름(출원인/발명자/대리인)은 필드당 인덱스가 하나뿐이라 기존 prefix full-text 인덱스를 타도록 MatchText로 후보를 좁히고,
+      payload의 원래 값과 정확히 같은 포인트만 남김 (인덱스 없는 MatchValue 전체 스캔 방지)
+    """
+    if not entities:
+        return []
+
+    should_conditions = [
+        FieldCondition(key=e.field, match=MatchText(text=e.value) if e.field in META_NAME_FIELDS else MatchValue(value=e.value))
+        for e in entities
+    ]
+    flt = Filter(
+        must=[FieldCondition(key="section", match=MatchValue(value="doc_meta"))],
+        min_should=MinShould(conditions=should_conditions, min_count=1),
+    )
+
+    # 일치한 엔티티 수로 점수화 (번호 일치는 가중치 10, 이름 일치는 3)
+    def entity_score(payload: dict) -> float:
+        score = 0.0
+        for e in entities:
+            values = payload.get(e.field) or []
+            if isinstance(values, str):
+                values = [values]
+            if e.value in values:
+                score += 10.0 if e.field in META_ID_FIELDS else 3.0
+        return score
+
+    # MatchText 후보에는 정확히 일치하지 않는 이름("LG" → "LG화학")도 섞이므로 정확 일치가 충분히 모일 때까지 몇 페이지 더 읽음
+    want = limit * META_CANDIDATE_FACTOR
+    scored = []
+    offset = None
+    for _ in range(META_MAX_PAGES):
+        page, offset = await client_qdrant_async.scroll(
+            collection_name=COLLECTION_NAME,
+            scroll_filter=flt,
+            limit=want,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        for h in page:
+            score = entity_score(h.payload or {})
+            if score > 0:  # 0 = 부분 / 접두어로만 일치한 이름 → 제외
+                scored.append((score, h))
+        if len(scored) >= want or offset is None:
+            break
+
+    return _scored_hits_to_nodes(scored, limit)
+
+
+def _scored_hits_to_nodes(scored: list, limit: int) -> List[NodeWithScore]:
+    scored.sort(key=lambda x: (-x[0], str((x[1].payload or {}).get("application_number") or ""), str(x[1].id)))
+    scored = scored[:limit]
 
     # 결과를 NodeWithScore 형태로 변환
     out = []
-    for h in hits:
+    for match_score, h in scored:
         payload = h.payload or {}
         raw = payload.get("_node_content") or payload.get("text") or ""
 
@@ -220,8 +297,8 @@ def qdrant_meta_search(
         meta = {k: v for k, v in payload.items() if k not in ("text", "_node_content")}
         
         # TextNode 생성
-        node = TextNode(text=text, metadata=meta)
-        out.append(NodeWithScore(node=node, score=0.0))
+        node = TextNode(id_=str(h.id), text=text, metadata=meta)
+        out.append(NodeWithScore(node=node, score=match_score))
     
     return out
 
@@ -308,7 +385,7 @@ def print_sources(nodes: List[NodeWithScore]) -> List[dict]:
 #             base_url=OLLAMA_BASE_URL
 #         )
 async def initialize_llamaindex():
-    global client, index, retriever, reranker, synth
+    global client, client_qdrant_async, index, retriever, reranker, _rerank_executor, _entity_refresh_task
     
     start = time.time()
     print(f"▶ Initializing LlamaIndex with Ollama ({LLM_MODEL})...")
@@ -323,21 +400,49 @@ async def initialize_llamaindex():
             request_timeout=600.0,
         )
         
-        #2. Embedding 설정 
-        Settings.embed_model = OllamaEmbedding(
-            model_name = EMBED_MODEL,
-            base_url = OLLAMA_BASE_URL,
-            request_timeout=900.0,
-        )
+        # 추론 사이드카 (설정 + 연결 가능할 때만) - 워커 여러 개가 reranker/임베딩 모델 하나를 공유
+        sidecar = await connect_sidecar()
+        
+        #2. Embedding 설정 (동일 질문 재임베딩을 피하도록 캐시 래퍼 적용)
+        if sidecar is not None and INFERENCE_SIDECAR_EMBED and sidecar.info.get("embed_model"):
+            Settings.embed_model = wrap_embed_model(SidecarEmbedding(sidecar, model_name=sidecar.info["embed_model"]))
+        else:
+            Settings.embed_model = wrap_embed_model(OllamaEmbedding(
+                model_name = EMBED_MODEL,
+                base_url = OLLAMA_BASE_URL,
+                request_timeout=900.0,
+            ))
         
         # --------------------------------------------------
         
        # 4. Qdrant 클라이언트 연결
         client = QdrantClient(url=QDRANT_URL, timeout=60)
+        client_qdrant_async = AsyncQdrantClient(url=QDRANT_URL, timeout=60)
         print("▶ Qdrant Connected")
         
-        # 5. Vector Store & Index 생성
-        vector_store = QdrantVectorStore(client=client, collection_name=COLLECTION_NAME)
+        # doc_meta 검색용 payload 인덱스 (keyword / full-text) 보장 - 실패해도 검색은 동작
+        try:
+            await ensure_payload_indexes(client_qdrant_async, COLLECTION_NAME)
+        except Exception as e:
+            print(f"⚠️ Qdrant payload 인덱스 생성 실패 (필터 스캔으로 동작): {e}")
+        
+        # 질문 → 메타데이터 필터 변환용 엔티티 사전 (이후 주기적으로 증감분만 반영)
+        if ENTITY_INDEX_ENABLED:
+            try:
+                await entity_index.refresh_from_qdrant(client_qdrant_async, COLLECTION_NAME, force=True)
+            except Exception as e:
+                print(f"⚠️ 엔티티 사전 적재 실패 (토큰 기반 메타데이터 검색으로 동작): {e}")
+            if _entity_refresh_task is None or _entity_refresh_task.done():
+                _entity_refresh_task = asyncio.create_task(
+                    entity_index.run_refresh_loop(client_qdrant_async, COLLECTION_NAME)
+                )
+        
+        # 5. Vector Store & Index 생성 (aretrieve가 비동기 클라이언트를 사용하도록 aclient 전달)
+        vector_store = QdrantVectorStore(
+            client=client,
+            aclient=client_qdrant_async,
+            collection_name=COLLECTION_NAME,
+        )
         storage_context = StorageContext.from_defaults(vector_store=vector_store)
         
         index = VectorStoreIndex.from_vector_store(
@@ -348,16 +453,24 @@ async def initialize_llamaindex():
         # 6. 검색 및 엔진 구성 요소 초기화
         retriever = index.as_retriever(similarity_top_k=RETRIEVER_TOP_K)
         
-        reranker = SentenceTransformerRerank(
-            model="cross-encoder/ms-marco-MiniLM-L-6-v2",
-            top_n=RERANKER_TOP_K,
-            device = "cpu"
-        )
-        
-        synth = get_response_synthesizer(
-            response_mode="compact",
-            text_qa_template=KOREAN_SYSTEM_PROMPT
-        )
+        # 동시 요청의 (질문, 청크) 쌍을 모아 한 번의 forward pass로 점수화하는 배처
+        # (RERANK_BACKEND=torch|onnx 로 cross-encoder 구현 선택)
+        # (모델 로딩은 CPU/디스크 작업이므로 스레드에서 수행 - 백그라운드 초기화 중에도 특허 검색이 막히지 않도록)
+        # (사이드카 사용 시 모델은 사이드카에만 올리고, 배치도 여러 워커의 요청을 사이드카에서 모음)
+        if sidecar is not None:
+            reranker = SidecarReranker(sidecar, top_n=RERANKER_TOP_K)
+        else:
+            cross_encoder = await asyncio.to_thread(load_cross_encoder)
+            _rerank_executor = ThreadPoolExecutor(
+                max_workers=RERANK_MAX_WORKERS,
+                thread_name_prefix="rerank",
+            )
+            reranker = RerankBatcher(
+                score_pairs=cross_encoder.predict,
+                top_n=RERANKER_TOP_K,
+                executor=_rerank_executor,
+                max_concurrent_batches=RERANK_MAX_WORKERS,
+            )
         
         # 7. 소요 시간 계산
         elapsed = time.time() - start
@@ -372,92 +485,290 @@ async def initialize_llamaindex():
 
 
 #--------------------------------------
-# 쿼리 실행 함수
+# Reranking (스레드 풀 실행)
 #--------------------------------------
-async def run_llamaindex_query(query: str, top_k: int = 30) -> Tuple[str, List[dict]]:
-    overall_start = time.time()
+async def rerank_nodes(nodes: List[NodeWithScore], qb: QueryBundle) -> List[NodeWithScore]:
+    """cross-encoder 추론은 배처를 거쳐 전용 스레드 풀에서 실행되므로 이벤트 루프를 막지 않는다."""
+    return await reranker.rerank(qb.query_str, nodes)
+
 
-    if retriever is None or synth is None:
+#--------------------------------------
+# 검색 단계 (1~4단계: 벡터 검색 → Reranking → 메타데이터 검색 → 컨텍스트 패킹)
+#--------------------------------------
+def _ensure_initialized() -> None:
+    if retriever is None or reranker is None:
         raise RuntimeError(
             "챗봇 검색 서비스가 초기화되지 않았습니다. "
             "Qdrant/Ollama 연결 또는 LlamaIndex 초기화에 실패했을 수 있습니다. 서버 로그를 확인하거나 재시작해 주세요."
         )
 
+
+async def _dense_branch(qb: QueryBundle, timings: dict) -> List[NodeWithScore]:
+    """1~2단계: 벡터 검색 → Reranking (Reranking은 벡터 검색 결과에 의존)"""
+    retrieve_start = time.time()
+    base_nodes = await retriever.aretrieve(qb)
+    retrieve_elapsed = time.time() - retrieve_start
+    timings["retrieve_ms"] = round(retrieve_elapsed * 1000.0, 1)
+    print(f"⏱️  [1단계: 벡터 검색] {retrieve_elapsed:.2f}초 → {len(base_nodes)}개 노드")
+    
+    rerank_start = time.time()
+    reranked_nodes = await rerank_nodes(base_nodes, qb)
+    rerank_elapsed = time.time() - rerank_start
+    timings["rerank_ms"] = round(rerank_elapsed * 1000.0, 1)
+    print(f"⏱️  [2단계: Reranking] {rerank_elapsed:.2f}초 → {len(reranked_nodes)}개 노드")
+    return reranked_nodes
+
+
+async def _meta_branch(query: str, timings: dict) -> List[NodeWithScore]:
+    """3단계: 메타데이터 검색 (벡터 검색과 독립적이므로 동시에 실행)"""
+    meta_start = time.time()
+    
+    # 엔티티 사전에서 알려진 출원인/발명자/번호를 찾으면 해당 필드 정확 일치 검색도 함께 실행
+    entities = entity_index.extract(query) if entity_index.ready else []
+    timings["entity_extract_ms"] = round((time.time() - meta_start) * 1000.0, 3)
+    tokens = simple_tokenize_korean(query)
+    print(f"🔎 [토큰화 완료] {tokens}")
+    if entities:
+        print(f"🔎 [엔티티 추출] {[(e.field, e.value) for e in entities]}")
+        # 엔티티 결과가 틀렸어도 토큰 검색 결과는 남도록 두 검색을 동시에 실행해 합침 (엔티티 일치 우선)
+        entity_nodes, token_nodes = await asyncio.gather(
+            qdrant_entity_search(entities=entities, limit=METADATA_TOP_K),
+            qdrant_meta_search(tokens=tokens, limit=METADATA_TOP_K),
+        )
+        meta_nodes = _merge_meta_nodes(entity_nodes, token_nodes, METADATA_TOP_K)
+    else:
+        meta_nodes = await qdrant_meta_search(tokens=tokens, limit=METADATA_TOP_K)
+    meta_elapsed = time.time() - meta_start
+    timings["meta_ms"] = round(meta_elapsed * 1000.0, 1)
+    print(f"⏱️  [3단계: 메타데이터 검색] {meta_elapsed:.2f}초 → {len(meta_nodes)}개 노드")
+    return meta_nodes
+
+
+def _merge_meta_nodes(first: List[NodeWithScore], second: List[NodeWithScore], limit: int) -> List[NodeWithScore]:
+    """앞 목록 순서를 우선해 포인트 id 기준으로 중복 없이 합침"""
+    merged: List[NodeWithScore] = []
+    seen = set()
+    for n in list(first) + list(second):
+        if n.node.node_id in seen:
+            continue
+        seen.add(n.node.node_id)
+        merged.append(n)
+    return merged[:limit]
+
+
+async def _run_branch(name: str, coro, timeout_s: float, timings: dict) -> List[NodeWithScore]:
+    """분기 하나를 타임아웃과 함께 실행. 실패/초과 시 빈 결과로 대체해 다른 분기 결과로 답변을 이어간다."""
+    try:
+        return await asyncio.wait_for(coro, timeout=timeout_s)
+    except asyncio.TimeoutError:
+        timings[f"{name}_timeout"] = True
+        print(f"⚠️  [{name} 분기] {timeout_s:.1f}초 타임아웃 → 빈 결과로 대체")
+        return []
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # Qdrant 필터 오류 / Reranking 예외 / 사이드카 재시작 등 - 한 분기 실패로 요청 전체를 실패시키지 않음
+        timings[f"{name}_error"] = repr(e)
+        print(f"⚠️  [{name} 분기] 실패 → 빈 결과로 대체: {e!r}")
+        return []
+
+
+async def retrieve_context(query: str, timings: dict) -> Tuple[QueryBundle, PackedContext]:
+    """LLM 호출 전까지의 검색 단계를 수행하고 단계별 소요 시간(ms)을 timings에 기록"""
+    # 1. 쿼리 번들 생성
+    qb = QueryBundle(query)
+    
+    # 2. 벡터 검색(+Reranking)과 메타데이터 검색을 동시에 실행한 뒤 합류
+    fanout_start = time.time()
+    reranked_nodes, meta_nodes = await asyncio.gather(
+        _run_branch("dense", _dense_branch(qb, timings), DENSE_BRANCH_TIMEOUT_S, timings),
+        _run_branch("meta", _meta_branch(query, timings), META_BRANCH_TIMEOUT_S, timings),
+    )
+    fanout_elapsed = time.time() - fanout_start
+    timings["fanout_ms"] = round(fanout_elapsed * 1000.0, 1)
+    print(f"⏱️  [1~3단계 병렬 합류] {fanout_elapsed:.2f}초")
+    
+    # 3. 컨텍스트 패킹: 중복 제거 + 특허별 [META] 1회 + 토큰 예산 내로 자르기 (LLM 1회 호출 보장)
+    combine_start = time.time()
+    combined_nodes = list(reranked_nodes) + list(meta_nodes)
+    packed = context_packer.pack(combined_nodes)
+    combine_elapsed = time.time() - combine_start
+    timings["combine_ms"] = round(combine_elapsed * 1000.0, 1)
+    timings.update(packed.stats())
+    print(
+        f"⏱️  [4단계: 컨텍스트 패킹] {combine_elapsed:.2f}초 → "
+        f"{len(combined_nodes)}개 중 {len(packed.nodes)}개 노드 / 특허 {packed.patents}건 / {packed.context_tokens} 토큰"
+    )
+    
+    return qb, packed
+
+
+def build_prompt(qb: QueryBundle, packed: PackedContext, timings: dict) -> str:
+    prompt = KOREAN_SYSTEM_PROMPT.format(context_str=packed.text, query_str=qb.query_str)
+    timings["prompt_tokens"] = count_tokens(prompt)
+    return prompt
+
+
+def append_sources_to_answer(answer: str, sources: List[tuple]) -> str:
+    """사용자가 바로 볼 수 있도록 답변 하단에 출처를 텍스트로 붙여준다."""
+    if not sources:
+        return answer
+    sources_lines: list[str] = ["\n\n[출처]"]
+    for idx, (pno, ano, title) in enumerate(sources, 1):
+        line = f"{idx}. 공개번호: {pno or '-'} / 출원번호: {ano or '-'} / 제목: {title or '-'}"
+        sources_lines.append(line)
+    return answer + "\n".join(sources_lines)
+
+
+def _print_error_banner() -> None:
+    # 에러 발생 시 상세 로그를 터미널에 강제로 찍습니다.
+    print("\n" + "!"*30 + " ERROR 발생 " + "!"*30)
+    import traceback
+    traceback.print_exc() # 어느 줄에서 에러가 났는지 알려줌
+    print("!"*72 + "\n")
+
+
+#--------------------------------------
+# 캐시 보조 함수 (질문 임베딩 / 컬렉션 버전)
+#--------------------------------------
+async def embed_query(query: str) -> List[float]:
+    """질문 임베딩 (답변 캐시의 유사도 조회용)"""
+    return await Settings.embed_model.aget_query_embedding(query)
+
+
+async def get_collection_version() -> Tuple:
+    """
+    컬렉션 내용이 바뀌었는지 판단하기 위한 버전 값 (포인트 수, 가장 최근 ingested_at)
+    - 세그먼트 수 / 상태(green↔yellow)는 최적화 병합 / 색인 중에도 바뀌므로 제외
+    - 같은 id로 다시 적재해 포인트 수가 그대로여도 ingested_at이 커지므로 변경으로 감지
+    """
+    info = await client_qdrant_async.get_collection(COLLECTION_NAME)
+    return (info.points_count, await _latest_ingested_at())
+
+
+async def _latest_ingested_at() -> Optional[int]:
+    # ingested_at integer 인덱스로 내림차순 1건만 조회 (실패하면 엔티티 사전이 마지막으로 본 값)
+    try:
+        hits, _ = await client_qdrant_async.scroll(
+            collection_name=COLLECTION_NAME,
+            limit=1,
+            order_by=OrderBy(key=INGESTED_AT_FIELD, direction=Direction.DESC),
+            with_payload=[INGESTED_AT_FIELD],
+            with_vectors=False,
+        )
+    except Exception as e:
+        print(f"⚠️ ingested_at 조회 실패 (엔티티 사전 워터마크 사용): {e}")
+        return entity_index.watermark
+    return (hits[0].payload or {}).get(INGESTED_AT_FIELD) if hits else None
+
+
+#--------------------------------------
+# 쿼리 실행 함수
+#--------------------------------------
+async def run_llamaindex_query(query: str, top_k: int = 30, timings: Optional[dict] = None) -> Tuple[str, List[dict]]:
+    """timings를 넘기면 단계별 소요 시간(ms)과 토큰 수를 채워준다."""
+    overall_start = time.time()
+    _ensure_initialized()
+
     print(f"\n{'#'*70}")
     print(f"🔍 [LlamaIndex RAG 시작] Query: '{query}'")
     print(f"{'#'*70}")
     
+    timings = {} if timings is None else timings
+    RAG_REQUESTS_IN_FLIGHT.inc(mode="sync")
     try:
-        # 1. 쿼리 번들 생성
-        qb = QueryBundle(query)
-        
-        # 2. 벡터 검색
-        retrieve_start = time.time()
-        base_nodes = retriever.retrieve(qb)
-        retrieve_elapsed = time.time() - retrieve_start
-        print(f"⏱️  [1단계: 벡터 검색] {retrieve_elapsed:.2f}초 → {len(base_nodes)}개 노드")
-        
-        # 3. Reranking
-        rerank_start = time.time()
-        reranked_nodes = reranker.postprocess_nodes(base_nodes, query_bundle=qb)
-        rerank_elapsed = time.time() - rerank_start
-        print(f"⏱️  [2단계: Reranking] {rerank_elapsed:.2f}초 → {len(reranked_nodes)}개 노드")
+        qb, packed = await retrieve_context(query, timings)
         
-        # 4. 메타데이터 검색 (가장 의심되는 구간 1)
-        meta_start = time.time()
-        tokens = simple_tokenize_korean(query)
-        print(f"🔎 [토큰화 완료] {tokens}")
-        
-        # qdrant_meta_search 내부에서 에러가 나는지 확인
-        meta_nodes = qdrant_meta_search(tokens=tokens, limit=METADATA_TOP_K)
-        meta_elapsed = time.time() - meta_start
-        print(f"⏱️  [3단계: 메타데이터 검색] {meta_elapsed:.2f}초 → {len(meta_nodes)}개 노드")
-        
-        # 5. 노드 결합 및 프리픽스 추가
-        combine_start = time.time()
-        combined_nodes = list(reranked_nodes) + list(meta_nodes)
-        
-        postprocessor = MetaPrefixPostprocessor()
-        combined_nodes = postprocessor.postprocess_nodes(combined_nodes, query_str=query)
-        combine_elapsed = time.time() - combine_start
-        print(f"⏱️  [4단계: 노드 결합] {combine_elapsed:.2f}초")
-        
-        # 6. LLM 답변 생성 (가장 의심되는 구간 2 - OpenAI 호출)
+        # 6. LLM 답변 생성 (패킹된 컨텍스트로 단 한 번 호출)
         llm_start = time.time()
-        print(f"🧠 [5단계: LLM 답변 생성 중...]")
+        prompt = build_prompt(qb, packed, timings)
+        print(f"🧠 [5단계: LLM 답변 생성 중...] prompt {timings['prompt_tokens']} 토큰")
         
         # 여기서 멈춘다면 API 키 문제나 네트워크 문제입니다.
-        resp = synth.synthesize(qb, combined_nodes)
-        answer = str(resp)
+        resp = await Settings.llm.acomplete(prompt)
+        answer = resp.text
         
         llm_elapsed = time.time() - llm_start
+        timings["llm_ms"] = round(llm_elapsed * 1000.0, 1)
         print(f"⏱️  [5단계: LLM 답변] {llm_elapsed:.2f}초")
         
-        # 7. 출처 추출
-        sources = print_sources(combined_nodes)
+        # 7. 출처 추출 (실제 컨텍스트에 들어간 노드 기준)
+        sources = print_sources(packed.nodes)
         overall_elapsed = time.time() - overall_start
+        timings["total_ms"] = round(overall_elapsed * 1000.0, 1)
         print(f"✅ [전체 완료] {overall_elapsed:.2f}초\n")
+        observe_rag_timings(timings)
+        RAG_REQUESTS_TOTAL.inc(mode="sync", outcome="ok")
 
-        # 8. 사용자가 바로 볼 수 있도록 답변 하단에 출처를 텍스트로 붙여준다.
-        if sources:
-            sources_lines: list[str] = ["\n\n[출처]"]
-            for idx, (pno, ano, title) in enumerate(sources, 1):
-                line = f"{idx}. 공개번호: {pno or '-'} / 출원번호: {ano or '-'} / 제목: {title or '-'}"
-                sources_lines.append(line)
-            answer_with_sources: str = answer + "\n".join(sources_lines)
-        else:
-            answer_with_sources = answer
-
-        return answer_with_sources, sources
+        # 8. 답변 하단에 출처 텍스트 추가
+        return append_sources_to_answer(answer, sources), sources
 
     except Exception as e:
-        # 에러 발생 시 상세 로그를 터미널에 강제로 찍습니다.
-        print("\n" + "!"*30 + " ERROR 발생 " + "!"*30)
-        import traceback
-        traceback.print_exc() # 어느 줄에서 에러가 났는지 알려줌
-        print("!"*72 + "\n")
+        RAG_REQUESTS_TOTAL.inc(mode="sync", outcome="error")
+        _print_error_banner()
         # 에러를 다시 던져서 500 응답이 나가게 함
         raise e
+    finally:
+        RAG_REQUESTS_IN_FLIGHT.dec(mode="sync")
+
+
+#--------------------------------------
+# 스트리밍 쿼리 실행 함수 (SSE용)
+#--------------------------------------
+async def stream_llamaindex_query(query: str) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    검색이 끝나는 즉시 출처를 내보내고, 이후 LLM 토큰을 생성되는 대로 내보낸다.
+    yield 형식: ("sources", [...]) → ("token", "...") * N → ("done", {timings})
+    """
+    overall_start = time.time()
+    _ensure_initialized()
+
+    print(f"\n{'#'*70}")
+    print(f"🔍 [LlamaIndex RAG 스트리밍 시작] Query: '{query}'")
+    print(f"{'#'*70}")
+
+    timings: dict = {}
+    RAG_REQUESTS_IN_FLIGHT.inc(mode="stream")
+    try:
+        qb, packed = await retrieve_context(query, timings)
+
+        sources = print_sources(packed.nodes)
+        timings["sources_ms"] = round((time.time() - overall_start) * 1000.0, 1)
+        yield "sources", sources
+
+        # 5단계: LLM 토큰 스트리밍 (패킹된 컨텍스트로 단 한 번 호출)
+        llm_start = time.time()
+        prompt = build_prompt(qb, packed, timings)
+        print(f"🧠 [5단계: LLM 스트리밍 생성 중...] prompt {timings['prompt_tokens']} 토큰")
+        first_token_at: Optional[float] = None
+        token_count = 0
+        async for chunk in await Settings.llm.astream_complete(prompt):
+            delta = chunk.delta or ""
+            if not delta:
+                continue
+            if first_token_at is None:
+                first_token_at = time.time()
+            token_count += 1
+            yield "token", delta
+
+        llm_elapsed = time.time() - llm_start
+        timings["llm_ms"] = round(llm_elapsed * 1000.0, 1)
+        if first_token_at is not None:
+            timings["llm_first_token_ms"] = round((first_token_at - llm_start) * 1000.0, 1)
+        timings["total_ms"] = round((time.time() - overall_start) * 1000.0, 1)
+        print(f"⏱️  [5단계: LLM 답변] {llm_elapsed:.2f}초 ({token_count}개 청크)")
+        print(f"✅ [전체 완료] {timings['total_ms'] / 1000.0:.2f}초\n")
+        observe_rag_timings(timings)
+        RAG_REQUESTS_TOTAL.inc(mode="stream", outcome="ok")
+
+        yield "done", {"timings": timings, "chunks": token_count}
+
+    except Exception:
+        RAG_REQUESTS_TOTAL.inc(mode="stream", outcome="error")
+        _print_error_banner()
+        raise
+    finally:
+        RAG_REQUESTS_IN_FLIGHT.dec(mode="stream")
 
 
     
@@ -0,0 +1,596 @@
+"""
+챗봇 대화 세션 저장소
+
+- memory: 프로세스 메모리 LRU + TTL (단독 동작, 재시작 시 내역 소실)
+- mongo: 메모리 LRU를 읽기 캐시로 두고 MongoDB에 write-behind로 저장
+  → /ask 경로에서는 메모리에 추가하고 대기열에 넣기만 함 (DB 왕복 없음)
+  → 백그라운드 태스크가 CHAT_SESSION_FLUSH_MS마다 (또는 대기 세션 수가 CHAT_SESSION_FLUSH_BATCH에 도달하면) bulk_write
+  → 프로세스가 비정상 종료되면 최대 CHAT_SESSION_FLUSH_MS 동안의 메시지 (최대 CHAT_SESSION_MAX_PENDING개)가 유실될 수 있음
+
+MongoDB 문서 구조 (세션 문서가 대화 길이에 따라 커지지 않도록 메시지를 고정 크기 버킷으로 나눔)
+- chat_history:         세션 1개당 문서 1개 {session_id, title, created_at, updated_at, expires_at, message_count}
+- chat_history_buckets: 버킷 1개당 문서 1개 {session_id, bucket, messages[≤CHAT_HISTORY_BUCKET_SIZE], updated_at, expires_at}
+  메시지 seq(세션 내 0부터의 순번)는 세션 문서의 message_count를 $inc로 예약해 정하므로 워커가 여러 개여도 겹치지 않음
+  → seq // 버킷 크기 = 버킷 번호, 페이지 조회는 최대 2개 버킷만 읽음
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from backend.services.metrics import SESSION_STORE_DROPPED, SESSION_STORE_FLUSH_SECONDS, SESSION_STORE_PENDING
+from backend.services.page_cursor import decode_cursor, encode_cursor
+
+
+#-----------------------------------
+#환경 변수
+CHAT_SESSION_STORE = (os.getenv("CHAT_SESSION_STORE") or "memory").strip().lower()  # memory | mongo
+CHAT_HISTORY_TTL_DAYS = int(os.getenv("CHAT_HISTORY_TTL_DAYS", "30"))
+CHAT_SESSION_MAX_SESSIONS = int(os.getenv("CHAT_SESSION_MAX_SESSIONS", "10000"))  # 메모리에 유지할 최대 세션 수 (LRU)
+CHAT_SESSION_MAX_MESSAGES = int(os.getenv("CHAT_SESSION_MAX_MESSAGES", "200"))    # 세션당 메모리에 유지할 최근 메시지 수
+CHAT_SESSION_TTL_S = float(os.getenv("CHAT_SESSION_TTL_S", str(CHAT_HISTORY_TTL_DAYS * 86400)))  # 마지막 대화 후 세션 만료 시간
+CHAT_SESSION_FLUSH_MS = float(os.getenv("CHAT_SESSION_FLUSH_MS", "500"))          # write-behind 주기 (= 비정상 종료 시 유실 가능 구간)
+CHAT_SESSION_FLUSH_BATCH = int(os.getenv("CHAT_SESSION_FLUSH_BATCH", "200"))      # bulk_write 1회에 넣을 최대 세션 수
+CHAT_SESSION_MAX_PENDING = int(os.getenv("CHAT_SESSION_MAX_PENDING", "5000"))     # 저장 대기 메시지 상한 (초과 시 오래된 것부터 버림)
+CHAT_HISTORY_BUCKET_SIZE = int(os.getenv("CHAT_HISTORY_BUCKET_SIZE", "50"))       # 버킷 문서 1개에 담는 메시지 수
+CHAT_HISTORY_PAGE_SIZE = int(os.getenv("CHAT_HISTORY_PAGE_SIZE", "50"))           # 세션 목록 / 대화 내역 기본 페이지 크기
+
+SESSIONS_COLLECTION = "chat_history"
+BUCKETS_COLLECTION = "chat_history_buckets"
+TITLE_MAX_CHARS = 25
+_EPOCH = datetime(1970, 1, 1)
+
+
+def make_title(user_query: str) -> str:
+    # 세션 제목: 첫 질문이 너무 길면 자름
+    return (user_query[:TITLE_MAX_CHARS] + "...") if len(user_query) > TITLE_MAX_CHARS else user_query
+
+
+def make_turn(user_query: str, ai_answer: str) -> List[dict]:
+    now = time.time()
+    return [
+        {"role": "user", "content": user_query, "timestamp": now},
+        {"role": "assistant", "content": ai_answer, "timestamp": now},
+    ]
+
+
+def _to_ms(value: datetime) -> int:
+    # MongoDB datetime은 ms 정밀도의 naive UTC → 정수 ms로 정확히 왕복되도록 변환
+    return (value - _EPOCH) // timedelta(milliseconds=1)
+
+
+def _from_ms(ms: int) -> datetime:
+    return _EPOCH + timedelta(milliseconds=ms)
+
+
+@dataclass
+class SessionRecord:
+    session_id: str
+    title: str
+    created_at: float
+    updated_at: float
+    messages: List[dict] = field(default_factory=list)   # 최근 CHAT_SESSION_MAX_MESSAGES개
+    message_count: int = 0                               # 잘려 나간 것까지 포함한 전체 메시지 수
+    complete: bool = True                                # False면 이 프로세스가 모르는 이전 내역이 DB에 있을 수 있음
+
+    def has_all(self, limit: Optional[int] = None) -> bool:
+        """메모리만으로 (최근 limit개 또는 전체) 내역을 돌려줄 수 있는지"""
+        if limit is not None and len(self.messages) >= limit:
+            return True
+        return self.complete and self.message_count == len(self.messages)
+
+    def summary(self) -> dict:
+        return {"session_id": self.session_id, "title": self.title, "updated_at": int(self.updated_at * 1000)}
+
+
+#--------------------------------------
+# 메모리 저장소 (LRU + TTL)
+#--------------------------------------
+class MemorySessionStore:
+    backend = "memory"
+
+    def __init__(
+        self,
+        max_sessions: int = CHAT_SESSION_MAX_SESSIONS,
+        max_messages: int = CHAT_SESSION_MAX_MESSAGES,
+        ttl_s: float = CHAT_SESSION_TTL_S,
+    ):
+        self.max_sessions = max(1, max_sessions)
+        self.max_messages = max(1, max_messages)
+        self.ttl_s = ttl_s
+        self._sessions: "OrderedDict[str, SessionRecord]" = OrderedDict()
+
+        # 통계
+        self.evictions = 0
+        self.expirations = 0
+
+    # --- 내부 헬퍼 (동기) ---
+    def peek_record(self, session_id: str) -> Optional[SessionRecord]:
+        """TTL만 확인하고 LRU 순서는 건드리지 않음 (목록 조회처럼 '사용'이 아닌 읽기용)"""
+        record = self._sessions.get(session_id)
+        if record is None:
+            return None
+        if self.ttl_s > 0 and time.time() - record.updated_at > self.ttl_s:
+            del self._sessions[session_id]
+            self.expirations += 1
+            return None
+        return record
+
+    def get_record(self, session_id: str) -> Optional[SessionRecord]:
+        record = self.peek_record(session_id)
+        if record is not None:
+            self._sessions.move_to_end(session_id)
+        return record
+
+    def put_record(self, record: SessionRecord) -> SessionRecord:
+        record.messages = record.messages[-self.max_messages:]
+        self._sessions[record.session_id] = record
+        self._sessions.move_to_end(record.session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+        return record
+
+    def append(self, session_id: str, messages: List[dict], title: str, complete_if_new: bool = True) -> SessionRecord:
+        now = time.time()
+        record = self.get_record(session_id)
+        if record is None:
+            record = SessionRecord(session_id=session_id, title=title, created_at=now, updated_at=now, complete=complete_if_new)
+        if record.complete:
+            # 전체 내역을 아는 세션만 seq 부여 (mongo 캐시의 seq는 DB가 예약)
+            messages = [{**m, "seq": record.message_count + i} for i, m in enumerate(messages)]
+        record.messages.extend(messages)
+        record.message_count += len(messages)
+        record.updated_at = now
+        return self.put_record(record)
+
+    def remove(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    # --- 저장소 인터페이스 ---
+    async def start(self) -> None:
+        pass
+
+    async def append_messages(self, session_id: str, messages: List[dict], title: str) -> None:
+        self.append(session_id, messages, title)
+
+    async def list_sessions(self, limit: int = CHAT_HISTORY_PAGE_SIZE, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """(updated_at, session_id) 내림차순 세션 목록 한 페이지 + 다음 페이지 커서"""
+        after = decode_cursor(cursor, "u", "s") if cursor else None
+        # 사이드바 목록 조회가 모든 세션을 최근 사용으로 만들지 않도록 peek (LRU 제거 순서 유지)
+        summaries = [r.summary() for r in (self.peek_record(sid) for sid in list(self._sessions)) if r is not None]
+        summaries.sort(key=lambda x: (x["updated_at"], x["session_id"]), reverse=True)
+        if after is not None:
+            summaries = [x for x in summaries if (x["updated_at"], x["session_id"]) < (after["u"], after["s"])]
+        page = summaries[:limit]
+        next_cursor = encode_cursor({"u": page[-1]["updated_at"], "s": page[-1]["session_id"]}) if len(summaries) > limit else None
+        return page, next_cursor
+
+    async def get_page(self, session_id: str, limit: Optional[int] = CHAT_HISTORY_PAGE_SIZE, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """seq < 커서인 메시지 중 최근 limit개 (시간순) + 더 이전 페이지 커서"""
+        before = decode_cursor(cursor, "before")["before"] if cursor else None
+        record = self.get_record(session_id)
+        if record is None:
+            return [], None
+        messages = [m for m in record.messages if before is None or m["seq"] < before]
+        page = messages[-limit:] if limit else messages
+        next_cursor = encode_cursor({"before": page[0]["seq"]}) if page and len(messages) > len(page) else None
+        return page, next_cursor
+
+    async def get_messages(self, session_id: str, limit: Optional[int] = None) -> List[dict]:
+        record = self.get_record(session_id)
+        if record is None:
+            return []
+        return list(record.messages[-limit:] if limit else record.messages)
+
+    async def get_session(self, session_id: str) -> Optional[SessionRecord]:
+        return self.get_record(session_id)
+
+    async def delete_session(self, session_id: str) -> bool:
+        return self.remove(session_id)
+
+    async def update_title(self, session_id: str, title: str) -> bool:
+        record = self.get_record(session_id)
+        if record is None:
+            return False
+        record.title = title
+        return True
+
+    async def flush(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": self.backend,
+            "sessions": len(self._sessions),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+#--------------------------------------
+# MongoDB 저장소 (메모리 캐시 + write-behind + 메시지 버킷)
+#--------------------------------------
+@dataclass
+class _PendingWrite:
+    session_id: str
+    title: str
+    created_at: datetime
+    updated_at: datetime
+    messages: List[dict] = field(default_factory=list)   # seq가 있으면 이미 예약된 메시지 (재시도 시 다시 예약하지 않음)
+
+
+class MongoSessionStore:
+    backend = "mongo"
+
+    def __init__(
+        self,
+        db,
+        cache: Optional[MemorySessionStore] = None,
+        flush_interval_ms: float = CHAT_SESSION_FLUSH_MS,
+        flush_batch: int = CHAT_SESSION_FLUSH_BATCH,
+        max_pending: int = CHAT_SESSION_MAX_PENDING,
+        ttl_days: int = CHAT_HISTORY_TTL_DAYS,
+        bucket_size: int = CHAT_HISTORY_BUCKET_SIZE,
+    ):
+        self.sessions = db[SESSIONS_COLLECTION]
+        self.buckets = db[BUCKETS_COLLECTION]
+        self.cache = cache or MemorySessionStore()
+        self.flush_interval_s = max(0.01, flush_interval_ms / 1000.0)
+        self.flush_batch = max(1, flush_batch)
+        self.max_pending = max(1, max_pending)
+        self.ttl = timedelta(days=ttl_days)
+        self.bucket_size = max(1, bucket_size)
+
+        # 세션별로 합쳐진 저장 대기 메시지 (오래된 세션부터)
+        self._pending: "OrderedDict[str, _PendingWrite]" = OrderedDict()
+        self._pending_messages = 0
+        self._full: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._index_task: Optional[asyncio.Task] = None   # 참조를 잡아 두지 않으면 실행 중 GC될 수 있음
+
+        # 통계
+        self.flushes = 0
+        self.flushed_messages = 0
+        self.flush_errors = 0
+        self.dropped_messages = 0
+
+    # --------------------------------------
+    # 시작 / 종료
+    # --------------------------------------
+
+    async def start(self) -> None:
+        # 인덱스 생성은 DB 응답을 기다리지 않도록 백그라운드로 (서버 기동을 막지 않음)
+        if self._index_task is None or self._index_task.done():
+            self._index_task = asyncio.create_task(self.ensure_indexes(), name="session-store-indexes")
+        self._ensure_worker()
+
+    async def ensure_indexes(self) -> None:
+        """
+        조회 / 페이지네이션 / TTL 삭제용 인덱스 생성
+        - 세션: session_id(unique), (updated_at, session_id) 내림차순 (목록 keyset 페이지), expires_at TTL
+        - 버킷: (session_id, bucket)(unique), expires_at TTL
+        """
+        from pymongo import ASCENDING, DESCENDING, IndexModel
+        from pymongo.errors import OperationFailure
+
+        plans = (
+            (self.sessions, [
+                IndexModel([("session_id", ASCENDING)], unique=True, name="chat_history_session_id_uniq"),
+                IndexModel([("updated_at", DESCENDING), ("session_id", DESCENDING)], name="chat_history_updated_at_idx"),
+                IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="chat_history_expires_at_ttl"),
+            ]),
+            (self.buckets, [
+                IndexModel([("session_id", ASCENDING), ("bucket", ASCENDING)], unique=True, name="chat_history_buckets_session_bucket_uniq"),
+                IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="chat_history_buckets_expires_at_ttl"),
+            ]),
+        )
+        for collection, indexes in plans:
+            try:
+                names = await collection.create_indexes(indexes)
+                print(f"✅ MongoDB indexes verified: {collection.name} {names}")
+            except OperationFailure as e:
+                # 같은 키/이름으로 옵션이 다른 인덱스가 이미 있으면 자동으로 지우지 않고 알림 (운영 데이터 보호)
+                print(f"⚠️ MongoDB index conflict on {collection.name} - 기존 인덱스를 확인 후 삭제해 주세요: {e}")
+            except Exception as e:
+                print(f"⚠️ MongoDB index bootstrap failed on {collection.name}: {e}")
+
+    async def close(self) -> None:
+        if self._index_task is not None and not self._index_task.done():
+            self._index_task.cancel()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        # 종료 전 남은 메시지 저장
+        await self.flush()
+
+    # --------------------------------------
+    # 쓰기 (write-behind)
+    # --------------------------------------
+
+    async def append_messages(self, session_id: str, messages: List[dict], title: str) -> None:
+        """메모리 캐시에 반영 + 저장 대기열에 추가만 하고 바로 반환"""
+        self.cache.append(session_id, messages, title, complete_if_new=False)
+
+        now_dt = datetime.utcnow()
+        pending = self._pending.get(session_id)
+        if pending is None:
+            pending = self._pending[session_id] = _PendingWrite(session_id, title, now_dt, now_dt)
+        pending.messages.extend(dict(m) for m in messages)
+        pending.updated_at = now_dt
+        self._pending_messages += len(messages)
+        self._enforce_pending_limit()
+        SESSION_STORE_PENDING.set(self._pending_messages)
+
+        self._ensure_worker()
+        if len(self._pending) >= self.flush_batch:
+            self._full.set()
+
+    def _enforce_pending_limit(self) -> None:
+        # DB 장애가 길어져도 메모리가 무한히 늘지 않도록 가장 오래된 세션의 대기 메시지부터 버림
+        while self._pending_messages > self.max_pending and len(self._pending) > 1:
+            _, dropped = self._pending.popitem(last=False)
+            self._pending_messages -= len(dropped.messages)
+            self.dropped_messages += len(dropped.messages)
+            SESSION_STORE_DROPPED.inc(len(dropped.messages))
+            print(f"⚠️ 대화 내역 저장 대기열 초과 - 세션 {dropped.session_id}의 메시지 {len(dropped.messages)}개를 버림")
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._full = asyncio.Event()
+            self._worker = asyncio.create_task(self._run(), name="session-store-flush")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            if self._pending:
+                await self.flush()
+
+    async def flush(self) -> None:
+        """
+        대기 중인 메시지 저장 (진행 중인 flush가 있으면 끝날 때까지 기다림)
+        1. 세션 문서 upsert + message_count $inc로 seq 구간 예약 (세션별, 동시 실행)
+        2. 버킷별 $push를 하나의 bulk_write로 전송
+        """
+        async with self._lock():
+            while self._pending:
+                batch = [self._pending.popitem(last=False)[1] for _ in range(min(self.flush_batch, len(self._pending)))]
+                count = sum(len(p.messages) for p in batch)
+                self._pending_messages -= count
+                start = time.perf_counter()
+                try:
+                    await self._write_batch(batch)
+                except Exception as e:
+                    # 다음 주기에 재시도 (그 사이 들어온 같은 세션 메시지보다 앞에 오도록 대기열 앞쪽에 되돌림)
+                    self.flush_errors += 1
+                    self._requeue(batch)
+                    print(f"⚠️ 대화 내역 저장 실패 - 다음 주기에 재시도: {e}")
+                    break
+                finally:
+                    SESSION_STORE_FLUSH_SECONDS.observe(time.perf_counter() - start)
+                    SESSION_STORE_PENDING.set(self._pending_messages)
+                self.flushes += 1
+                self.flushed_messages += count
+
+    async def _write_batch(self, batch: List[_PendingWrite]) -> None:
+        from pymongo import UpdateOne
+
+        results = await asyncio.gather(*(self._reserve_seq(p) for p in batch), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            raise errors[0]
+
+        ops = []
+        for p in batch:
+            grouped: Dict[int, List[dict]] = {}
+            for m in p.messages:
+                grouped.setdefault(m["seq"] // self.bucket_size, []).append(m)
+            for bucket, messages in grouped.items():
+                ops.append(UpdateOne(
+                    {"session_id": p.session_id, "bucket": bucket},
+                    {
+                        # 워커 여러 개가 같은 버킷에 쓰면 도착 순서가 섞일 수 있으므로 seq로 정렬해 저장
+                        "$push": {"messages": {"$each": messages, "$sort": {"seq": 1}}},
+                        "$set": {"updated_at": p.updated_at, "expires_at": p.updated_at + self.ttl},
+                    },
+                    upsert=True,
+                ))
+        if ops:
+            await self.buckets.bulk_write(ops, ordered=False)
+
+    async def _reserve_seq(self, p: _PendingWrite) -> None:
+        unassigned = [m for m in p.messages if "seq" not in m]
+        if not unassigned:
+            return
+        from pymongo import ReturnDocument
+
+        doc = await self.sessions.find_one_and_update(
+            {"session_id": p.session_id},
+            {
+                "$setOnInsert": {"created_at": p.created_at, "title": p.title},
+                "$inc": {"message_count": len(unassigned)},
+                "$set": {"updated_at": p.updated_at, "expires_at": p.updated_at + self.ttl},
+            },
+            projection={"_id": 0, "message_count": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        first = doc["message_count"] - len(unassigned)
+        for i, m in enumerate(unassigned):
+            m["seq"] = first + i
+
+    def _lock(self) -> asyncio.Lock:
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        return self._flush_lock
+
+    def _requeue(self, batch: List[_PendingWrite]) -> None:
+        for p in reversed(batch):
+            newer = self._pending.pop(p.session_id, None)
+            if newer is not None:
+                p.messages.extend(newer.messages)
+                p.updated_at = newer.updated_at
+                self._pending_messages -= len(newer.messages)
+            self._pending[p.session_id] = p
+            self._pending.move_to_end(p.session_id, last=False)
+            self._pending_messages += len(p.messages)
+        self._enforce_pending_limit()
+
+    async def _flush_session(self, session_id: str) -> None:
+        # 읽기 전에 해당 세션의 대기(또는 저장 중인) 메시지를 먼저 저장 (읽기 경로에서만 발생)
+        if session_id in self._pending or self._lock().locked():
+            await self.flush()
+
+    # --------------------------------------
+    # 읽기 / 관리
+    # --------------------------------------
+
+    async def list_sessions(self, limit: int = CHAT_HISTORY_PAGE_SIZE, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """(updated_at, session_id) 내림차순 keyset 페이지 - chat_history_updated_at_idx 인덱스만으로 정렬/범위 조회"""
+        after = decode_cursor(cursor, "u", "s") if cursor else None
+        await self.flush()
+        query: dict = {}
+        if after is not None:
+            updated_at = _from_ms(after["u"])
+            query = {"$or": [
+                {"updated_at": {"$lt": updated_at}},
+                {"updated_at": updated_at, "session_id": {"$lt": after["s"]}},
+            ]}
+        docs = await self.sessions.find(
+            query,
+            {"_id": 0, "session_id": 1, "title": 1, "updated_at": 1}
+        ).sort([("updated_at", -1), ("session_id", -1)]).limit(limit + 1).to_list(length=limit + 1)
+
+        sessions = docs[:limit]
+        for session in sessions:
+            if isinstance(session.get("updated_at"), datetime):
+                session["updated_at"] = _to_ms(session["updated_at"])
+        next_cursor = encode_cursor({"u": sessions[-1]["updated_at"], "s": sessions[-1]["session_id"]}) if len(docs) > limit else None
+        return sessions, next_cursor
+
+    async def get_page(self, session_id: str, limit: Optional[int] = CHAT_HISTORY_PAGE_SIZE, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """seq < 커서인 메시지 중 최근 limit개 (시간순) + 더 이전 페이지 커서 - 필요한 버킷만 읽음"""
+        before = decode_cursor(cursor, "before")["before"] if cursor else None
+        await self._flush_session(session_id)
+        meta = await self.sessions.find_one({"session_id": session_id}, {"_id": 0, "message_count": 1})
+        if not meta:
+            return [], None
+
+        total = meta.get("message_count", 0)
+        hi = min(before, total) if before is not None else total
+        lo = max(0, hi - limit) if limit else 0
+        if hi <= lo:
+            return [], None
+        docs = await self.buckets.find(
+            {"session_id": session_id, "bucket": {"$gte": lo // self.bucket_size, "$lte": (hi - 1) // self.bucket_size}},
+            {"_id": 0, "messages": 1},
+        ).to_list(length=None)
+        # 재시도로 같은 메시지가 두 번 들어갔을 수 있으므로 seq로 중복 제거
+        by_seq = {m["seq"]: m for doc in docs for m in doc.get("messages", []) if lo <= m["seq"] < hi}
+        page = [by_seq[seq] for seq in sorted(by_seq)]
+        next_cursor = encode_cursor({"before": lo}) if lo > 0 else None
+        return page, next_cursor
+
+    async def get_messages(self, session_id: str, limit: Optional[int] = None) -> List[dict]:
+        # 최근 대화는 메모리 캐시에서 바로 (answer_with_context 경로)
+        record = self.cache.get_record(session_id)
+        if record is not None and record.has_all(limit):
+            return list(record.messages[-limit:] if limit else record.messages)
+
+        messages, _ = await self.get_page(session_id, limit)
+        if not messages:
+            return list(record.messages[-limit:] if (record and limit) else (record.messages if record else []))
+        meta = await self.get_session(session_id)
+        if meta is not None:
+            meta.messages = list(messages)
+            meta.complete = True
+            self.cache.put_record(meta)
+        return messages
+
+    async def get_session(self, session_id: str) -> Optional[SessionRecord]:
+        await self._flush_session(session_id)
+        doc = await self.sessions.find_one({"session_id": session_id}, {"_id": 0})
+        return self._record_from_doc(session_id, doc) if doc else None
+
+    async def delete_session(self, session_id: str) -> bool:
+        self.cache.remove(session_id)
+        # 저장 중인 배치가 삭제 뒤에 세션을 되살리지 않도록 flush가 끝난 뒤 삭제
+        async with self._lock():
+            pending = self._pending.pop(session_id, None)
+            if pending is not None:
+                self._pending_messages -= len(pending.messages)
+                SESSION_STORE_PENDING.set(self._pending_messages)
+            result = await self.sessions.delete_one({"session_id": session_id})
+            await self.buckets.delete_many({"session_id": session_id})
+        return bool(result.deleted_count > 0 or pending is not None)
+
+    async def update_title(self, session_id: str, title: str) -> bool:
+        await self._flush_session(session_id)
+        record = self.cache.get_record(session_id)
+        if record is not None:
+            record.title = title
+        result = await self.sessions.update_one({"session_id": session_id}, {"$set": {"title": title}})
+        return bool(result.modified_count > 0)
+
+    @staticmethod
+    def _record_from_doc(session_id: str, doc: dict) -> SessionRecord:
+        created_at, updated_at = doc.get("created_at"), doc.get("updated_at")
+        return SessionRecord(
+            session_id=session_id,
+            title=doc.get("title", ""),
+            created_at=_to_ms(created_at) / 1000.0 if isinstance(created_at, datetime) else time.time(),
+            updated_at=_to_ms(updated_at) / 1000.0 if isinstance(updated_at, datetime) else time.time(),
+            message_count=doc.get("message_count", 0),
+            complete=False,
+        )
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": self.backend,
+            "cache": self.cache.snapshot(),
+            "pending_sessions": len(self._pending),
+            "pending_messages": self._pending_messages,
+            "flushes": self.flushes,
+            "flushed_messages": self.flushed_messages,
+            "flush_errors": self.flush_errors,
+            "dropped_messages": self.dropped_messages,
+        }
+
+
+#--------------------------------------
+# 설정에 맞는 저장소 생성
+#--------------------------------------
+def create_session_store(backend: Optional[str] = None):
+    backend = (backend or CHAT_SESSION_STORE).lower()
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend != "mongo":
+        raise ValueError(f"지원하지 않는 CHAT_SESSION_STORE 입니다: {backend} (memory | mongo)")
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from backend.database import _resolve_local_mongo_uri
+
+    mongo_uri = _resolve_local_mongo_uri(os.getenv("MONGODB_URI") or os.getenv("MONGO_URI") or "mongodb://localhost:27017")
+    db_name = os.getenv("DB_NAME") or "moaai_db"
+    print(f"▶ Chat session store: MongoDB write-behind ({db_name}.{SESSIONS_COLLECTION}, flush={CHAT_SESSION_FLUSH_MS:g}ms)")
+    return MongoSessionStore(AsyncIOMotorClient(mongo_uri)[db_name])
+
+
+#-------------------------------
+#전역 인스턴스 (워커 프로세스당 1개)
+session_store = create_session_store()
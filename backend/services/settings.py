@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 
 from llama_index.core import Settings
 
+from .embedding_cache import wrap_embed_model
+
 load_dotenv()
 
 
@@ -38,7 +40,7 @@ def get_config() -> AppConfig:
         reranker_top_k=int(os.getenv("RERANKER_TOP_K", "6")),
         metadata_top_k=int(os.getenv("METADATA_TOP_K", "6")),
         openai_api_key=os.getenv("OPENAI_API_KEY"),
-이제         openai_llm_model=os.getenv("OPENAI_LLM_MODEL", "gpt-4o-mini"),
+        openai_llm_model=os.getenv("OPENAI_LLM_MODEL", "gpt-4o-mini"),
         openai_embed_model=os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-large"),
         ollama_base_url=os.getenv("OLLAMA_BASE_URL"),
         ollama_llm_model=os.getenv("OLLAMA_LLM_MODEL", "qwen2.5:7b-instruct"),
@@ -57,11 +59,11 @@ def configure_llamaindex() -> AppConfig:
 
         Settings.llm = OpenAI(model=cfg.openai_llm_model)
         # 중요: 기존 Qdrant 데이터가 Ollama로 인덱싱되었다면 아래 줄은 주석 처리하고 OllamaEmbedding을 쓰세요.
-        # Settings.embed_model = OpenAIEmbedding(model=cfg.openai_embed_model)
+        # Settings.embed_model = wrap_embed_model(OpenAIEmbedding(model=cfg.openai_embed_model))
         
         # (임시 해결책) 기존 로컬 데이터를 그대로 쓰기 위해 임베딩만 Ollama 유지
         from llama_index.embeddings.ollama import OllamaEmbedding
-        # Settings.embed_model = OllamaEmbedding(model_name=cfg.ollama_embed_model, base_url=cfg.ollama_base_url)
+        # Settings.embed_model = wrap_embed_model(OllamaEmbedding(model_name=cfg.ollama_embed_model, base_url=cfg.ollama_base_url))
         
         print(f"🚀 OpenAI 모드 활성화: {cfg.openai_llm_model}")
 
@@ -71,7 +73,9 @@ def configure_llamaindex() -> AppConfig:
         from llama_index.embeddings.ollama import OllamaEmbedding
 
         Settings.llm = Ollama(model=cfg.ollama_llm_model, base_url=cfg.ollama_base_url)
-        Settings.embed_model = OllamaEmbedding(model_name=cfg.ollama_embed_model, base_url=cfg.ollama_base_url)
+        Settings.embed_model = wrap_embed_model(
+            OllamaEmbedding(model_name=cfg.ollama_embed_model, base_url=cfg.ollama_base_url)
+        )
         
         print(f"🏠 Ollama 로컬 모드 활성화: {cfg.ollama_llm_model}")
 
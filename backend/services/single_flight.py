@@ -0,0 +1,66 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from backend.services.metrics import SINGLE_FLIGHT_REQUESTS, SINGLE_FLIGHT_SAVED_SECONDS
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 요청을 하나의 계산으로 합침
+    - 첫 요청(leader)이 계산을 태스크로 시작하고, 완료 전에 들어온 같은 키 요청(follower)은 그 결과를 함께 받음
+    - 계산은 별도 태스크로 실행되므로 leader 요청이 취소되어도 나머지 요청은 결과를 받음
+    - 결과 객체는 모든 요청이 공유하므로 호출 측에서 수정하지 말 것
+    - 완료 즉시 키를 제거 (결과 캐싱은 하지 않음 - 캐시는 answer_cache 등 별도 계층 담당)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+
+        # 통계
+        self.leaders = 0
+        self.followers = 0
+        self.saved_s = 0.0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """(결과, 합쳐진 요청인지 여부) 반환"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.followers += 1
+            self._waiters[key] += 1
+            SINGLE_FLIGHT_REQUESTS.inc(name=self.name, role="follower")
+            return await asyncio.shield(task), True
+
+        self.leaders += 1
+        SINGLE_FLIGHT_REQUESTS.inc(name=self.name, role="leader")
+        task = asyncio.ensure_future(self._run(key, fn))
+        # 모든 요청이 취소된 뒤 실패해도 "exception was never retrieved" 경고가 남지 않도록 결과를 소비
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[key] = task
+        self._waiters[key] = 0
+        return await asyncio.shield(task), False
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.perf_counter()
+        try:
+            return await fn()
+        finally:
+            followers = self._waiters.pop(key, 0)
+            self._inflight.pop(key, None)
+            if followers:
+                # follower마다 leader의 계산 한 번씩을 아낀 것으로 집계
+                saved = (time.perf_counter() - start) * followers
+                self.saved_s += saved
+                SINGLE_FLIGHT_SAVED_SECONDS.inc(saved, name=self.name)
+
+    def snapshot(self) -> dict:
+        total = self.leaders + self.followers
+        return {
+            "inflight_keys": len(self._inflight),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "coalesced_ratio": round(self.followers / total, 4) if total else 0.0,
+            "saved_s": round(self.saved_s, 2),
+        }
@@ -0,0 +1,178 @@
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+import aiohttp
+from llama_index.core import Settings
+
+from backend.services import search_service
+from backend.services.context_packer import count_tokens
+
+
+#-----------------------------------
+#환경 변수
+WARMUP_ENABLED = (os.getenv("WARMUP_ENABLED") or "true").strip().lower() in ["1", "true", "yes", "y", "on"]
+WARMUP_TIMEOUT_S = float(os.getenv("WARMUP_TIMEOUT_S", "600"))              # 모델 로딩 포함 단계별 최대 대기 시간
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")                   # Ollama가 모델을 메모리에 유지하는 시간
+OLLAMA_KEEPALIVE_PING_S = float(os.getenv("OLLAMA_KEEPALIVE_PING_S", "240")) # keep-alive 갱신 주기 (0이면 끔)
+
+WARMUP_TEXT = "특허 검색 서비스 워밍업"
+COMPONENTS = ("tokenizer", "embedding", "rerank", "llm")
+
+
+class WarmupState:
+    """구성 요소별 warm/cold 상태 (/ready/chat 응답에 사용)"""
+
+    def __init__(self):
+        self.components: Dict[str, dict] = {name: {"warm": False} for name in COMPONENTS}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.last_keepalive_at: Optional[float] = None
+        self.last_keepalive_error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return all(c["warm"] for c in self.components.values())
+
+    @property
+    def status(self) -> str:
+        if self.ready:
+            return "warm"
+        if self.started_at is not None and self.finished_at is None:
+            return "warming"
+        return "cold"
+
+    def mark(self, name: str, elapsed_s: float, error: Optional[Exception] = None) -> None:
+        self.components[name] = {
+            "warm": error is None,
+            "ms": round(elapsed_s * 1000.0, 1),
+            **({"error": repr(error)} if error is not None else {}),
+        }
+
+    def snapshot(self) -> dict:
+        return {
+            "status": self.status,
+            "components": self.components,
+            "warmup_s": round(self.finished_at - self.started_at, 2) if self.started_at and self.finished_at else None,
+            "last_keepalive_at": self.last_keepalive_at,
+            "last_keepalive_error": self.last_keepalive_error,
+        }
+
+
+#-------------------------------
+#전역 상태
+warmup_state = WarmupState()
+
+
+#--------------------------------------
+# Ollama 직접 호출 (keep_alive 지정)
+#--------------------------------------
+async def _ollama_post(path: str, payload: dict) -> dict:
+    timeout = aiohttp.ClientTimeout(total=WARMUP_TIMEOUT_S)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with session.post(f"{search_service.OLLAMA_BASE_URL.rstrip('/')}{path}", json=payload) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+
+async def _ping_ollama_models() -> None:
+    """빈 요청으로 LLM/임베딩 모델을 메모리에 올리고 keep_alive 시간을 갱신 (Ollama 문서의 preload 방식)"""
+    await asyncio.gather(
+        _ollama_post("/api/generate", {"model": search_service.LLM_MODEL, "keep_alive": OLLAMA_KEEP_ALIVE}),
+        _ollama_post("/api/embed", {"model": search_service.EMBED_MODEL, "input": "", "keep_alive": OLLAMA_KEEP_ALIVE}),
+    )
+
+
+#--------------------------------------
+# 워밍업 단계
+#--------------------------------------
+async def _warm_tokenizer() -> None:
+    # 컨텍스트 패킹용 tiktoken 인코딩 로드
+    count_tokens(WARMUP_TEXT)
+
+
+async def _warm_embedding() -> None:
+    # 캐시 래퍼를 거치지 않고 실제 모델 호출
+    model = Settings.embed_model
+    model = getattr(model, "inner", model)
+    await model.aget_query_embedding(WARMUP_TEXT)
+
+
+async def _warm_rerank() -> None:
+    await search_service.reranker.score([(WARMUP_TEXT, WARMUP_TEXT)])
+
+
+async def _warm_llm() -> None:
+    # 모델 로드 + 토큰 1개 생성 (프롬프트 처리 경로까지 확인)
+    await _ollama_post(
+        "/api/generate",
+        {
+            "model": search_service.LLM_MODEL,
+            "prompt": WARMUP_TEXT,
+            "stream": False,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": {"num_predict": 1},
+        },
+    )
+
+
+_STEPS = {
+    "tokenizer": _warm_tokenizer,
+    "embedding": _warm_embedding,
+    "rerank": _warm_rerank,
+    "llm": _warm_llm,
+}
+
+
+async def _run_step(name: str) -> None:
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(_STEPS[name](), timeout=WARMUP_TIMEOUT_S)
+    except Exception as e:
+        warmup_state.mark(name, time.perf_counter() - start, e)
+        print(f"⚠️ [워밍업] {name} 실패: {e!r}")
+        return
+    warmup_state.mark(name, time.perf_counter() - start)
+    print(f"🔥 [워밍업] {name} {(time.perf_counter() - start):.2f}초")
+
+
+async def warm_up() -> dict:
+    """initialize_llamaindex 이후 호출: 각 모델을 한 번씩 실행해 첫 사용자 요청이 모델 로딩을 떠안지 않게 함"""
+    warmup_state.started_at = time.time()
+    warmup_state.finished_at = None
+    if not WARMUP_ENABLED:
+        for name in COMPONENTS:
+            warmup_state.mark(name, 0.0)
+    else:
+        # 구성 요소끼리는 독립적이므로 동시에 로드
+        await asyncio.gather(*(_run_step(name) for name in COMPONENTS))
+    warmup_state.finished_at = time.time()
+    return warmup_state.snapshot()
+
+
+async def run_keepalive_loop(interval_s: float = OLLAMA_KEEPALIVE_PING_S) -> None:
+    """
+    Ollama가 유휴 모델을 내리지 않도록 주기적으로 keep_alive 갱신
+    + 워밍업에 실패했거나 cold로 떨어진 구성 요소는 같은 주기로 다시 워밍업 (/ready/chat이 스스로 회복)
+    """
+    if interval_s <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            await _ping_ollama_models()
+            warmup_state.last_keepalive_at = time.time()
+            warmup_state.last_keepalive_error = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            warmup_state.last_keepalive_error = repr(e)
+            # 모델이 내려갔을 수 있으므로 다시 워밍업에 성공하기 전까지 cold로 표시
+            warmup_state.components["llm"]["warm"] = False
+            print(f"⚠️ [keep-alive] Ollama ping 실패: {e!r}")
+
+        cold = [name for name in COMPONENTS if not warmup_state.components[name]["warm"]]
+        if cold:
+            print(f"🔁 [keep-alive] cold 구성 요소 재워밍업: {', '.join(cold)}")
+            await asyncio.gather(*(_run_step(name) for name in cold))
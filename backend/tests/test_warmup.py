@@ -0,0 +1,107 @@
+"""
+warmup keep-alive 재시도 - 워밍업에 실패한 구성 요소를 keep-alive 주기에 다시 워밍업해 /ready/chat이 스스로 회복하는지
+
+실행 (저장소 루트에서, Ollama / Qdrant 불필요 - 워밍업 단계는 가짜 함수로 대체):
+    python -m pytest -q backend/tests/test_warmup.py
+"""
+import asyncio
+
+import pytest
+
+main = pytest.importorskip("backend.main")
+warmup = pytest.importorskip("backend.services.warmup")
+
+from backend.services.chat_bootstrap import chat_bootstrap
+
+
+KEEPALIVE_S = 0.01
+
+
+class FakeSteps:
+    """구성 요소별 호출 횟수를 세고, fail_first에 든 구성 요소는 첫 호출만 실패"""
+
+    def __init__(self, fail_first=()):
+        self.calls = {name: 0 for name in warmup.COMPONENTS}
+        self.fail_first = set(fail_first)
+
+    def step(self, name: str):
+        async def run() -> None:
+            self.calls[name] += 1
+            if name in self.fail_first and self.calls[name] == 1:
+                raise RuntimeError(f"{name} 모델 로딩 실패")
+        return run
+
+
+@pytest.fixture
+def steps(monkeypatch, request):
+    fake = FakeSteps(getattr(request, "param", ()))
+    monkeypatch.setattr(warmup, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(warmup, "warmup_state", warmup.WarmupState())
+    monkeypatch.setattr(warmup, "_STEPS", {name: fake.step(name) for name in warmup.COMPONENTS})
+    # 챗봇 초기화는 끝난 상태 - /ready/chat은 워밍업 상태만으로 결정
+    monkeypatch.setattr(chat_bootstrap, "status", "ready")
+    monkeypatch.setattr(chat_bootstrap, "_search_service", object())
+    return fake
+
+
+async def _ready_status() -> int:
+    return (await main.chat_readiness()).status_code
+
+
+async def _run_keepalive_until_ready(after=lambda: True, max_ticks: int = 100) -> int:
+    """keep-alive 루프를 돌리다가 after()가 참이고 모든 구성 요소가 warm이 되면 /ready/chat 상태 코드 반환"""
+    task = asyncio.create_task(warmup.run_keepalive_loop(interval_s=KEEPALIVE_S))
+    try:
+        for _ in range(max_ticks):
+            await asyncio.sleep(KEEPALIVE_S)
+            if after() and warmup.warmup_state.ready:
+                break
+        return await _ready_status()
+    finally:
+        task.cancel()
+
+
+async def _ping_ok() -> None:
+    return None
+
+
+@pytest.mark.parametrize("steps", [("embedding",)], indirect=True)
+def test_ready_recovers_after_embedding_warmup_failure(steps, monkeypatch):
+    monkeypatch.setattr(warmup, "_ping_ollama_models", _ping_ok)
+
+    async def scenario():
+        await warmup.warm_up()
+        assert warmup.warmup_state.components["embedding"]["warm"] is False
+        assert "error" in warmup.warmup_state.components["embedding"]
+        assert await _ready_status() == 503
+
+        assert await _run_keepalive_until_ready() == 200
+
+    asyncio.run(scenario())
+    assert steps.calls["embedding"] == 2
+    # 이미 warm인 구성 요소는 다시 워밍업하지 않음
+    assert steps.calls["tokenizer"] == steps.calls["rerank"] == steps.calls["llm"] == 1
+    assert warmup.warmup_state.snapshot()["status"] == "warm"
+
+
+def test_failed_ping_marks_llm_cold_until_rewarmed(steps, monkeypatch):
+    pings = {"count": 0}
+
+    async def flaky_ping() -> None:
+        pings["count"] += 1
+        if pings["count"] == 1:
+            raise RuntimeError("Ollama 연결 실패")
+
+    monkeypatch.setattr(warmup, "_ping_ollama_models", flaky_ping)
+
+    async def scenario():
+        await warmup.warm_up()
+        assert await _ready_status() == 200
+
+        # ping 실패 → llm cold 표시 → 같은 주기에 재워밍업
+        assert await _run_keepalive_until_ready(after=lambda: pings["count"] >= 2) == 200
+
+    asyncio.run(scenario())
+    assert steps.calls["llm"] == 2
+    assert steps.calls["embedding"] == 1
+    assert warmup.warmup_state.last_keepalive_error is None
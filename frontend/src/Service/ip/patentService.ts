@@ -16,6 +16,7 @@ export interface FetchPatentsParams {
   status?: string | string[]; // 법적 상태 (단일 또는 배열)
   page?: number;
   limit?: number;
+  view?: "list" | "full"; // list: 목록용 필드만 (기본) / full: 전체 문서
 }
 
 export interface PatentSearchResponse {
@@ -23,6 +24,7 @@ export interface PatentSearchResponse {
   page: number;
   limit: number;
   data: any[];
+  next_cursor?: string | null;
   engine: string;
 }
 
@@ -45,3 +47,11 @@ export async function fetchPatents(params: FetchPatentsParams): Promise<PatentSe
   return response.data;
 }
 
+// 특허 상세 (청구항 / 패밀리 정보 등 목록에서 빠진 필드 포함 전체 문서)
+export async function fetchPatentDetail(applicationNumber: string): Promise<Record<string, any>> {
+  const response = await apiClient.get<Record<string, any>>(
+    `/api/patents/${encodeURIComponent(applicationNumber)}`
+  );
+
+  return response.data;
+}
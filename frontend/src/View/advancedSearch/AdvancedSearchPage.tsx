@@ -4,7 +4,7 @@ import { useState, useContext, useMemo } from 'react';
 import { ThemeContext } from '../../shared/theme/ThemeContext';
 import PatentDetailModal from './PatentDetailModal';
 import PatentPdfModal from './PatentPdfModal';
-import { fetchPatents } from '../../Service/ip/patentService';
+import { fetchPatentDetail, fetchPatents } from '../../Service/ip/patentService';
 import PatentAdvancedSearchModal from './PatentAdvancedSearchModal';
 
 
@@ -118,8 +118,7 @@ export default function AdvancedSearchPage() {
         
         // 3. 데이터 매핑 (테이블용 간소화 + 모달용 전체 데이터 보존)
         let patentList = response.data.map((item: any, index: number) => {
-          // Elasticsearch에서 반환된 원본 데이터를 그대로 보존 (중요!)
-          // item은 Elasticsearch _source의 원본 데이터입니다
+          // 목록 응답은 목록용 필드만 포함 (청구항 등 나머지는 모달을 열 때 상세 API로 조회)
           const fullData = {
             ...item,  // 모든 원본 필드 포함
             // 명시적으로 필요한 필드들 확인
@@ -157,7 +156,7 @@ export default function AdvancedSearchPage() {
             affiliation: item.applicant?.name || item.affiliation || '',
             // 하이라이팅 정보
             _highlight: highlight,
-            // 모달에 전달할 전체 원본 데이터 (Elasticsearch _source 그대로)
+            // 모달에 전달할 원본 데이터 (상세 API 응답으로 보강됨)
             fullData: fullData
           };
         });
@@ -201,6 +200,23 @@ export default function AdvancedSearchPage() {
     form.setFieldsValue({ [fieldName]: newValue });
   };
 
+  // 상세 모달: 목록 데이터로 먼저 열고, 목록에 없는 필드(청구항 / 패밀리 정보 등)는 상세 API로 채움
+  const openDetail = async (record: any) => {
+    const listData = record.fullData || record;
+    setCurrentPatent(listData);
+    setIsDetailOpen(true);
+    if (!listData.applicationNumber) return;
+    try {
+      const detail = await fetchPatentDetail(listData.applicationNumber);
+      setCurrentPatent((prev: any) =>
+        prev?.applicationNumber === listData.applicationNumber ? { ...listData, ...detail } : prev
+      );
+    } catch (error) {
+      console.error("Detail Error:", error);
+      message.error('특허 상세 정보를 불러오지 못했습니다.');
+    }
+  };
+
   const handleDownload = async () => {
     if (selectedRows.length === 0) {
       message.warning('다운로드할 특허를 선택해주세요.');
@@ -245,7 +261,7 @@ export default function AdvancedSearchPage() {
     {
       title: '출원번호', dataIndex: 'appNo', width: 150, align: 'center' as const,
       render: (text: string, record: any) => (
-        <a style={{ color: token.colorLink }} onClick={() => { setCurrentPatent(record.fullData || record); setIsDetailOpen(true); }}>
+        <a style={{ color: token.colorLink }} onClick={() => openDetail(record)}>
           {text}
         </a>
       )
@@ -275,7 +291,7 @@ export default function AdvancedSearchPage() {
         );
         
         return (
-          <b style={{ cursor: 'pointer', color: token.colorText, textAlign: 'left' }} onClick={() => { setCurrentPatent(record.fullData || record); setIsDetailOpen(true); }}>
+          <b style={{ cursor: 'pointer', color: token.colorText, textAlign: 'left' }} onClick={() => openDetail(record)}>
             {highlightedTitle}
           </b>
         );
@@ -1,6 +1,6 @@
 import { Modal, Spin, Tabs } from "antd";
 import { useEffect, useMemo, useState } from "react";
-import { fetchPatents } from "@/Service/ip/patentService";
+import { fetchPatentDetail, fetchPatents } from "@/Service/ip/patentService";
 import type { PatentNumberKind } from "./patent_modal_context";
 
 export type PatentDetail = {
@@ -251,11 +251,14 @@ export default function PatentDetailModal(props: Props) {
       setErrorMessage("");
       const kind: PatentNumberKind = props.numberKind ?? "application";
       try {
-        const params = kind === "publication"
-          ? { open_num: appNo, limit: 1, page: 1 }
-          : { app_num: appNo, limit: 1, page: 1 };
-        const response = await fetchPatents(params);
-        const first: unknown = Array.isArray(response.data) ? response.data[0] : undefined;
+        // 출원번호는 상세 API로 바로 조회, 공개번호는 검색으로 찾되 전체 문서(view=full)를 받음
+        let first: unknown;
+        if (kind === "publication") {
+          const response = await fetchPatents({ open_num: appNo, limit: 1, page: 1, view: "full" });
+          first = Array.isArray(response.data) ? response.data[0] : undefined;
+        } else {
+          first = await fetchPatentDetail(appNo);
+        }
         if (!first || typeof first !== "object") {
           throw new Error("특허 정보를 찾을 수 없습니다.");
         }